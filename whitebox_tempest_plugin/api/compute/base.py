@@ -13,8 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import six
-import time
 import xml.etree.ElementTree as ET
 
 from oslo_log import log as logging
@@ -24,9 +24,13 @@ from tempest import config
 from tempest.lib.common.utils import data_utils
 from tempest.lib.common.utils import test_utils
 from tempest.lib import exceptions as lib_exc
+from testtools import content
 
 from whitebox_tempest_plugin.common import waiters as wb_waiters
+from whitebox_tempest_plugin import domain
 from whitebox_tempest_plugin.services import clients
+from whitebox_tempest_plugin.services import metrics
+from whitebox_tempest_plugin import utils as whitebox_utils
 
 if six.PY2:
     import contextlib2 as contextlib
@@ -40,6 +44,22 @@ LOG = logging.getLogger(__name__)
 
 class BaseWhiteboxComputeTest(base.BaseV2ComputeAdminTest):
 
+    def setUp(self):
+        super(BaseWhiteboxComputeTest, self).setUp()
+        # NOTE(artom) Maps (server id, host) to the server's `updated`
+        # timestamp and Domain, see get_server_domain().
+        self._server_xml_cache = {}
+        if CONF.whitebox.command_metrics:
+            metrics.collector.start_test(self.id())
+            # NOTE(artom) Cleanups run in reverse order, so this runs last
+            # and the commands run by the test's other cleanups are counted.
+            self.addCleanup(self._attach_command_metrics)
+
+    def _attach_command_metrics(self):
+        summary = metrics.collector.end_test(self.id())
+        self.addDetail('whitebox-command-metrics',
+                       content.json_content(summary))
+
     def create_test_server(self, *args, **kwargs):
         """Whitebox is able to completely fill its compute hosts because it
         runs with things like PCI devices and dedicated CPUs. Because of that
@@ -90,6 +110,18 @@ class BaseWhiteboxComputeTest(base.BaseV2ComputeAdminTest):
         self.servers_client.reboot_server(server_id, type=type)
         waiters.wait_for_server_status(
             self.servers_client, server_id, 'ACTIVE')
+        self.invalidate_server_xml(server_id)
+
+    def resize_server(self, server_id, new_flavor_id, **kwargs):
+        super(BaseWhiteboxComputeTest, self).resize_server(
+            server_id, new_flavor_id, **kwargs)
+        self.invalidate_server_xml(server_id)
+
+    def attach_volume(self, server, volume, *args, **kwargs):
+        attachment = super(BaseWhiteboxComputeTest, self).attach_volume(
+            server, volume, *args, **kwargs)
+        self.invalidate_server_xml(server['id'])
+        return attachment
 
     def copy_default_image(self, **kwargs):
         """Creates a new image by downloading the default image's bits and
@@ -130,18 +162,151 @@ class BaseWhiteboxComputeTest(base.BaseV2ComputeAdminTest):
         svc_mgrs = [clients.NovaServiceManager(compute, 'nova-compute',
                                                self.os_admin.services_client)
                     for compute in computes]
-        ctxt_mgrs = [mgr.config_options(*options) for mgr in svc_mgrs]
+        ctxt_mgrs = [mgr.config_options(*options, restart=False)
+                     for mgr in svc_mgrs]
+        # NOTE(artom) Each host's service is reconfigured independently, so
+        # do them all at once, then restart all the services together. The
+        # exit stack restarts them again once the options are restored.
         with contextlib.ExitStack() as stack:
-            yield [stack.enter_context(mgr) for mgr in ctxt_mgrs]
-
-    def get_server_xml(self, server_id):
+            stack.callback(clients.restart_nova_services, svc_mgrs)
+            values = stack.enter_context(
+                whitebox_utils.parallel_multicontext(*ctxt_mgrs))
+            clients.restart_nova_services(svc_mgrs)
+            yield values
+
+    def execute_on_computes(self, command, sudo=False, container_name=None,
+                            hosts=None):
+        """Runs a command on all compute hosts concurrently.
+
+        :param command: The command to run, or a function that takes a
+                        compute hostname and returns the command to run on
+                        that host.
+        :param hosts: The compute hostnames to run the command on, if not
+                      all of list_compute_hosts().
+        :return: A dict of compute hostname to whitebox_utils.FanOutResult,
+                 whose result() returns the command's output or raises its
+                 error.
+        """
+        def execute(host):
+            cmd = command(host) if callable(command) else command
+            return clients.SSHClient(host).execute(
+                cmd, container_name=container_name, sudo=sudo)
+
+        if hosts is None:
+            hosts = self.list_compute_hosts()
+        return whitebox_utils.fan_out(execute, hosts)
+
+    def tail_compute_logs(self):
+        """Starts following the nova-compute logs of all compute hosts, and
+        returns a dict of compute hostname to clients.LogTailer. The tailers
+        are stopped at the end of the test.
+        """
+        tailers = {host: clients.LogTailer(host)
+                   for host in self.list_compute_hosts()}
+        results = whitebox_utils.fan_out(
+            lambda host: tailers[host].start(), tailers)
+        for host, result in results.items():
+            if result.error is None:
+                self.addCleanup(tailers[host].stop)
+        for result in results.values():
+            result.result()
+        return tailers
+
+    def get_server_domain(self, server_id):
+        """Returns the server's libvirt domain, as a domain.Domain.
+
+        The domain is cached for the duration of the test, keyed by the
+        server's ID and host, and only reused while the server's `updated`
+        time in nova is unchanged. That time has a one second resolution, so
+        it does not catch a change made within a second of the domain being
+        fetched. The helpers in this class that change a domain, like
+        reboot_server(), resize_server(), live_migrate(), evacuate_servers()
+        or shutdown_server_domain(), invalidate it themselves. Tests that
+        change a domain in any other way, through the compute API directly
+        or on the host, must call invalidate_server_xml() themselves.
+        """
         server = self.os_admin.servers_client.show_server(server_id)['server']
+        return self._get_server_domain(server)
+
+    def _get_server_domain(self, server):
         host = server['OS-EXT-SRV-ATTR:host']
         server_instance_name = server['OS-EXT-SRV-ATTR:instance_name']
 
-        virshxml = clients.VirshXMLClient(host)
-        xml = virshxml.dumpxml(server_instance_name)
-        return ET.fromstring(xml)
+        key = (server['id'], host)
+        updated, server_domain = self._server_xml_cache.get(key, (None, None))
+        if server_domain is None or updated != server['updated']:
+            virshxml = clients.VirshXMLClient(host)
+            server_domain = domain.Domain(
+                virshxml.dumpxml(server_instance_name))
+            self._server_xml_cache[key] = (server['updated'], server_domain)
+        return server_domain
+
+    def _show_servers(self, server_ids):
+        """Returns the admin view of several servers, as a dict of server ID
+        to server, from a single list_servers call rather than a show_server
+        per server.
+        """
+        server_ids = set(server_ids)
+        servers = {}
+        if len(server_ids) > 1:
+            for server in self.os_admin.servers_client.list_servers(
+                    detail=True, all_tenants=True)['servers']:
+                if server['id'] in server_ids:
+                    servers[server['id']] = server
+        # NOTE(artom) The listing is paginated by nova, so in a large cloud
+        # some of the servers may not be in it. Look those up individually.
+        for server_id in server_ids - set(servers):
+            servers[server_id] = self.os_admin.servers_client.show_server(
+                server_id)['server']
+        return servers
+
+    def get_server_domains(self, server_ids):
+        """Returns the libvirt domains of several servers, as a dict of
+        server ID to domain.Domain, and caches them for get_server_domain().
+
+        The servers' hosts and instance names are resolved with a single
+        admin list_servers call. Domains that are not cached yet are then
+        fetched with one VirshXMLClient.dumpxml_all() per host, all hosts in
+        parallel, so that getting the domains of servers spread over several
+        hosts takes about as long as a single host round trip.
+        """
+        servers = self._show_servers(server_ids)
+        hosts = collections.defaultdict(list)
+        for server_id, server in servers.items():
+            host = server['OS-EXT-SRV-ATTR:host']
+            updated, _ = self._server_xml_cache.get((server_id, host),
+                                                    (None, None))
+            if updated != server['updated']:
+                hosts[host].append(server_id)
+
+        results = whitebox_utils.fan_out(
+            lambda host: clients.VirshXMLClient(host).dumpxml_all(), hosts)
+        for host, result in results.items():
+            xmls = result.result()
+            for server_id in hosts[host]:
+                server = servers[server_id]
+                instance_name = server['OS-EXT-SRV-ATTR:instance_name']
+                if instance_name in xmls:
+                    self._server_xml_cache[(server_id, host)] = (
+                        server['updated'], domain.Domain(xmls[instance_name]))
+
+        # NOTE(artom) Anything dumpxml_all() did not return, like a domain
+        # that is shut off, is looked up individually.
+        return {server_id: self._get_server_domain(servers[server_id])
+                for server_id in server_ids}
+
+    def get_server_xml(self, server_id):
+        """Returns the server's domain XML, as an Element. Unlike
+        get_server_domain(), the Element is parsed for every call, so callers
+        are free to modify it.
+        """
+        return ET.fromstring(self.get_server_domain(server_id).xml)
+
+    def invalidate_server_xml(self, server_id):
+        """Drops the server's cached domain XML, on all hosts."""
+        for key in list(self._server_xml_cache):
+            if key[0] == server_id:
+                del self._server_xml_cache[key]
 
     def get_secret_xml(self, secret_uuid, host):
         virshxml = clients.VirshXMLClient(host)
@@ -154,20 +319,13 @@ class BaseWhiteboxComputeTest(base.BaseV2ComputeAdminTest):
         domain_name = server_details['OS-EXT-SRV-ATTR:instance_name']
         ssh_client = clients.SSHClient(host)
         ssh_client.execute('virsh shutdown %s' % domain_name, sudo=True)
-        self._wait_for_domain_shutdown(ssh_client, domain_name)
-
-    def _wait_for_domain_shutdown(self, ssh_client, domain_name):
-        start_time = int(time.time())
-        timeout = CONF.compute.build_timeout
-        interval = CONF.compute.build_interval
-        while int(time.time()) - start_time <= timeout:
-            domains = ssh_client.execute('virsh list --name', sudo=True)
-            if domain_name in domains:
-                continue
-            else:
-                break
-            time.sleep(interval)
-        else:
+        self.invalidate_server_xml(server['id'])
+        self._wait_for_domain_shutdown(clients.VirshXMLClient(host),
+                                       domain_name)
+
+    def _wait_for_domain_shutdown(self, virshxml, domain_name):
+        if not virshxml.wait_for_domain_shutdown(
+                domain_name, CONF.compute.build_timeout):
             raise lib_exc.TimeoutException(
                 'Failed to shutdown domain within the required time.')
 
@@ -197,6 +355,7 @@ class BaseWhiteboxComputeTest(base.BaseV2ComputeAdminTest):
                                                       host=target_host)
         waiters.wait_for_server_status(clients.servers_client, server_id,
                                        state)
+        self.invalidate_server_xml(server_id)
         if target_host:
             self.assertEqual(
                 target_host, self.get_host_for_server(server_id),
@@ -333,12 +492,12 @@ class BaseWhiteboxComputeTest(base.BaseV2ComputeAdminTest):
         """
         port_info = self.os_admin.ports_client.show_port(port_id)
         interface_type = self._get_expected_xml_interface_type(port_info)
-        root = self.get_server_xml(server_id)
+        server_domain = self.get_server_domain(server_id)
         mac = port_info['port']['mac_address']
-        interface_list = root.findall(
-            "./devices/interface[@type='%s']/mac[@address='%s'].."
-            % (interface_type, mac)
-        )
+        interface_list = [
+            interface for interface in
+            server_domain.interfaces_by_mac.get(mac, [])
+            if interface.get('type') == interface_type]
         self.assertEqual(len(interface_list), 1, 'Expect to find one '
                          'and only one instance of interface but '
                          'instead found %d instances' %
@@ -484,12 +643,26 @@ class BaseWhiteboxComputeTest(base.BaseV2ComputeAdminTest):
         """Gather and return all instances of the page element from XML element
         'memoryBacking/hugepages' in a given server's domain.
         """
-        root = self.get_server_xml(server_id)
-        huge_pages = root.findall('.memoryBacking/hugepages/page')
+        huge_pages = self.get_server_domain(server_id).hugepages
         return huge_pages
 
     def evacuate_server(self, server_id, **kwargs):
         """Evacuate server and wait for server migration to complete.
         """
-        self.admin_servers_client.evacuate_server(server_id, **kwargs)
-        wb_waiters.wait_for_server_migration_complete(self.os_admin, server_id)
+        self.evacuate_servers([server_id], **kwargs)
+
+    def evacuate_servers(self, server_ids, **kwargs):
+        """Evacuate several servers at once, and wait for all their
+        migrations to complete.
+        """
+        with wb_waiters.MigrationWatcher(
+                self.os_admin.migrations_client, server_ids,
+                migration_type='evacuation') as watcher:
+            for server_id in server_ids:
+                self.admin_servers_client.evacuate_server(server_id,
+                                                          **kwargs)
+            try:
+                watcher.wait()
+            finally:
+                for server_id in server_ids:
+                    self.invalidate_server_xml(server_id)
@@ -13,8 +13,6 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from whitebox_tempest_plugin import hardware
-
 
 class NUMAHelperMixin(object):
     """Mixin class containing helpers to obtain NUMA-related information about
@@ -23,10 +21,8 @@ class NUMAHelperMixin(object):
 
     def get_pinning_as_set(self, server_id):
         pinset = set()
-        root = self.get_server_xml(server_id)
-        vcpupins = root.findall('./cputune/vcpupin')
-        for pin in vcpupins:
-            pinset |= hardware.parse_cpu_spec(pin.get('cpuset'))
+        for pins in self.get_server_domain(server_id).vcpu_pins.values():
+            pinset |= pins
         return pinset
 
     def get_server_emulator_threads(self, server_id):
@@ -36,22 +32,14 @@ class NUMAHelperMixin(object):
         :param server_id: The instance UUID to look up.
         :return emulator_threads: A set of host CPU numbers.
         """
-        root = self.get_server_xml(server_id)
-
-        emulatorpins = root.findall('./cputune/emulatorpin')
-        emulator_threads = set()
-        for pin in emulatorpins:
-            emulator_threads |= hardware.parse_cpu_spec(
-                pin.get('cpuset'))
-
-        return emulator_threads
+        return set(self.get_server_domain(server_id).emulator_pins)
 
     def get_host_pcpus_for_guest_vcpu(self, server_id, instance_cpu_ids):
         """Search the xml vcpu element of the provided instance for its cpuset.
         Convert cpuset found into a set of integers.
         """
-        root = self.get_server_xml(server_id)
-        vcpus = [root.find("./cputune/vcpupin[@vcpu='%s']" % cpu_id) for
-                 cpu_id in instance_cpu_ids]
-        cpusets = [vcpu.attrib.get('cpuset') for vcpu in vcpus]
-        return hardware.parse_cpu_spec(','.join(cpusets))
+        vcpu_pins = self.get_server_domain(server_id).vcpu_pins
+        pcpus = set()
+        for cpu_id in instance_cpu_ids:
+            pcpus |= vcpu_pins[int(cpu_id)]
+        return pcpus
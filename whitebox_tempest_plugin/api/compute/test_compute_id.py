@@ -16,7 +16,6 @@ import os
 from tempest import config
 
 from whitebox_tempest_plugin.api.compute import base
-from whitebox_tempest_plugin.services import clients
 
 CONF = config.CONF
 
@@ -40,12 +39,13 @@ class TestStableCpuId(base.BaseWhiteboxComputeTest):
             CONF.whitebox_nova_compute.state_path, "compute_id")
         hypervisors = self.os_admin.hypervisor_client.list_hypervisors(
         )["hypervisors"]
+        uuids_on_disk = self.execute_on_computes(
+            f'cat {compute_id_path}', sudo=True,
+            hosts=[hypervisor['hypervisor_hostname']
+                   for hypervisor in hypervisors])
         for hypervisor in hypervisors:
             name = hypervisor['hypervisor_hostname']
-            ssh_client = clients.SSHClient(name)
-            uuid_on_disk = ssh_client.execute(f'cat {compute_id_path}',
-                                              sudo=True)
-            uuid_on_disk = uuid_on_disk.rstrip()
+            uuid_on_disk = uuids_on_disk[name].result().rstrip()
             self.assertEqual(
                 hypervisor['id'],
                 uuid_on_disk,
@@ -26,7 +26,6 @@ For more information, refer to:
 
 from itertools import chain
 import testtools
-import xml.etree.ElementTree as ET
 
 from oslo_serialization import jsonutils
 from tempest.common import compute
@@ -40,6 +39,7 @@ from whitebox_tempest_plugin.api.compute import base
 from whitebox_tempest_plugin.api.compute import numa_helper
 from whitebox_tempest_plugin import hardware
 from whitebox_tempest_plugin.services import clients
+from whitebox_tempest_plugin.services import host_capabilities
 from whitebox_tempest_plugin import utils as whitebox_utils
 
 from oslo_log import log as logging
@@ -62,15 +62,7 @@ class BasePinningTest(base.BaseWhiteboxComputeTest,
         :return cpu_pins: A dict of guest cell number -> set(host cell numbers
                           said cell is pinned to)
         """
-        root = self.get_server_xml(server_id)
-
-        memnodes = root.findall('./numatune/memnode')
-        cell_pins = {}
-        for memnode in memnodes:
-            cell_pins[int(memnode.get('cellid'))] = \
-                hardware.parse_cpu_spec(memnode.get('nodeset'))
-
-        return cell_pins
+        return dict(self.get_server_domain(server_id).memnodes)
 
     # TODO(jparker): Need to clean up this method and similar helper methods.
     # This should either end up in numa_helper or the base compute test class
@@ -81,15 +73,7 @@ class BasePinningTest(base.BaseWhiteboxComputeTest,
         :param server_id: The instance UUID to look up.
         :return emulator_threads: A set of host CPU numbers.
         """
-        root = self.get_server_xml(server_id)
-
-        emulatorpins = root.findall('./cputune/emulatorpin')
-        emulator_threads = set()
-        for pin in emulatorpins:
-            emulator_threads |= \
-                hardware.parse_cpu_spec(pin.get('cpuset'))
-
-        return emulator_threads
+        return set(self.get_server_domain(server_id).emulator_pins)
 
     def get_server_iothreads(self, server_id):
         """Get the number of iothreads of the VM and host CPU numbers to
@@ -101,21 +85,9 @@ class BasePinningTest(base.BaseWhiteboxComputeTest,
             iothread is pinned to which set of PCPUs. If the VM is not
             pinned then iothreadpins are returned as None.
         """
-        root = self.get_server_xml(server_id)
-
-        nr_of_iothreads = int(root.find('./iothreads').text)
-
-        iothreadpins = root.findall('./cputune/iothreadpin')
-
-        if not iothreadpins:
-            return nr_of_iothreads, None
-
-        iothread_pins = {
-            int(pin.get('iothread')):
-                hardware.parse_cpu_spec(pin.get('cpuset'))
-            for pin in iothreadpins}
-
-        return nr_of_iothreads, iothread_pins
+        server_domain = self.get_server_domain(server_id)
+        return (server_domain.iothreads,
+                dict(server_domain.iothread_pins) or None)
 
     def get_cpus_with_sched(self, server_id):
         root = self.get_server_xml(server_id)
@@ -131,13 +103,13 @@ class BasePinningTest(base.BaseWhiteboxComputeTest,
         :param server_id: The instance UUID to look up.
         :return cpu_pins: A int:int dict indicating CPU pins.
         """
-        root = self.get_server_xml(server_id)
-
-        vcpupins = root.findall('./cputune/vcpupin')
+        vcpu_pins = self.get_server_domain(server_id).vcpu_pins
         # NOTE(artom) This assumes every guest CPU is pinned to a single host
-        # CPU - IOW that the 'dedicated' cpu_policy is in effect.
-        cpu_pins = {int(pin.get('vcpu')): int(pin.get('cpuset'))
-                    for pin in vcpupins if pin is not None}
+        # CPU - IOW that the 'dedicated' cpu_policy is in effect. Unpacking
+        # fails loudly if that is not the case.
+        cpu_pins = {}
+        for vcpu, pins in vcpu_pins.items():
+            (cpu_pins[vcpu],) = pins
 
         return cpu_pins
 
@@ -397,27 +369,6 @@ class CPUThreadPolicyTest(BasePinningTest):
     require_thread_policy = {'hw:cpu_policy': 'dedicated',
                              'hw:cpu_thread_policy': 'require'}
 
-    @staticmethod
-    def get_siblings_list(sib):
-        """Parse a list of siblings as used by libvirt.
-
-        List of siblings can consist of comma-separated lists (0,5,6)
-        or hyphen-separated ranges (0-3) or both.
-
-        >>> get_siblings_list('0-2,3,4,5-6,9')
-        [0, 1, 2, 3, 4, 5, 6, 9]
-        """
-        siblings = []
-        for sub_sib in sib.split(','):
-            if '-' in sub_sib:
-                start_sib, end_sib = sub_sib.split('-')
-                siblings.extend(range(int(start_sib),
-                                      int(end_sib) + 1))
-            else:
-                siblings.append(int(sub_sib))
-
-        return siblings
-
     def get_host_cpu_siblings(self, host):
         """Return core to sibling mapping of the host CPUs.
 
@@ -425,24 +376,12 @@ class CPUThreadPolicyTest(BasePinningTest):
              core_1: [sibling_a, sibling_b, ...],
              ...}
 
-        `virsh capabilities` is called to get details about the host
-        then a list of siblings per CPU is extracted and formatted to single
-        level list.
+        The host's capabilities are only fetched once per run, see
+        host_capabilities.get_capabilities().
         """
-        siblings = {}
-
-        virshxml = clients.VirshXMLClient(host)
-        capxml = virshxml.capabilities()
-        root = ET.fromstring(capxml)
-        cpu_cells = root.findall('./host/topology/cells/cell/cpus')
-        for cell in cpu_cells:
-            cpus = cell.findall('cpu')
-            for cpu in cpus:
-                cpu_id = int(cpu.get('id'))
-                sib = cpu.get('siblings')
-                siblings.update({cpu_id: self.get_siblings_list(sib)})
-
-        return siblings
+        capabilities = host_capabilities.get_capabilities(host)
+        return {cpu_id: sorted(siblings)
+                for cpu_id, siblings in capabilities.siblings.items()}
 
     def test_threads_isolate(self):
         """Ensure vCPUs *are not* placed on thread siblings."""
@@ -777,9 +716,7 @@ class NUMALiveMigrationBase(BasePinningTest):
         """Search the xml vcpu element of the provided server for its cpuset.
         Convert cpuset found into a set of integers.
         """
-        root = self.get_server_xml(server_id)
-        cpuset = root.find('./vcpu').attrib.get('cpuset', None)
-        return hardware.parse_cpu_spec(cpuset)
+        return set(self.get_server_domain(server_id).vcpu_cpuset)
 
     def _validate_hugepage_elements(self, server_id, pagesize):
         """Analyze the hugepage xml element(s) from a provided instance. Expect
@@ -837,6 +774,9 @@ class NUMALiveMigrationTest(NUMALiveMigrationBase):
             scheduler_hints={'different_host': server_a['id']},
             wait_until='ACTIVE')
 
+        # Fetch both domains at once, the checks below use the cached ones
+        self.get_server_domains([server_a['id'], server_b['id']])
+
         # Iterate over both guests and confirm their pinned vCPUs and emulator
         # threads are correct
         for server in [server_a, server_b]:
@@ -888,6 +828,7 @@ class NUMALiveMigrationTest(NUMALiveMigrationBase):
 
         # After migration, guests should have disjoint (non-null) CPU pins in
         # their XML
+        self.get_server_domains([server_a['id'], server_b['id']])
         pin_a = self.get_pinning_as_set(server_a['id'])
         pin_b = self.get_pinning_as_set(server_b['id'])
         self.assertTrue(pin_a and pin_b,
@@ -1108,6 +1049,12 @@ class NUMACPUDedicatedLiveMigrationTest(NUMALiveMigrationBase):
         host_sm_b = clients.NovaServiceManager(host_b, 'nova-compute',
                                                self.os_admin.services_client)
 
+        # Fetch all four domains with one call per host, the pinning checks
+        # below then use the cached domains.
+        self.get_server_domains(
+            [server['id'] for server in (dedicated_server_a, shared_server_a,
+                                         dedicated_server_b, shared_server_b)])
+
         # Iterate over the two servers using the dedicated cpu policy. Based
         # on the host they were scheduled too confirm the guest's dedicated
         # cpus are a subset of their respective hosts cpu_dedicated_set
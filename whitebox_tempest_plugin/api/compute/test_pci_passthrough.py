@@ -18,7 +18,6 @@ from tempest.common import waiters
 from tempest import config
 
 from whitebox_tempest_plugin.api.compute import base
-from whitebox_tempest_plugin import hardware
 
 CONF = config.CONF
 
@@ -52,19 +51,13 @@ class PCIPassthroughTest(base.BaseWhiteboxComputeTest):
             flavor=flavor['id'],
             wait_until='ACTIVE')
 
-        root = self.get_server_xml(server['id'])
-        hostdev_list = root.findall(
-            "./devices/hostdev[@type='pci']"
-        )
+        pci_addresses = self.get_server_domain(
+            server['id']).hostdev_pci_addresses
         self.assertEqual(
-            1, len(hostdev_list),
+            1, len(pci_addresses),
             'Expect to find one and only one instance of hostdev device but '
-            'instead found %d instances' % len(hostdev_list))
-        host_dev_xml = hostdev_list[0]
-        # The pci_addr_element is a single XML element found via find()
-        pci_addr_element = host_dev_xml.find("./source/address")
-        pci_address = hardware.get_pci_address_from_xml_device(
-            pci_addr_element)
+            'instead found %d instances' % len(pci_addresses))
+        pci_address = pci_addresses[0]
         self.assertTrue(any([pci_address.lower() ==
                              addr.lower() for addr in self.pci_addresses]))
 
@@ -115,15 +108,10 @@ class PCIPassthroughTest(base.BaseWhiteboxComputeTest):
         self.assertEqual(1, sum(usages))
 
         # Validate the XML
-        root = self.get_server_xml(server['id'])
-        hostdev_list = root.findall(
-            "./devices/hostdev[@type='pci']"
-        )
-        self.assertEqual(len(hostdev_list), 1)
-        host_dev_xml = hostdev_list[0]
-        pci_addr_element = host_dev_xml.find("./source/address")
-        pci_address = hardware.get_pci_address_from_xml_device(
-            pci_addr_element)
+        pci_addresses = self.get_server_domain(
+            server['id']).hostdev_pci_addresses
+        self.assertEqual(len(pci_addresses), 1)
+        pci_address = pci_addresses[0]
         self.assertTrue(any([pci_address.lower() ==
                              addr.lower() for addr in self.pci_addresses]))
 
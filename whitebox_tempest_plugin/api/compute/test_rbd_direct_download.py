@@ -48,6 +48,15 @@ class TestRBDDirectDownload(base.BaseWhiteboxComputeTest):
                 name='base-server-img',
                 wait_until='ACTIVE'
             )
+            # Follow the compute logs before the server is created, so the
+            # download is seen as it is logged, whichever host the server
+            # lands on.
+            log_pattern = (r'Attempting to export RBD image: '
+                           r'\[pool_name: [^]]+\] \[image_uuid: %s\]' %
+                           image['id'])
+            tailers = self.tail_compute_logs()
+            downloads = {host: tailer.expect(log_pattern)
+                         for host, tailer in tailers.items()}
             # Creating a server from above image ensures a fresh
             # attempt is made to download an image from the rbd
             # pool to the local compute
@@ -67,12 +76,10 @@ class TestRBDDirectDownload(base.BaseWhiteboxComputeTest):
             self.assertEqual('images', rbd_pool)
             self.assertTrue(host_sm.get_conf_opt('glance',
                                                  'enable_rbd_download'))
-            log_query_string = f"Attempting to export RBD image: " \
-                f"[[]pool_name: {rbd_pool}[]] [[]image_uuid: " \
-                f"{image_id}[]]"
-            logs_client = clients.LogParserClient(host)
             # Assert if log with specified image is found
-            self.assertTrue(len(logs_client.parse(log_query_string)))
+            download = tailers[host].wait(downloads[host])
+            self.assertIn('[pool_name: %s]' % rbd_pool, download)
+            self.assertIn('[image_uuid: %s]' % image_id, download)
             path = self.get_server_blockdevice_path(server['id'], 'vda')
             # Assert image disk is present in ephemeral
             # instances_path and not in rbd
@@ -13,18 +13,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import testtools
-import time
 
 from tempest.common import compute
 from tempest.common.utils.linux import remote_client
 from tempest import config
 from tempest import exceptions as tempest_exc
-from tempest.lib import exceptions as lib_exc
 
 from whitebox_tempest_plugin.api.compute import base
 from whitebox_tempest_plugin.api.compute import numa_helper
+from whitebox_tempest_plugin.common import waiters as wb_waiters
 from whitebox_tempest_plugin import hardware
 from whitebox_tempest_plugin.services import clients
+from whitebox_tempest_plugin.services import notifications
 
 from oslo_log import log as logging
 
@@ -72,10 +72,7 @@ class SRIOVBase(base.BaseWhiteboxComputeTest):
         :return xml_network_deivce: The xml hostdev device element that matches
         the device search criteria
         """
-        root = self.get_server_xml(server_id)
-        hostdev_list = root.findall(
-            "./devices/hostdev[@type='pci']"
-        )
+        hostdev_list = self.get_server_domain(server_id).pci_hostdevs
         self.assertEqual(len(hostdev_list), 1, 'Expect to find one '
                          'and only one instance of hostdev device but '
                          'instead found %d instances' %
@@ -182,6 +179,7 @@ class SRIOVNumaAffinity(SRIOVBase, numa_helper.NUMAHelperMixin):
         host_sm = clients.NovaServiceManager(host, 'nova-compute',
                                              self.os_admin.services_client)
         cpu_dedicated_set = host_sm.get_cpu_dedicated_set()
+        self.get_server_domains([server_a['id'], server_b['id']])
         cpu_pins_a = self.get_pinning_as_set(server_a['id'])
         pcpus_with_affinity = self._get_dedicated_cpus_from_numa_node(
             self.affinity_node, cpu_dedicated_set)
@@ -623,6 +621,7 @@ class SRIOVNumaAffinityWithSocketPolicy(SRIOVNumaAffinity):
         host_sm = clients.NovaServiceManager(host, 'nova-compute',
                                              self.os_admin.services_client)
         cpu_dedicated_set = host_sm.get_cpu_dedicated_set()
+        self.get_server_domains([server_a['id'], server_b['id']])
         cpu_pins_a = self.get_pinning_as_set(server_a['id'])
         pcpus_with_affinity = self._get_dedicated_cpus_from_numa_node(
             self.affinity_node, cpu_dedicated_set)
@@ -696,17 +695,19 @@ class SRIOVMigration(SRIOVBase):
 
     def _validate_pci_allocation(self, pci_device_status_regex):
         """Check PCI allocation count and confirm it updates to 1"""
-        start_time = int(time.time())
         timeout = self.os_admin.services_client.build_timeout
-        while int(time.time()) - start_time <= timeout:
-            pci_allocated_count = self._get_pci_status_count(
-                pci_device_status_regex)
-            if pci_allocated_count == 1:
-                return
-            time.sleep(self.os_admin.services_client.build_interval + 1)
-        raise lib_exc.TimeoutException(
-            pci_allocated_count, 1, 'Total allocated pci devices should be 1 '
-            'but instead is %s' % pci_allocated_count)
+        counts = []
+
+        def pci_allocated():
+            counts.append(self._get_pci_status_count(pci_device_status_regex))
+            return counts[-1] == 1
+
+        wb_waiters.wait_until(
+            pci_allocated,
+            lambda: 'Total allocated pci devices should be 1 but instead '
+                    'is %s' % counts[-1],
+            name='pci_allocation', timeout=timeout,
+            max_interval=self.os_admin.services_client.build_interval + 1)
 
     @classmethod
     def skip_checks(cls):
@@ -834,26 +835,26 @@ class SRIOVAttachAndDetach(SRIOVBase):
         :param port_id: The id of the port being detached.
         :returns: The final port dict from the show_port response.
         """
-        port = self.os_primary.ports_client.show_port(port_id)['port']
-        device_id = port['device_id']
-        start = int(time.time())
-
         # NOTE(mriedem): Nova updates the port's device_id to '' rather than
         # None, but it's not contractual so handle Falsey either way.
-        while device_id:
-            time.sleep(self.build_interval)
-            port = self.os_primary.ports_client.show_port(port_id)['port']
-            device_id = port['device_id']
-
-            timed_out = int(time.time()) - start >= self.build_timeout
-
-            if device_id and timed_out:
-                message = ('Port %s failed to detach (device_id %s) within '
-                           'the required time (%s s).' %
-                           (port_id, device_id, self.build_timeout))
-                raise lib_exc.TimeoutException(message)
-
-        return port
+        ports = []
+
+        def port_detached():
+            ports.append(
+                self.os_primary.ports_client.show_port(port_id)['port'])
+            return ports[-1] if not ports[-1]['device_id'] else None
+
+        with notifications.subscribed(
+                'port.', lambda payload: port_id in (
+                    payload.get('port_id'),
+                    payload.get('port', {}).get('id'))) as subscription:
+            return wb_waiters.wait_until(
+                port_detached,
+                lambda: 'Port %s failed to detach (device_id %s) within the '
+                        'required time (%s s).' %
+                        (port_id, ports[-1]['device_id'], self.build_timeout),
+                name='port_detach', timeout=self.build_timeout,
+                max_interval=self.build_interval, subscription=subscription)
 
     def _check_device_in_guest(self, linux_client, vendor_id, product_id):
         """Check attached SR-IOV NIC is present in guest
@@ -973,6 +974,7 @@ class SRIOVAttachAndDetach(SRIOVBase):
             iface = self.interfaces_client.create_interface(
                 server['id'],
                 port_id=port['port']['id'])['interfaceAttachment']
+            self.invalidate_server_xml(server['id'])
 
             # Validate the original port information with what is currently
             # report after the attach
@@ -1058,6 +1060,7 @@ class SRIOVAttachAndDetach(SRIOVBase):
             iface = self.interfaces_client.create_interface(
                 server['id'],
                 port_id=port['port']['id'])['interfaceAttachment']
+            self.invalidate_server_xml(server['id'])
 
             # Confirm the port information currently reported after the attach
             # match the original information for the port
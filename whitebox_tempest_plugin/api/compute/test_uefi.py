@@ -77,13 +77,12 @@ class TestUEFIBoot(base.BaseWhiteboxComputeTest):
         uefi_image_id = self.copy_default_image(**image_properties)
         server = self.create_test_server(
             image_id=uefi_image_id, wait_until='ACTIVE')
-        domain = self.get_server_xml(server['id'])
-        os_element = domain.find("./os")
+        uefi_domain = self.get_server_domain(server['id'])
 
         # Confirm loader element is present and within loader element readonly
         # is set to 'yes' and secure is set to 'no'.
         self._validate_uefi_os_xml_elements(
-            server['id'], os_element, secure_boot=False)
+            server['id'], uefi_domain.os, secure_boot=False)
 
         # rebuild same instance with non-uefi image
         non_uefi_image_id = CONF.compute.image_ref
@@ -91,21 +90,28 @@ class TestUEFIBoot(base.BaseWhiteboxComputeTest):
             server['id'], image_ref=non_uefi_image_id)['server']
         waiters.wait_for_server_status(self.servers_client,
                                        server['id'], 'ACTIVE')
-        domain2 = self.get_server_xml(server['id'])
-        os_element2 = domain2.find("./os")
-        self.assertIsNone(os_element2.find('nvram'))
-        self.assertEmpty(os_element2.items())
+        non_uefi_domain = self.get_server_domain(server['id'])
+        self.assertIsNone(non_uefi_domain.os.find('nvram'))
+        self.assertEmpty(non_uefi_domain.os.items())
+        removed = [change.path for change in
+                   uefi_domain.diff(non_uefi_domain) if change.new is None]
+        self.assertIn('os/loader', removed)
+        self.assertIn('os/nvram', removed)
 
         # rebuild again with uefi image
         server = self.servers_client.rebuild_server(
             server['id'], image_ref=uefi_image_id)['server']
         waiters.wait_for_server_status(self.servers_client,
                                        server['id'], 'ACTIVE')
-        domain3 = self.get_server_xml(server['id'])
-        os_element3 = domain3.find("./os")
+        rebuilt_domain = self.get_server_domain(server['id'])
 
         self._validate_uefi_os_xml_elements(
-            server['id'], os_element3, secure_boot=False)
+            server['id'], rebuilt_domain.os, secure_boot=False)
+        # The firmware should be back to what it was before the first rebuild
+        firmware_changes = [
+            change for change in uefi_domain.diff(rebuilt_domain)
+            if change.path.startswith(('os/loader', 'os/nvram'))]
+        self.assertEmpty(firmware_changes)
 
     @testtools.skipUnless(CONF.compute_feature_enabled.uefi_secure_boot,
                           "Requires uefi secure boot to be enabled")
@@ -120,8 +126,8 @@ class TestUEFIBoot(base.BaseWhiteboxComputeTest):
         uefi_image_id = self.copy_default_image(**image_properties)
         server = self.create_test_server(
             image_id=uefi_image_id, wait_until='ACTIVE')
-        domain = self.get_server_xml(server['id'])
-        os_element = domain.find("./os")
+        server_domain = self.get_server_domain(server['id'])
+        os_element = server_domain.os
 
         # Confirm loader element is present and within loader element readonly
         # and secure are both set to 'yes'.
@@ -130,7 +136,7 @@ class TestUEFIBoot(base.BaseWhiteboxComputeTest):
 
         # Confirm that the smm element is present in features element of guest
         # and the state is set to 'on'
-        features_element = domain.find("./features")
+        features_element = server_domain.root.find("./features")
         smm_element = features_element.find('smm')
         self.assertIsNotNone(
             smm_element, 'Loader element not present in guest %s'
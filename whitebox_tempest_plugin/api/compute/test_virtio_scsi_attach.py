@@ -41,9 +41,7 @@ class VirtioSCSIBase(base.BaseWhiteboxComputeTest):
         :return disks: a list of xml elements, the elements are all disks
         in the devices section of the server's xml
         """
-        root = self.get_server_xml(server_id)
-        disks = root.findall("./devices/disk")
-        return disks
+        return self.get_server_domain(server_id).disks
 
     def get_scsi_disks(self, server_id, controller_index):
         """Returns all scsi disks attached to a specific disk controller
@@ -54,11 +52,10 @@ class VirtioSCSIBase(base.BaseWhiteboxComputeTest):
         :return scsi_disks: a list of xml elements, the elements are all scsi
         disks managed by the provided controller_index parameter
         """
-        all_disks = self.get_attached_disks(server_id)
-        scsi_disks = [disk for disk in all_disks
-                      if disk.find("target[@bus='scsi']") is not None and
-                      disk.find("address[@controller="
-                                "'%s']" % controller_index) is not None]
+        controller_disks = self.get_server_domain(server_id).lookup(
+            'disk_by_controller', str(controller_index))
+        scsi_disks = [disk for disk in controller_disks
+                      if disk.find("target[@bus='scsi']") is not None]
         return scsi_disks
 
     def get_scsi_disk_controllers(self, server_id):
@@ -69,9 +66,10 @@ class VirtioSCSIBase(base.BaseWhiteboxComputeTest):
         scsi disk controllers found in the devices section of the server
         xml
         """
-        root = self.get_server_xml(server_id)
-        disk_cntrls = root.findall("./devices/controller[@type='scsi']"
-                                   "[@model='virtio-scsi']")
+        controllers = self.get_server_domain(server_id).lookup(
+            'controller_by_type', 'scsi')
+        disk_cntrls = [controller for controller in controllers
+                       if controller.get('model') == 'virtio-scsi']
         return disk_cntrls
 
     def get_attached_volume_ids(self, server_id):
@@ -61,18 +61,15 @@ class TestQEMUVolumeEncryption(base.BaseWhiteboxComputeTest):
 
         # Gather instance XML to ensure the encrypted volume is attached to the
         # instance
-        xml = self.get_server_xml(server['id'])
-
-        # Create a list of all attached volumes on the instance
-        attached_volumes = xml.findall('.//disk')
-
-        # Search the list of disks for the encrypted volume by matching the
-        # disk's serial id with the volume id provided by the volumes client
-        # and also query that it contains the 'encryption/secret' elements
-        xml_disk_elements = [x for x in attached_volumes if
-                             getattr(x.find('./serial'), 'text', None) ==
-                             encrypted_vol['id'] and
-                             x.find("./encryption/secret") is not None]
+        server_domain = self.get_server_domain(server['id'])
+
+        # Search the disks for the encrypted volume by matching the disk's
+        # serial id with the volume id provided by the volumes client and
+        # also query that it contains the 'encryption/secret' elements
+        xml_disk_elements = [
+            x for x in server_domain.lookup('disk_by_serial',
+                                            encrypted_vol['id'])
+            if x.find("./encryption/secret") is not None]
 
         # There should be one and only one disk element present in the
         # instance xml that matches search criteria
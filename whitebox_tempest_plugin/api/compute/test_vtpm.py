@@ -161,11 +161,10 @@ class VTPMTest(base.BaseWhiteboxComputeTest):
 
     def test_vtpm_creation_after_virtqemud_restart(self):
         # Test validates vTPM instance creation after libvirt service restart
-        hosts = self.list_compute_hosts()
-        for host in hosts:
-            host_svc = wb_clients.VirtQEMUdManager(
-                host, 'libvirt', self.os_admin.services_client)
-            host_svc.restart()
+        wb_clients.restart_nova_services(
+            [wb_clients.VirtQEMUdManager(host, 'libvirt',
+                                         self.os_admin.services_client)
+             for host in self.list_compute_hosts()])
         self._vtpm_server_creation_check('tpm-crb', '2.0')
 
     def test_vtpm_live_migration_secret_security_user(self):
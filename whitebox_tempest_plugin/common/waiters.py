@@ -13,61 +13,290 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from tempest import config
+import random
+import threading
 import time
 
+from oslo_log import log as logging
+from tempest import config
 from tempest.lib import exceptions as lib_exc
 from whitebox_tempest_plugin.exceptions import MigrationException
+from whitebox_tempest_plugin.services import notifications
 
 
 CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+# NOTE(artom) Every poll interval is randomly stretched or shrunk by up to
+# this fraction, so that concurrent waiters do not poll in lockstep.
+JITTER = 0.2
+BACKOFF = 2
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name, polls, elapsed, timed_out):
+    with _stats_lock:
+        stats = _stats.setdefault(name, {'waits': 0, 'polls': 0, 'time': 0.0,
+                                         'max_time': 0.0, 'timeouts': 0})
+        stats['waits'] += 1
+        stats['polls'] += polls
+        stats['time'] += elapsed
+        stats['max_time'] = max(stats['max_time'], elapsed)
+        stats['timeouts'] += int(timed_out)
+    LOG.debug('Waiter %s %s after %d polls in %.2fs', name,
+              'timed out' if timed_out else 'succeeded', polls, elapsed)
+
+
+def get_stats():
+    """Returns a dict of waiter name -> {'waits', 'polls', 'time',
+    'max_time', 'timeouts'}, where the times are how long the waits took to
+    see their condition, in seconds, summed and at most.
+    """
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def wait_until(predicate, message, name=None, timeout=None,
+               max_interval=None, subscription=None):
+    """Polls predicate until it returns a true value, and returns that
+    value.
+
+    The first poll is immediate. The interval between polls then starts at
+    [whitebox]/waiter_initial_interval and doubles up to max_interval, each
+    interval randomly jittered. Fast transitions are so seen within a
+    fraction of a second, and slow ones are not polled more than every
+    max_interval.
+
+    :param predicate: A function called without arguments, returning a
+                      false value to keep waiting. It can raise to abort the
+                      wait, if the condition can no longer be met.
+    :param message: The message of the TimeoutException raised if the
+                    predicate is still false after timeout seconds, or a
+                    function returning it, to include the latest state.
+    :param name: The name the wait's statistics are recorded under, defaults
+                 to the predicate's name.
+    :param timeout: Defaults to [compute]/build_timeout.
+    :param max_interval: Defaults to [compute]/build_interval.
+    :param subscription: An optional notifications.Subscription to the
+                         notifications signalling that the predicate may
+                         have become true. A notification restarts the
+                         backoff. Once the interval has backed off to
+                         max_interval, and no notification has arrived for
+                         [whitebox]/notification_poll_interval seconds, the
+                         predicate is then only polled when one arrives, or
+                         every [whitebox]/notification_poll_interval
+                         seconds. That is only once the listener has
+                         received a notification, any notification, until
+                         then the predicate is polled every max_interval.
+    """
+    name = name or predicate.__name__
+    timeout = timeout if timeout is not None else CONF.compute.build_timeout
+    max_interval = max_interval or CONF.compute.build_interval
+    initial_interval = min(CONF.whitebox.waiter_initial_interval,
+                           max_interval)
+    poll_interval = CONF.whitebox.notification_poll_interval
+    interval = initial_interval
+    start = time.monotonic()
+    deadline = start + timeout
+    # NOTE(artom) A notification can be sent before the change it signals
+    # is visible in the API, like instance.rebuild.end before the
+    # evacuation's migration is saved as done. So the predicate is polled
+    # every max_interval for a while after a notification, rather than
+    # waiting for the next one.
+    notified = None
+    polls = 0
+    while True:
+        polls += 1
+        result = predicate()
+        now = time.monotonic()
+        if result:
+            _record(name, polls, now - start, False)
+            return result
+        if now >= deadline:
+            _record(name, polls, now - start, True)
+            raise lib_exc.TimeoutException(
+                message() if callable(message) else message)
+        quiet = notified is None or now - notified > poll_interval
+        if (subscription is not None and interval >= max_interval and
+                quiet and notifications.delivered()):
+            received = subscription.wait(min(poll_interval, deadline - now))
+        else:
+            time.sleep(min(interval * random.uniform(1 - JITTER, 1 + JITTER),
+                           deadline - now))
+            received = subscription is not None and subscription.wait(0)
+            interval = min(interval * BACKOFF, max_interval)
+        if received:
+            notified = time.monotonic()
+            interval = initial_interval
 
 
 def wait_for_nova_service_state(client, host, binary, status_field, state):
-    timeout = client.build_timeout
-    start_time = int(time.time())
     # NOTE(artom) Assumes that the (host, binary) combination will yield a
     # unique service. There is no service in Nova that can run multiple copies
     # on the same host.
-    service = client.list_services(host=host, binary=binary)['services'][0]
-    while service[status_field] != state:
-        time.sleep(client.build_interval)
-        timed_out = int(time.time()) - start_time >= timeout
-        if timed_out:
-            raise lib_exc.TimeoutException(
-                'Service %s on host %s failed to reach state %s within '
-                'the required time (%s s)', binary, host, state, timeout)
-        service = client.list_services(host=host, binary=binary)['services'][0]
-
-
-def wait_for_server_migration_complete(os_admin, server_id):
-    start_time = int(time.time())
-    timeout = os_admin.services_client.build_timeout
-    interval = os_admin.services_client.build_interval + 1
-    while int(time.time()) - start_time <= timeout:
-        s_migs = os_admin.migrations_client.list_migrations()
-        if s_migs['migrations'][-1]['status'] in ['done', 'completed']:
-            break
-        elif s_migs['migrations'][-1]['status'] in ['error', 'failed']:
-            raise MigrationException(
-                'Evacuation failed, because server migration failed.')
-        time.sleep(interval)
-    else:
-        # raise Timeout exception if migration never completed
-        raise lib_exc.TimeoutException(
-            'Evacuation failed, because server migration did not '
-            'complete, within the required time: (%s s)' % timeout)
+    def service_in_state():
+        service = client.list_services(
+            host=host, binary=binary)['services'][0]
+        return service[status_field] == state
+
+    # NOTE(artom) See wait_for_nova_service_states() about notifications.
+    with notifications.subscribed(
+            'service.update',
+            lambda payload: notifications.get_payload_field(
+                payload, 'host') == host) as subscription:
+        wait_until(
+            service_in_state,
+            'Service %s on host %s failed to reach state %s within the '
+            'required time (%s s)' % (binary, host, state,
+                                      client.build_timeout),
+            name='nova_service_state', timeout=client.build_timeout,
+            max_interval=client.build_interval,
+            subscription=subscription if status_field == 'status' else None)
+
+
+def wait_for_nova_service_states(client, targets):
+    """Waits for several Nova services to reach a state, polling them all
+    with a single unfiltered list_services call per poll, so that waiting
+    on a whole fleet of services takes about as long as waiting on the
+    slowest one.
+
+    :param targets: An iterable of (host, binary, status_field, state)
+                    tuples, like the arguments of
+                    wait_for_nova_service_state().
+    """
+    targets = set(targets)
+    pending = set(targets)
+    # NOTE(artom) Nova notifies service.update when a service is enabled or
+    # disabled, not when it goes up or down, which it only infers from the
+    # lack of heartbeats.
+    status_hosts = {host for host, _, status_field, _ in targets
+                    if status_field == 'status'}
+
+    def services_in_state():
+        services = {(service['host'], service['binary']): service
+                    for service in client.list_services()['services']}
+        for target in list(pending):
+            host, binary, status_field, state = target
+            service = services.get((host, binary))
+            if service is not None and service[status_field] == state:
+                pending.discard(target)
+        return not pending
+
+    with notifications.subscribed(
+            'service.update',
+            lambda payload: notifications.get_payload_field(
+                payload, 'host') in status_hosts) as subscription:
+        wait_until(
+            services_in_state,
+            lambda: 'Services failed to reach their states within the '
+                    'required time (%s s): %s' % (client.build_timeout,
+                                                  sorted(pending)),
+            name='nova_service_states', timeout=client.build_timeout,
+            max_interval=client.build_interval,
+            subscription=subscription if status_hosts else None)
+
+
+class MigrationWatcher(object):
+    """Waits for the migrations of one or more servers to complete.
+
+    The watcher must be created before the migrations are started: it
+    records the servers' existing migrations then, and only waits for
+    migrations that are not among them. Migrations are listed per server,
+    filtered by instance UUID and optionally type, so each poll only sees
+    that server's own migration history, however many other migrations
+    the cloud has, and however many tests are migrating servers in
+    parallel.
+
+    The watcher is a context manager, that stops listening for
+    notifications on exit:
+
+        with MigrationWatcher(migrations_client, [server_id]) as watcher:
+            <migrate the server>
+            watcher.wait()
+    """
+
+    def __init__(self, migrations_client, server_ids, migration_type=None):
+        self.client = migrations_client
+        self.migration_type = migration_type
+        # NOTE(artom) Subscribe before listing the existing migrations, so
+        # that no notification of the new ones can be missed.
+        self._subscription = notifications.subscribe(
+            'instance.', lambda payload: notifications.get_payload_field(
+                payload, 'uuid') in server_ids)
+        try:
+            self._known = {server_id: {m['id'] for m in self._list(server_id)}
+                           for server_id in server_ids}
+        except Exception:
+            self.close()
+            raise
+        self.migrations = {}
+
+    def close(self):
+        """Stops listening for notifications."""
+        notifications.unsubscribe(self._subscription)
+        self._subscription = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _list(self, server_id):
+        params = {'instance_uuid': server_id}
+        if self.migration_type:
+            params['migration_type'] = self.migration_type
+        return self.client.list_migrations(**params)['migrations']
+
+    def _poll(self):
+        for server_id, known in self._known.items():
+            migration = self.migrations.get(server_id)
+            if migration and migration['status'] in ['done', 'completed']:
+                continue
+            new = [m for m in self._list(server_id) if m['id'] not in known]
+            if not new:
+                continue
+            # NOTE(artom) Should the server have been migrated more than
+            # once since the watcher started, follow the latest migration.
+            migration = max(new, key=lambda m: m['id'])
+            self.migrations[server_id] = migration
+            if migration['status'] in ['error', 'failed']:
+                raise MigrationException(
+                    msg='migration %s of server %s is in status %s' %
+                    (migration['id'], server_id, migration['status']))
+        return all(self.migrations.get(server_id, {}).get('status') in
+                   ['done', 'completed'] for server_id in self._known)
+
+    def wait(self, timeout=None):
+        """Waits for a new migration of every server to complete, and
+        returns a dict of server ID -> migration.
+
+        :raises MigrationException: if a migration failed.
+        :raises TimeoutException: if a migration did not complete in time.
+        """
+        timeout = timeout or self.client.build_timeout
+
+        def message():
+            statuses = {server_id: self.migrations.get(
+                server_id, {}).get('status') for server_id in self._known}
+            return ('Server migrations did not complete within the required '
+                    'time (%s s), their statuses are %s' % (timeout, statuses))
+
+        wait_until(self._poll, message, name='server_migrations',
+                   timeout=timeout, max_interval=self.client.build_interval,
+                   subscription=self._subscription)
+        return dict(self.migrations)
 
 
 def wait_for_trait_add_in_rp(rp_admin_cl, trait, provider):
-    timeout = CONF.compute.build_timeout
-    interval = CONF.compute.build_interval
-    start_time = int(time.time())
-    while int(time.time()) - start_time <= timeout:
+    def trait_added():
         traits = rp_admin_cl.list_resource_provider_traits(provider)['traits']
-        if trait in traits:
-            return True
-        time.sleep(interval)
-    raise lib_exc.TimeoutException(
-        'Failed to add trait %s in resource provider %s '
-        'within the required time: (%s s)' % (trait, provider, timeout))
+        return trait in traits
+
+    return wait_until(
+        trait_added,
+        'Failed to add trait %s in resource provider %s within the required '
+        'time: (%s s)' % (trait, provider, CONF.compute.build_timeout),
+        name='trait_add_in_rp')
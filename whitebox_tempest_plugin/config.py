@@ -39,6 +39,140 @@ general_opts = [
         default='/home/stack/.ssh/id_rsa',
         deprecated_opts=[cfg.DeprecatedOpt('target_private_key_path',
                                            group='whitebox')]),
+    cfg.StrOpt(
+        'transport',
+        default='auto',
+        choices=['auto', 'ssh', 'openssh', 'local'],
+        help="How to run commands on controllers and compute hosts. 'ssh' "
+             "always uses SSH, with paramiko. 'openssh' uses the system's "
+             "ssh binary with a multiplexed master connection per host, "
+             "shared by all test worker processes (see "
+             "[whitebox]/openssh_control_dir). 'local' runs them on the "
+             "machine running the tests with subprocess, which is only "
+             "correct in all-in-one deployments. 'auto' (default) runs "
+             "commands locally when the "
+             "host's control plane address is one of the local machine's "
+             "addresses and [whitebox]/ctlplane_ssh_username is the user "
+             "running the tests, and uses SSH otherwise."),
+    cfg.StrOpt(
+        'transport_cassette_mode',
+        default=None,
+        choices=[None, 'record', 'replay'],
+        help="If set to 'record', the outputs of all commands run on "
+             "controllers and compute hosts are recorded in "
+             "[whitebox]/transport_cassette_path. If set to 'replay', "
+             "commands are not run at all, and their outputs are instead "
+             "served from that file. Replaying is meant for benchmarking "
+             "and debugging whitebox's own parsing code offline, and does "
+             "not support persistent container shells or the host agent."),
+    cfg.StrOpt(
+        'transport_cassette_path',
+        default='whitebox-cassette.json',
+        help='File in which to record, or from which to replay, command '
+             'outputs. See [whitebox]/transport_cassette_mode.'),
+    cfg.BoolOpt(
+        'ssh_connection_pooling',
+        default=True,
+        help='Keep SSH connections to controllers and compute hosts open and '
+             'reuse them across commands, instead of connecting and '
+             'authenticating for every command. Connections are shared by '
+             'all whitebox clients in the same process.'),
+    cfg.IntOpt(
+        'ssh_pool_idle_timeout',
+        default=300,
+        help='Number of seconds after which an unused pooled SSH connection '
+             'is closed. It is transparently re-opened on next use.'),
+    cfg.IntOpt(
+        'ssh_pool_keepalive_interval',
+        default=30,
+        help='Interval in seconds between keepalive packets sent on pooled '
+             'SSH connections. 0 disables keepalives.'),
+    cfg.StrOpt(
+        'openssh_control_dir',
+        default=None,
+        help="With [whitebox]/transport set to 'openssh', the directory in "
+             "which the ssh master connections' control sockets are "
+             "created. Defaults to a per-user directory in the system's "
+             "temporary directory. The path must be short, as UNIX socket "
+             "paths are limited to around 100 characters."),
+    cfg.IntOpt(
+        'openssh_control_persist',
+        default=600,
+        help="With [whitebox]/transport set to 'openssh', the number of "
+             "seconds an idle master connection is kept open after the "
+             "last command using it ended."),
+    cfg.IntOpt(
+        'max_concurrent_hosts',
+        default=8,
+        min=1,
+        help='Maximum number of hosts to run commands on concurrently when '
+             'the same operation is done on several hosts, like changing the '
+             'configuration of all compute hosts.'),
+    cfg.FloatOpt(
+        'waiter_initial_interval',
+        default=0.5,
+        min=0,
+        help='The number of seconds whitebox waiters wait before polling '
+             'for the second time, the first poll being immediate. The '
+             'interval then doubles after each poll, up to '
+             '[compute]/build_interval.'),
+    cfg.StrOpt(
+        'notification_transport_url',
+        default=None,
+        secret=True,
+        help='The oslo.messaging transport URL of the message bus the '
+             'OpenStack services send their notifications to. If set, '
+             'waiters are woken up by the notifications that signal the '
+             'change they wait for, rather than only polling the APIs. '
+             'Requires oslo.messaging. Each test worker process consumes '
+             'the notifications from its own queue, named '
+             'whitebox-<hostname>-<number>, which it deletes from RabbitMQ '
+             'when it exits.'),
+    cfg.ListOpt(
+        'notification_exchanges',
+        default=['nova', 'neutron'],
+        help='The exchanges of the services whose notifications to listen '
+             'for, with [whitebox]/notification_transport_url set. Each '
+             'service sends its notifications to its own exchange, named '
+             'by its control_exchange option.'),
+    cfg.ListOpt(
+        'notification_topics',
+        default=['versioned_notifications', 'notifications'],
+        help='The notification topics to listen on, with '
+             '[whitebox]/notification_transport_url set.'),
+    cfg.IntOpt(
+        'notification_poll_interval',
+        default=5,
+        min=1,
+        help='With [whitebox]/notification_transport_url set, the number of '
+             'seconds waiters that have seen no notification for that long '
+             'wait between polls, in case a notification was missed. Until '
+             'the first notification is received, waiters poll every '
+             '[compute]/build_interval seconds instead.'),
+    cfg.IntOpt(
+        'domain_event_poll_interval',
+        default=10,
+        min=1,
+        help='When waiting for a domain to change state, the number of '
+             'seconds to wait for a libvirt lifecycle event before checking '
+             'the state of the domain directly. This bounds how long an '
+             'event that fired while whitebox was not yet listening can '
+             'delay the wait.'),
+    cfg.BoolOpt(
+        'command_metrics',
+        default=False,
+        help='Time every command run on controllers and compute hosts, '
+             'recording its host, command class (virsh, crudini, sysfs, '
+             'numactl, log query...), connect time, execution time and '
+             'output size. A summary is attached to each test as a subunit '
+             'detail.'),
+    cfg.StrOpt(
+        'command_metrics_dir',
+        default=None,
+        help='If set along with [whitebox]/command_metrics, each test worker '
+             'process writes a JSON report of all the commands it ran, '
+             'aggregated per test and for the whole run, to this directory '
+             'when it exits.'),
     cfg.BoolOpt(
         'containers',
         default=False,
@@ -73,6 +207,49 @@ general_opts = [
         choices=["docker", "podman"],
         help="Name of the executable running containers. Correct values are"
         " 'docker' (default) for osp 12 to 14, and 'podman' starting 15"),
+    cfg.BoolOpt(
+        'persistent_container_shells',
+        default=False,
+        help="When [whitebox]/containers is True, run commands destined for "
+             "a container in a single long-lived shell per container and "
+             "host, instead of a new '<container_runtime> exec' for every "
+             "command."),
+    cfg.BoolOpt(
+        'use_host_agent',
+        default=False,
+        help='Answer common host queries (sysfs and meminfo reads, config '
+             'options, domain XML, qemu-img info) with a small Python agent '
+             'that whitebox starts on each host on first use and keeps '
+             'running, instead of running and parsing a separate shell '
+             'command for each query. Requires Python 3 on the hosts.'),
+    cfg.StrOpt(
+        'host_agent_python',
+        default='python3',
+        help='Python interpreter used to run the whitebox host agent.'),
+    cfg.StrOpt(
+        'host_capabilities_cache_dir',
+        default=None,
+        help="Compute hosts' libvirt capabilities (CPU topology, NUMA cells "
+             "and distances, page sizes) are only fetched once per test "
+             "worker process. If this is set, they are also written to this "
+             "directory, so that all the workers of a run share a single "
+             "`virsh capabilities` per host. Use a different directory for "
+             "each run, or empty it between runs."),
+    cfg.StrOpt(
+        'libvirt_uri',
+        default=None,
+        help="If set, query libvirt (domain XML, capabilities, secrets, "
+             "domain lists) through the libvirt Python bindings, with one "
+             "connection per compute host kept open for the whole run, "
+             "instead of running virsh for every query. This is a template "
+             "for the connection URI, in which {host}, {username} and "
+             "{key_filename} are replaced by the host's control plane "
+             "address, [whitebox]/ctlplane_ssh_username and "
+             "[whitebox]/ctlplane_ssh_private_key_path. For example: "
+             "'qemu+ssh://{username}@{host}/system?keyfile={key_filename}"
+             "&no_verify=1'. 'test:///default' uses libvirt's built-in fake "
+             "driver. Requires the libvirt Python bindings, which are not "
+             "installed with whitebox."),
     cfg.IntOpt(
         'file_backed_memory_size',
         default=0,
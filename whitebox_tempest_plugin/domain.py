@@ -0,0 +1,362 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import functools
+import xml.etree.ElementTree as ET
+
+from whitebox_tempest_plugin import hardware
+
+# NOTE(artom) A difference between two domains. `path` locates it from the
+# root element, for example "cputune/vcpupin[@vcpu='0']/@cpuset" for an
+# attribute, "os/nvram/text()" for an element's text, or "os/nvram" for an
+# element that was added (old is None) or removed (new is None). old and new
+# are strings for attributes and text, and Elements otherwise.
+Change = collections.namedtuple('Change', ['path', 'old', 'new'])
+
+# NOTE(artom) Attributes that identify an element among its siblings of the
+# same tag, checked in order. Elements are paired up by these when their
+# position among their siblings changed.
+IDENTITY_ATTRS = ('id', 'cellid', 'vcpu', 'iothread', 'name', 'dev')
+# Elements identified by an attribute of one of their children, rather than
+# their own.
+IDENTITY_CHILDREN = {
+    'disk': ('target', 'dev'),
+    'interface': ('mac', 'address'),
+}
+
+
+def _compile_key(key):
+    """Returns a function that extracts key from an element, where key is
+    the path of an attribute ('@vcpu', 'mac/@address') or of an element
+    whose text is the key ('serial').
+    """
+    if '@' not in key:
+        return lambda elem: getattr(elem.find(key), 'text', None)
+    path, _, attr = key.rpartition('@')
+    path = path.rstrip('/')
+    if not path:
+        return lambda elem: elem.get(attr)
+
+    def get(elem):
+        child = elem.find(path)
+        return child.get(attr) if child is not None else None
+
+    return get
+
+
+_indexes = {}
+
+
+def register_index(name, path, key):
+    """Registers an index of a domain's elements found at path, keyed by
+    the key of each element (see _compile_key). Domain.index() builds it in
+    a single pass over the elements, after which lookups are dict hits.
+    """
+    _indexes[name] = (path, _compile_key(key))
+
+
+register_index('vcpupin', './cputune/vcpupin', '@vcpu')
+register_index('iothreadpin', './cputune/iothreadpin', '@iothread')
+register_index('memnode', './numatune/memnode', '@cellid')
+register_index('interface_by_mac', './devices/interface', 'mac/@address')
+register_index('disk_by_target', './devices/disk', 'target/@dev')
+register_index('disk_by_serial', './devices/disk', 'serial')
+register_index('disk_by_controller', './devices/disk',
+               'address/@controller')
+register_index('hostdev_by_type', './devices/hostdev', '@type')
+register_index('controller_by_type', './devices/controller', '@type')
+
+
+class Domain(object):
+    """A libvirt domain, parsed once from its XML.
+
+    Each view of the domain is computed from the parsed tree the first time
+    it is accessed, and memoized. The views and the elements they contain
+    are shared by everyone holding the Domain, and must not be modified.
+    """
+
+    def __init__(self, xml):
+        self.xml = xml
+        self._indexes = {}
+
+    @functools.cached_property
+    def root(self):
+        return ET.fromstring(self.xml)
+
+    def index(self, name):
+        """Returns the registered index name (see register_index()), a
+        dict of key -> list of elements with that key, in document order.
+        Elements without the key are left out.
+        """
+        if name not in self._indexes:
+            path, get_key = _indexes[name]
+            index = {}
+            for elem in self.root.findall(path):
+                key = get_key(elem)
+                if key is not None:
+                    index.setdefault(key, []).append(elem)
+            self._indexes[name] = index
+        return self._indexes[name]
+
+    def lookup(self, name, key):
+        """Returns the list of elements with key in the index name."""
+        return self.index(name).get(key, [])
+
+    @functools.cached_property
+    def vcpu_pins(self):
+        """A dict of guest vCPU number -> set(host CPU numbers it is pinned
+        to).
+        """
+        return {int(vcpu): hardware.parse_cpu_spec(pins[-1].get('cpuset'))
+                for vcpu, pins in self.index('vcpupin').items()}
+
+    @functools.cached_property
+    def vcpu_cpuset(self):
+        """The set of host CPUs in the <vcpu> element's cpuset, which all
+        unpinned vCPUs float over.
+        """
+        return hardware.parse_cpu_spec(
+            self.root.find('./vcpu').get('cpuset', None))
+
+    @functools.cached_property
+    def emulator_pins(self):
+        """The set of host CPU numbers the emulator threads are pinned to."""
+        emulator_pins = set()
+        for pin in self.root.findall('./cputune/emulatorpin'):
+            emulator_pins |= hardware.parse_cpu_spec(pin.get('cpuset'))
+        return emulator_pins
+
+    @functools.cached_property
+    def iothreads(self):
+        """The number of iothreads, or None if the domain has none."""
+        iothreads = self.root.find('./iothreads')
+        return int(iothreads.text) if iothreads is not None else None
+
+    @functools.cached_property
+    def iothread_pins(self):
+        """A dict of iothread number -> set(host CPU numbers it is pinned
+        to). Empty if the iothreads are not pinned.
+        """
+        return {int(iothread): hardware.parse_cpu_spec(
+                pins[-1].get('cpuset'))
+                for iothread, pins in self.index('iothreadpin').items()}
+
+    @functools.cached_property
+    def memnodes(self):
+        """A dict of guest NUMA cell number -> set(host NUMA nodes its memory
+        is allocated from), from <numatune>.
+        """
+        return {int(cellid): hardware.parse_cpu_spec(
+                memnodes[-1].get('nodeset'))
+                for cellid, memnodes in self.index('memnode').items()}
+
+    @functools.cached_property
+    def hugepages(self):
+        """The <page> elements of <memoryBacking><hugepages>."""
+        return self.root.findall('./memoryBacking/hugepages/page')
+
+    @functools.cached_property
+    def interfaces(self):
+        return self.root.findall('./devices/interface')
+
+    @functools.cached_property
+    def interfaces_by_mac(self):
+        """A dict of MAC address -> list of <interface> elements with that
+        address. Nothing stops two interfaces from having the same MAC
+        address, so callers should check there is only one.
+        """
+        return self.index('interface_by_mac')
+
+    @functools.cached_property
+    def disks(self):
+        return self.root.findall('./devices/disk')
+
+    @functools.cached_property
+    def disks_by_target(self):
+        """A dict of target device name (vda, sdb...) -> <disk> element."""
+        return {dev: disks[-1]
+                for dev, disks in self.index('disk_by_target').items()}
+
+    @functools.cached_property
+    def pci_hostdevs(self):
+        return self.lookup('hostdev_by_type', 'pci')
+
+    @functools.cached_property
+    def hostdev_pci_addresses(self):
+        """The host PCI addresses of the PCI devices passed through to the
+        domain, in the <domain>:<bus>:<slot>.<function> format.
+        """
+        return [hardware.get_pci_address_from_xml_device(
+            hostdev.find('./source/address')) for hostdev in self.pci_hostdevs]
+
+    @functools.cached_property
+    def tpm(self):
+        """The <tpm> element, or None if the domain has no TPM."""
+        return self.root.find('./devices/tpm')
+
+    @functools.cached_property
+    def os(self):
+        return self.root.find('./os')
+
+    @functools.cached_property
+    def loader(self):
+        """The <os><loader> element, or None for BIOS guests."""
+        return self.os.find('./loader') if self.os is not None else None
+
+    def diff(self, other, ignore=()):
+        """Returns the Changes from this domain to other. See diff()."""
+        return diff(self, other, ignore)
+
+
+def _text(elem):
+    return (elem.text or '').strip()
+
+
+def _canonical(elem):
+    """A hashable form of elem that ignores whitespace and the order of
+    attributes and children.
+    """
+    return (elem.tag, tuple(sorted(elem.items())), _text(elem),
+            tuple(sorted(_canonical(child) for child in elem)))
+
+
+def _identity(elem):
+    """Returns an (attribute path, value) tuple that identifies elem among
+    its siblings, or None.
+    """
+    if elem.tag in IDENTITY_CHILDREN:
+        child_tag, attr = IDENTITY_CHILDREN[elem.tag]
+        child = elem.find(child_tag)
+        if child is not None and child.get(attr) is not None:
+            return ('%s/@%s' % (child_tag, attr), child.get(attr))
+    for attr in IDENTITY_ATTRS:
+        if elem.get(attr) is not None:
+            return ('@' + attr, elem.get(attr))
+    return None
+
+
+def _join(path, segment):
+    return '%s/%s' % (path, segment) if path else segment
+
+
+def _pair_children(old, new):
+    """Yields (segment, old child, new child) for the children of old and
+    new that differ, with None in place of a child that was removed or
+    added. Identical children are skipped wherever they are.
+    """
+    tags = list(dict.fromkeys(child.tag for child in list(old) + list(new)))
+    for tag in tags:
+        olds = old.findall(tag)
+        news = new.findall(tag)
+        indexed = len(olds) > 1 or len(news) > 1
+        # NOTE(artom) Number the remaining children by their position in the
+        # old domain, or in the new one for the ones that were added.
+        positions = {id(child): i for i, child in enumerate(news, 1)}
+        positions.update({id(child): i for i, child in enumerate(olds, 1)})
+        unchanged = collections.Counter(_canonical(child) for child in olds)
+        unchanged &= collections.Counter(_canonical(child) for child in news)
+        remaining = []
+        for children in (olds, news):
+            counts = unchanged.copy()
+            remaining.append([])
+            for child in children:
+                canonical = _canonical(child)
+                if counts[canonical]:
+                    counts[canonical] -= 1
+                else:
+                    remaining[-1].append(child)
+        olds, news = remaining
+
+        def segment(child):
+            identity = _identity(child)
+            if identity is not None:
+                return "%s[%s='%s']" % (tag, identity[0], identity[1])
+            if indexed:
+                return '%s[%d]' % (tag, positions[id(child)])
+            return tag
+
+        pairs = []
+        news_by_identity = {}
+        for child in news:
+            identity = _identity(child)
+            if identity is not None:
+                news_by_identity.setdefault(identity, []).append(child)
+        unpaired = []
+        for child in olds:
+            matches = news_by_identity.get(_identity(child))
+            if matches:
+                match = matches.pop(0)
+                news.remove(match)
+                pairs.append((child, match))
+            else:
+                unpaired.append(child)
+        # NOTE(artom) Children without a matching identity are paired up
+        # in order, as long as their identities (if any) don't contradict
+        # each other.
+        for child in list(unpaired):
+            for match in news:
+                if _identity(match) is None or _identity(child) is None:
+                    news.remove(match)
+                    unpaired.remove(child)
+                    pairs.append((child, match))
+                    break
+        for old_child, new_child in pairs:
+            yield segment(old_child), old_child, new_child
+        for child in unpaired:
+            yield segment(child), child, None
+        for child in news:
+            yield segment(child), None, child
+
+
+def _diff(old, new, path, plain_path, ignore):
+    if plain_path in ignore:
+        return
+    keys = sorted(set(old.keys()) | set(new.keys()))
+    for key in keys:
+        if old.get(key) != new.get(key) and (
+                _join(plain_path, '@' + key) not in ignore):
+            yield Change(_join(path, '@' + key), old.get(key), new.get(key))
+    if _text(old) != _text(new):
+        yield Change(_join(path, 'text()'), _text(old), _text(new))
+    for segment, old_child, new_child in _pair_children(old, new):
+        child_path = _join(path, segment)
+        tag = old_child.tag if old_child is not None else new_child.tag
+        child_plain_path = _join(plain_path, tag)
+        if old_child is None or new_child is None:
+            if child_plain_path not in ignore:
+                yield Change(child_path, old_child, new_child)
+        else:
+            yield from _diff(old_child, new_child, child_path,
+                             child_plain_path, ignore)
+
+
+def diff(old, new, ignore=()):
+    """Returns the list of Changes between two domains, given as Domains or
+    root Elements.
+
+    Only what changed is reported: an element that was added or removed is
+    a single Change holding the whole subtree, and an element present on
+    both sides is compared attribute by attribute and child by child. The
+    order of attributes and of sibling elements, and whitespace around text,
+    are ignored; siblings are paired up by IDENTITY_ATTRS and
+    IDENTITY_CHILDREN, or failing that by position.
+
+    ignore is a collection of paths, without [] predicates, to leave out of
+    the comparison, for example ('@id', 'seclabel', 'devices/graphics').
+    """
+    old = old.root if isinstance(old, Domain) else old
+    new = new.root if isinstance(new, Domain) else new
+    return list(_diff(old, new, '', '', frozenset(ignore)))
@@ -30,3 +30,31 @@ class InvalidCPUSpec(exceptions.TempestException):
 
 class MigrationException(exceptions.TempestException):
     message = "Migration Failed: %(msg)s."
+
+
+class ContainerShellException(exceptions.TempestException):
+    message = ("Persistent shell in container %(container)s on host %(host)s "
+               "exited unexpectedly.")
+
+
+class HostAgentException(exceptions.TempestException):
+    message = "Whitebox host agent on host %(host)s failed: %(error)s."
+
+
+class CassetteMissException(exceptions.TempestException):
+    message = ("No recorded output for command %(command)s on host "
+               "%(host)s.")
+
+
+# NOTE(artom) The libvirt API replaces virsh commands, whose failures callers
+# catch as SSHExecCommandFailed, so its own failures must be caught the same.
+class LibvirtAPIException(exceptions.SSHExecCommandFailed):
+    message = "libvirt API call on host %(host)s failed: %(error)s."
+
+
+class NotificationListenerException(exceptions.TempestException):
+    message = "Notification listener failed: %(error)s."
+
+
+class LogTailException(exceptions.TempestException):
+    message = "Following the logs of host %(host)s failed: %(error)s."
@@ -13,28 +13,58 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import base64
+import collections
+from concurrent import futures
 import contextlib
 import json
 import pymysql
+import re
+import shlex
 from six import StringIO
+import socket
 import sshtunnel
+import threading
+import time
 
 from oslo_log import log as logging
 from tempest import config
-from tempest.lib.common import ssh
 from tempest.lib import exceptions as tempest_libexc
 
 from whitebox_tempest_plugin.common import waiters
 from whitebox_tempest_plugin import exceptions
 from whitebox_tempest_plugin import hardware
+from whitebox_tempest_plugin.services import container_shell
+from whitebox_tempest_plugin.services import host_agent
+from whitebox_tempest_plugin.services import libvirt_client
+from whitebox_tempest_plugin.services import metrics
+from whitebox_tempest_plugin.services import transports
 from whitebox_tempest_plugin import utils as whitebox_utils
 
 CONF = config.CONF
 LOG = logging.getLogger(__name__)
 
 
+class CommandResult(collections.namedtuple(
+        'CommandResult', ['command', 'exit_status', 'stdout', 'stderr'])):
+    """The outcome of a single command run by SSHClient.execute_many()."""
+
+    def check(self):
+        """Returns stdout if the command succeeded, otherwise raises the same
+        SSHExecCommandFailed exception execute() would have.
+        """
+        if self.exit_status != 0:
+            raise tempest_libexc.SSHExecCommandFailed(
+                command=self.command, exit_status=self.exit_status,
+                stderr=self.stderr, stdout=self.stdout)
+        return self.stdout
+
+
 class SSHClient(object):
-    """A client to execute remote commands, based on tempest.lib.common.ssh."""
+    """A client to execute commands on a host. Commands are run by a
+    transport (see services.transports), normally over SSH, or locally when
+    the host is the machine running the tests.
+    """
 
     def __init__(self, host):
         self.ssh_key = CONF.whitebox.ctlplane_ssh_private_key_path
@@ -42,20 +72,153 @@ class SSHClient(object):
         self.host_parameters = whitebox_utils.get_host_details(host)
         self.ctlplane_address = whitebox_utils.get_ctlplane_address(host)
 
-    def execute(self, command, container_name=None, sudo=False):
-        ssh_client = ssh.Client(self.ctlplane_address, self.ssh_user,
-                                key_filename=self.ssh_key)
+    def get_transport(self):
+        return transports.get_transport(self.ctlplane_address, self.ssh_user,
+                                        self.ssh_key)
+
+    def get_host_agent(self):
+        """Returns the HostAgent for this host, or None if the host agent
+        is not enabled.
+        """
+        if not CONF.whitebox.use_host_agent:
+            return None
+        return host_agent.get_agent(self.get_transport())
+
+    def _container_prefix(self, container_name):
+        """Returns the argv prefix the host agent needs to run a command in
+        container_name, or None if it should run on the host itself.
+        """
+        if CONF.whitebox.containers and container_name:
+            return [CONF.whitebox.container_runtime, 'exec', '-u', 'root',
+                    container_name]
+        return None
+
+    def _wrap_command(self, command, container_name=None, sudo=False):
         if (CONF.whitebox.containers and container_name):
             executable = CONF.whitebox.container_runtime
-            command = 'sudo %s exec -u root %s %s' % (executable,
-                                                      container_name, command)
+            return 'sudo %s exec -u root %s %s' % (executable,
+                                                   container_name, command)
         elif sudo:
-            command = 'sudo %s' % command
-        LOG.debug('command=%s', command)
-        result = ssh_client.exec_command(command)
+            return 'sudo %s' % command
+        return command
+
+    def _use_container_shell(self, container_name):
+        return (CONF.whitebox.containers and container_name and
+                CONF.whitebox.persistent_container_shells)
+
+    def execute(self, command, container_name=None, sudo=False):
+        transport = self.get_transport()
+        with metrics.measure(self.ctlplane_address, command) as sample:
+            metrics.time_connect(sample, transport)
+            if self._use_container_shell(container_name):
+                shell = container_shell.get_shell(transport, container_name)
+                LOG.debug('command=%s (in %s shell)', command,
+                          container_name)
+                result = shell.execute(command)
+            else:
+                command = self._wrap_command(command, container_name, sudo)
+                LOG.debug('command=%s', command)
+                result = transport.exec_command(command)
+            sample['bytes'] = len(result)
         LOG.debug('result=%s', result)
         return result
 
+    def execute_stream(self, command, container_name=None, sudo=False,
+                       until=None):
+        """Runs a command and yields its output line by line as it arrives,
+        instead of buffering all of it like execute() does.
+
+        :param until: An optional predicate called with each line. Once it
+                      returns True, that line is yielded and the command is
+                      terminated without waiting for it to finish.
+        :raises SSHExecCommandFailed: once the output has been consumed, if
+                                      the command ran to completion with a
+                                      non-zero exit status.
+        """
+        transport = self.get_transport()
+        with metrics.measure(self.ctlplane_address, command) as sample:
+            metrics.time_connect(sample, transport)
+            command = self._wrap_command(command, container_name, sudo)
+            LOG.debug('command=%s (streamed)', command)
+            process = transport.spawn(command)
+            nbytes = 0
+            try:
+                process.stdin.close()
+                while True:
+                    line = process.stdout.readline()
+                    if not line:
+                        break
+                    nbytes += len(line)
+                    line = line.decode('utf-8', 'replace')
+                    yield line
+                    if until and until(line):
+                        return
+                err_data = process.stderr.read().decode('utf-8', 'replace')
+                exit_status = process.wait()
+                if exit_status != 0:
+                    raise tempest_libexc.SSHExecCommandFailed(
+                        command=command, exit_status=exit_status,
+                        stderr=err_data, stdout='<streamed>')
+            finally:
+                sample['bytes'] = nbytes
+                process.close()
+
+    def execute_many(self, commands, container_name=None, sudo=False):
+        """Runs several commands in a single SSH round trip. The commands are
+        run sequentially by one remote shell, each in its own subshell with
+        stdin closed, and their outputs are base64 encoded to keep them
+        apart. A failing command does not prevent the next ones from running,
+        but SSHExecCommandFailed is raised if the batch did not report a
+        result for every command.
+
+        :param commands: A list of commands. container_name and sudo apply to
+                         each of them as they would for execute().
+        :return results: A list of CommandResult, in the same order as
+                         commands.
+        """
+        if not commands:
+            return []
+        # NOTE(artom) Outputs are base64 encoded, so they can never contain
+        # the marker line, and a constant marker keeps the script the same
+        # across runs, which makes it possible to record and replay it.
+        marker = 'whitebox-result'
+        script = ['d=$(mktemp -d) || exit 1', 'trap \'rm -rf "$d"\' EXIT']
+        for index, command in enumerate(commands):
+            script.append('(%s\n) </dev/null >"$d/o" 2>"$d/e"' %
+                          self._wrap_command(command, container_name, sudo))
+            script.append('echo "%s %d $?"; base64 -w0 "$d/o"; echo; '
+                          'base64 -w0 "$d/e"; echo' % (marker, index))
+        script = '\n'.join(script)
+        LOG.debug('commands=%s', commands)
+        transport = self.get_transport()
+        # NOTE(artom) The batch is classified by its first command, which
+        # is representative as all callers batch similar commands.
+        with metrics.measure(self.ctlplane_address, commands[0]) as sample:
+            metrics.time_connect(sample, transport)
+            output = transport.exec_command('sh -c %s' % shlex.quote(script))
+            sample['bytes'] = len(output)
+        results = []
+        lines = output.split('\n')
+        for i, line in enumerate(lines):
+            if not line.startswith(marker + ' '):
+                continue
+            index, exit_status = map(int, line.split()[1:])
+            results.append(CommandResult(
+                commands[index], exit_status,
+                base64.b64decode(lines[i + 1]).decode('utf-8'),
+                base64.b64decode(lines[i + 2]).decode('utf-8')))
+        LOG.debug('results=%s', results)
+        # NOTE(artom) The script only fails as a whole if it could not be
+        # started, but its output can still come back short if the remote
+        # shell was killed part way. Never hand callers fewer results than
+        # commands, they would pair them up wrongly.
+        if len(results) != len(commands):
+            raise tempest_libexc.SSHExecCommandFailed(
+                command=script, exit_status=0, stderr='',
+                stdout='%d results for %d commands:\n%s' % (
+                    len(results), len(commands), output))
+        return results
+
 
 class VirshXMLClient(SSHClient):
     """A client to obtain libvirt XML from a remote host."""
@@ -67,22 +230,138 @@ class VirshXMLClient(SSHClient):
             raise exceptions.MissingServiceSectionException(service='libvirt')
         self.container_name = service_dict.get('container_name')
 
+    def get_libvirt_connection(self):
+        """Returns the LibvirtConnection for this host, or None if
+        [whitebox]/libvirt_uri is not set.
+        """
+        if not CONF.whitebox.libvirt_uri:
+            return None
+        return libvirt_client.get_connection(self.ctlplane_address,
+                                             self.ssh_user, self.ssh_key)
+
     def dumpxml(self, domain):
+        connection = self.get_libvirt_connection()
+        if connection:
+            return connection.dumpxml(domain)
+        agent = self.get_host_agent()
+        if agent:
+            return agent.call('dumpxml', domain=domain,
+                              prefix=self._container_prefix(
+                                  self.container_name))
         command = 'virsh dumpxml %s' % domain
         return self.execute(
             command, container_name=self.container_name, sudo=True)
 
+    def dumpxml_all(self):
+        """Returns the XML of every running domain on the host, keyed by
+        domain (instance) name, in a single round trip.
+        """
+        connection = self.get_libvirt_connection()
+        if connection:
+            return connection.dumpxml_all()
+        agent = self.get_host_agent()
+        if agent:
+            return agent.call('dumpxml_all',
+                              prefix=self._container_prefix(
+                                  self.container_name))
+        marker = 'whitebox-domain'
+        # NOTE(artom) Domains can stop between being listed and being
+        # dumped, in which case virsh dumpxml prints nothing and the domain
+        # is skipped below.
+        script = ('for d in $(virsh list --name); do echo "%s $d"; '
+                  'virsh dumpxml "$d" 2>/dev/null || true; done' % marker)
+        output = self.execute('sh -c %s' % shlex.quote(script),
+                              container_name=self.container_name, sudo=True)
+        xmls = {}
+        domain = None
+        for line in output.splitlines(True):
+            if line.startswith(marker + ' '):
+                domain = line[len(marker) + 1:].strip()
+                xmls[domain] = ''
+            elif domain is not None:
+                xmls[domain] += line
+        return {domain: xml for domain, xml in xmls.items() if xml.strip()}
+
     def capabilities(self):
+        connection = self.get_libvirt_connection()
+        if connection:
+            return connection.capabilities()
+        agent = self.get_host_agent()
+        if agent:
+            return agent.call('capabilities',
+                              prefix=self._container_prefix(
+                                  self.container_name))
         command = 'virsh capabilities'
         return self.execute(
             command, container_name=self.container_name, sudo=True)
 
+    def list_domains(self, all_domains=False):
+        """Returns the names of the running domains, or of all domains if
+        all_domains is set.
+        """
+        connection = self.get_libvirt_connection()
+        if connection:
+            return connection.list_domains(all_domains)
+        agent = self.get_host_agent()
+        if agent:
+            return agent.call('list_domains', all_domains=all_domains,
+                              prefix=self._container_prefix(
+                                  self.container_name))
+        command = 'virsh list --name'
+        if all_domains:
+            command += ' --all'
+        output = self.execute(
+            command, container_name=self.container_name, sudo=True)
+        return [name for name in output.splitlines() if name]
+
+    def wait_for_domain_shutdown(self, domain, timeout):
+        """Waits for a domain to stop running, and returns whether it did
+        within timeout seconds.
+
+        Rather than repeatedly listing the running domains, this follows the
+        domain's lifecycle events with `virsh event` and returns as soon as
+        the domain is reported stopped. An event that fires before `virsh
+        event` starts listening would be missed, so each listen only lasts
+        [whitebox]/domain_event_poll_interval seconds, after which the list
+        of running domains is checked again.
+        """
+        deadline = time.monotonic() + timeout
+        while domain in self.list_domains():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            window = max(1, int(min(
+                remaining, CONF.whitebox.domain_event_poll_interval)))
+            command = ('virsh event --domain %s --event lifecycle --loop '
+                       '--timeout %d' % (domain, window))
+            try:
+                for line in self.execute_stream(
+                        command, container_name=self.container_name,
+                        sudo=True):
+                    if 'Stopped' in line:
+                        LOG.debug('Domain %s stopped: %s', domain,
+                                  line.strip())
+                        return True
+            except tempest_libexc.SSHExecCommandFailed as e:
+                # NOTE(artom) Most likely the domain went away before virsh
+                # could look it up. Otherwise, fall back to polling.
+                LOG.debug('Failed to follow events of domain %s: %s',
+                          domain, e)
+                time.sleep(min(remaining, CONF.compute.build_interval))
+        return True
+
     def domblklist(self, server_id):
+        connection = self.get_libvirt_connection()
+        if connection:
+            return connection.domblklist(server_id)
         command = 'virsh domblklist %s' % server_id
         return self.execute(
             command, container_name=self.container_name, sudo=True)
 
     def secret_dumpxml(self, secret_uuid):
+        connection = self.get_libvirt_connection()
+        if connection:
+            return connection.secret_dumpxml(secret_uuid)
         command = f'virsh secret-dumpxml {secret_uuid}'
         return self.execute(
             command, container_name=self.container_name, sudo=True)
@@ -91,19 +370,200 @@ class VirshXMLClient(SSHClient):
 class LogParserClient(SSHClient):
     """A client to parse logs"""
 
-    def parse(self, query_string):
+    def _query(self, query_string):
+        """Returns the command and container needed to query the nova-compute
+        logs for query_string.
+        """
         log_query_command = CONF.whitebox_nova_compute.log_query_command
         if log_query_command == 'zgrep':
             command = f'sh -c "zgrep \'{query_string}\' /var/log/nova/*"'
+            container_name = None
         else:
             unit = CONF.whitebox_nova_compute.journalctl_unit
             command = f'journalctl -u {unit} -g \'{query_string}\''
-            services_dict = self.host_parameters.get('services', {})
-            nova_compute_srvc = services_dict.get('nova-compute')
-            container_name = nova_compute_srvc.get('container_name')
+            container_name = self._journal_container_name()
+        return command, container_name
+
+    def _journal_container_name(self):
+        services_dict = self.host_parameters.get('services', {})
+        nova_compute_srvc = services_dict.get('nova-compute')
+        return nova_compute_srvc.get('container_name')
+
+    def parse(self, query_string):
+        command, container_name = self._query(query_string)
         return self.execute(command, container_name=container_name, sudo=True)
 
 
+class LogTailer(LogParserClient):
+    """Follows the nova-compute logs of a host as they are written, with a
+    single long-lived `journalctl -f` or `tail -F`, depending on
+    [whitebox_nova_compute]/log_query_command. Tests register the patterns
+    they expect before triggering an action, and get a future that is
+    resolved as soon as a matching line is logged, without searching the
+    whole log history afterwards.
+    """
+
+    # NOTE(artom) Printed by the remote shell once the logs are followed,
+    # so that start() can wait for that before the test goes on.
+    MARKER = 'whitebox-log-tail'
+
+    def __init__(self, host):
+        super(LogTailer, self).__init__(host)
+        self._lock = threading.Lock()
+        self._expectations = []
+        self._error = None
+        self._stopping = threading.Event()
+        self._process = None
+        self._thread = None
+
+    def _follow_command(self):
+        """Returns the command that follows the logs, and the container to
+        run it in. The command prints MARKER at a point after which no
+        logged line can be missed.
+        """
+        if CONF.whitebox_nova_compute.log_query_command == 'zgrep':
+            # NOTE(artom) tail only outputs what is appended to the files
+            # once it has opened them, so the marker is printed once tail,
+            # which the shell execs into, has them all open.
+            script = (
+                'set -- /var/log/nova/*.log; '
+                '(while [ "$(ls -l /proc/$$/fd | grep -c /var/log/nova/)" '
+                '-lt $# ]; do sleep 0.1; done; echo %s) & '
+                'exec tail -q -n 0 -F "$@"' % self.MARKER)
+            container_name = None
+        else:
+            # NOTE(artom) Follow the journal from the cursor of its last
+            # entry when the marker is printed, however long journalctl
+            # then takes to get there.
+            unit = CONF.whitebox_nova_compute.journalctl_unit
+            script = (
+                'c=$(journalctl -u %(unit)s -q -n 1 --show-cursor | '
+                'sed -n "s/^-- cursor: //p"); echo %(marker)s; '
+                'if [ -n "$c" ]; then '
+                'exec journalctl -u %(unit)s -q -f --no-tail '
+                '--after-cursor "$c"; '
+                'else exec journalctl -u %(unit)s -q -f -n 0; fi' %
+                {'unit': unit, 'marker': self.MARKER})
+            container_name = self._journal_container_name()
+        return 'sh -c %s' % shlex.quote(script), container_name
+
+    def start(self):
+        command, container_name = self._follow_command()
+        command = self._wrap_command(command, container_name, sudo=True)
+        LOG.debug('command=%s (followed)', command)
+        self._process = self.get_transport().spawn(command)
+        self._process.stdin.close()
+        # NOTE(artom) Lines logged before the marker are of no interest,
+        # no pattern can be expected yet.
+        try:
+            while True:
+                line = self._process.stdout.readline()
+                if not line:
+                    raise exceptions.LogTailException(
+                        host=self.ctlplane_address,
+                        error='the log stream ended before it was followed')
+                if self.MARKER in line.decode('utf-8', 'replace'):
+                    break
+        except socket.timeout:
+            self._process.close()
+            raise exceptions.LogTailException(
+                host=self.ctlplane_address,
+                error='timed out waiting for the logs to be followed')
+        except exceptions.LogTailException:
+            self._process.close()
+            raise
+        self._thread = threading.Thread(target=self._follow)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _follow(self):
+        error = 'the log stream ended'
+        try:
+            while not self._stopping.is_set():
+                try:
+                    line = self._process.stdout.readline()
+                except socket.timeout:
+                    # NOTE(artom) The logs can stay quiet for longer than
+                    # the transport's timeout, keep following.
+                    continue
+                if not line:
+                    break
+                self._match(line.decode('utf-8', 'replace'))
+        except Exception as e:
+            error = str(e)
+        finally:
+            if not self._stopping.is_set():
+                for future in self._take_expectations(error):
+                    future.set_exception(exceptions.LogTailException(
+                        host=self.ctlplane_address, error=error))
+
+    def _take_expectations(self, error):
+        """Returns the futures of the pending expectations, and makes any
+        later expect() fail with error right away.
+        """
+        with self._lock:
+            self._error = error
+            expectations, self._expectations = self._expectations, []
+        return [future for _, future in expectations]
+
+    def _match(self, line):
+        with self._lock:
+            matched = [(regex, future)
+                       for regex, future in self._expectations
+                       if regex.search(line)]
+            for expectation in matched:
+                self._expectations.remove(expectation)
+        for _, future in matched:
+            future.set_result(line)
+
+    def expect(self, pattern):
+        """Returns a concurrent.futures.Future resolved with the first line
+        logged from now on that matches the regular expression pattern. If
+        the logs can no longer be followed, the future fails with a
+        LogTailException instead.
+        """
+        future = futures.Future()
+        future.pattern = pattern
+        regex = re.compile(pattern)
+        with self._lock:
+            error = self._error
+            if error is None:
+                self._expectations.append((regex, future))
+        if error is not None:
+            future.set_exception(exceptions.LogTailException(
+                host=self.ctlplane_address, error=error))
+        return future
+
+    def wait(self, future, timeout=None):
+        """Waits for a future returned by expect() and returns the matching
+        line.
+
+        :param timeout: Defaults to [compute]/build_timeout.
+        :raises TimeoutException: if no line matched in time.
+        :raises LogTailException: if the logs could no longer be followed.
+        """
+        timeout = timeout or CONF.compute.build_timeout
+        try:
+            return future.result(timeout)
+        except futures.TimeoutError:
+            raise tempest_libexc.TimeoutException(
+                'No line matching %s in the nova-compute logs of %s within '
+                '%s s' % (future.pattern, self.ctlplane_address, timeout))
+
+    def stop(self):
+        """Stops following the logs, and cancels the futures of the
+        patterns that were not matched.
+        """
+        self._stopping.set()
+        # NOTE(artom) The reader thread is not joined: until the stream is
+        # torn down on the remote end, it can stay blocked in a read for up
+        # to the transport's timeout. It exits on its own after that.
+        if self._process is not None:
+            self._process.close()
+        for future in self._take_expectations('the log tail was stopped'):
+            future.cancel()
+
+
 class QEMUImgClient(SSHClient):
     """A client to get QEMU image info in json format"""
 
@@ -115,6 +575,11 @@ class QEMUImgClient(SSHClient):
         self.container_name = service_dict.get('container_name')
 
     def info(self, path):
+        agent = self.get_host_agent()
+        if agent:
+            return agent.call('qemu_img_info', path=path,
+                              prefix=self._container_prefix(
+                                  self.container_name))
         command = 'qemu-img info --output=json --force-share %s' % path
         output = self.execute(
             command, container_name=self.container_name, sudo=True)
@@ -147,26 +612,31 @@ class ServiceManager(SSHClient):
         self.unmask_command = service_dict.get('unmask_command')
 
     @contextlib.contextmanager
-    def config_options(self, *opts):
+    def config_options(self, *opts, restart=True):
         """Sets config options and restarts the service. Previous values for
         the options are saved before setting the new ones, and restored when
         the context manager exists.
 
         :param opts: a list of (section, option, value) tuples, each
                      representing a single config option
+        :param restart: Whether to restart the service after setting and
+                        restoring the options. Callers that change several
+                        services at once can restart them together with
+                        restart_nova_services() instead.
         """
-        initial_values = []
-        for section, option, value in opts:
-            initial_values.append((section, option,
-                                   self.get_conf_opt(section, option)))
-            self.set_conf_opt(section, option, value)
-        self.restart()
+        values = self.get_conf_opts(*[(section, option)
+                                      for section, option, _ in opts])
+        initial_values = [(section, option, value) for (section, option, _),
+                          value in zip(opts, values)]
+        self.set_conf_opts(*opts)
+        if restart:
+            self.restart()
         try:
             yield
         finally:
-            for section, option, value in initial_values:
-                self.set_conf_opt(section, option, value)
-            self.restart()
+            self.set_conf_opts(*initial_values)
+            if restart:
+                self.restart()
 
     @contextlib.contextmanager
     def stopped(self):
@@ -181,6 +651,8 @@ class ServiceManager(SSHClient):
             self.start()
 
     def get_conf_opt(self, section, option):
+        if self.get_host_agent():
+            return self.get_conf_opts((section, option))[0]
         command = 'crudini --get %s %s %s' % (self.config_path, section,
                                               option)
         # NOTE(artom) `crudini` will return 1 when attempting to get an
@@ -200,18 +672,54 @@ class ServiceManager(SSHClient):
             else:
                 raise e
 
+    def get_conf_opts(self, *opts):
+        """Gets several config options in a single SSH round trip.
+
+        :param opts: a list of (section, option) tuples
+        :return values: a list of values, in the same order as opts. As with
+                        get_conf_opt(), the value of an option that is not
+                        set is None.
+        """
+        agent = self.get_host_agent()
+        if agent:
+            return agent.call('read_ini', path=self.config_path,
+                              options=list(opts))
+        commands = ['crudini --get %s %s %s' % (self.config_path, section,
+                                                option)
+                    for section, option in opts]
+        values = []
+        for result in self.execute_many(commands, sudo=True):
+            if result.exit_status != 0 and 'not found' in result.stderr:
+                values.append(None)
+            else:
+                values.append(result.check().strip())
+        return values
+
+    def _set_conf_opt_command(self, section, option, value):
+        if value is None:
+            return 'crudini --del %s %s %s' % (self.config_path, section,
+                                               option)
+        return 'crudini --set %s %s %s %s' % (self.config_path, section,
+                                              option, value)
+
     def set_conf_opt(self, section, option, value):
         """Sets option=value in [section]. If value is None, the effect is the
         same as del_conf_opt(option).
         """
-        if value is None:
-            command = 'crudini --del %s %s %s' % (self.config_path, section,
-                                                  option)
-        else:
-            command = 'crudini --set %s %s %s %s' % (self.config_path, section,
-                                                     option, value)
+        command = self._set_conf_opt_command(section, option, value)
         return self.execute(command, container_name=None, sudo=True)
 
+    def set_conf_opts(self, *opts):
+        """Sets several config options in a single SSH round trip.
+
+        :param opts: a list of (section, option, value) tuples. As with
+                     set_conf_opt(), a value of None deletes the option.
+        """
+        commands = [self._set_conf_opt_command(section, option, value)
+                    for section, option, value in opts]
+        for result in self.execute_many(commands, sudo=True):
+            result.check()
+
     def del_conf_opt(self, section, option):
         command = 'crudini --del %s %s %s' % (self.config_path, section,
                                               option)
@@ -243,22 +751,25 @@ class NovaServiceManager(ServiceManager):
         self.host = host
         self.status_field = 'state'
 
-    def start(self):
+    def service_state(self, started):
+        """Returns the (host, binary, status_field, state) the service is
+        in, according to Nova, once started or stopped.
+        """
+        return (self.host, self.service, self.status_field,
+                'up' if started else 'down')
+
+    def start(self, wait=True):
         result = self.execute(self.start_command, sudo=True)
-        waiters.wait_for_nova_service_state(self.services_client,
-                                            self.host,
-                                            self.service,
-                                            self.status_field,
-                                            'up')
+        if wait:
+            waiters.wait_for_nova_service_state(self.services_client,
+                                                *self.service_state(True))
         return result
 
-    def stop(self):
+    def stop(self, wait=True):
         result = self.execute(self.stop_command, sudo=True)
-        waiters.wait_for_nova_service_state(self.services_client,
-                                            self.host,
-                                            self.service,
-                                            self.status_field,
-                                            'down')
+        if wait:
+            waiters.wait_for_nova_service_state(self.services_client,
+                                                *self.service_state(False))
         return result
 
     def get_cpu_shared_set(self):
@@ -290,25 +801,53 @@ class VirtQEMUdManager(ServiceManager):
         self.host = host
         self.status_field = 'status'
 
-    def start(self):
+    def service_state(self, started):
+        """Returns the (host, binary, status_field, state) nova-compute is
+        in, according to Nova, once libvirt is started or stopped.
+        """
+        return (self.host, self.binary, self.status_field,
+                'enabled' if started else 'disabled')
+
+    def start(self, wait=True):
         result = self.execute(self.start_command, sudo=True)
-        waiters.wait_for_nova_service_state(self.services_client,
-                                            self.host,
-                                            self.binary,
-                                            self.status_field,
-                                            'enabled')
+        if wait:
+            waiters.wait_for_nova_service_state(self.services_client,
+                                                *self.service_state(True))
         return result
 
-    def stop(self):
+    def stop(self, wait=True):
         result = self.execute(self.stop_command, sudo=True)
-        waiters.wait_for_nova_service_state(self.services_client,
-                                            self.host,
-                                            self.binary,
-                                            self.status_field,
-                                            'disabled')
+        if wait:
+            waiters.wait_for_nova_service_state(self.services_client,
+                                                *self.service_state(False))
         return result
 
 
+def _set_nova_services_state(managers, started):
+    results = whitebox_utils.fan_out(
+        lambda mgr: mgr.start(wait=False) if started else mgr.stop(wait=False),
+        managers)
+    for result in results.values():
+        result.result()
+    waiters.wait_for_nova_service_states(
+        managers[0].services_client,
+        [mgr.service_state(started) for mgr in managers])
+
+
+def restart_nova_services(managers):
+    """Restarts several services monitored through the Nova API, like
+    those of all the compute hosts, at once. All the services are stopped
+    concurrently and waited for together, then the same for starting them.
+
+    :param managers: A list of NovaServiceManager or VirtQEMUdManager
+                     sharing the same services client.
+    """
+    if not managers:
+        return
+    _set_nova_services_state(managers, started=False)
+    _set_nova_services_state(managers, started=True)
+
+
 class NUMAClient(SSHClient):
     """A client to get host NUMA information. `numactl` needs to be installed
     in the environment or container(s).
@@ -335,6 +874,9 @@ class NUMAClient(SSHClient):
         return sum([len(cpus) for cpus in nodes.values()])
 
     def get_pagesize(self):
+        agent = self.get_host_agent()
+        if agent:
+            return agent.call('meminfo')['Hugepagesize']
         proc_meminfo = self.execute('cat /proc/meminfo')
         for line in StringIO(proc_meminfo).readlines():
             if line.startswith('Hugepagesize'):
@@ -348,10 +890,19 @@ class NUMAClient(SSHClient):
          1: {'total': 2000, 'free': 0}}
         """
         pages = {}
-        for node in self.get_host_topology():
-            meminfo = self.execute(
-                'cat /sys/devices/system/node/node%d/meminfo' % node)
-            for line in StringIO(meminfo).readlines():
+        nodes = list(self.get_host_topology())
+        agent = self.get_host_agent()
+        if agent:
+            for node in nodes:
+                meminfo = agent.call('meminfo', node=node)
+                pages[node] = {'total': meminfo['HugePages_Total'],
+                               'free': meminfo['HugePages_Free']}
+            return pages
+        results = self.execute_many(
+            ['cat /sys/devices/system/node/node%d/meminfo' % node
+             for node in nodes])
+        for node, result in zip(nodes, results):
+            for line in StringIO(result.check()).readlines():
                 if 'HugePages_Total' in line:
                     total = int(line.split(':')[1].lstrip())
                 if 'HugePages_Free' in line:
@@ -370,6 +921,17 @@ class SysFSClient(SSHClient):
         :returns: A dict of path:value
         """
         paths = set('/sys/%s' % p for p in paths)
+        agent = self.get_host_agent()
+        if agent:
+            results = {}
+            for path, value in agent.call('read_files',
+                                          paths=sorted(paths)).items():
+                if '\n' in value.strip():
+                    raise Exception('Extra or multi-line value found in %s' %
+                                    path)
+                results[path[5:]] = value.strip()
+            LOG.debug('sysfs results: %s', results)
+            return results
         result = self.execute('grep -H "" %s' % ' '.join(paths))
         results = {}
         for line in result.strip().split('\n'):
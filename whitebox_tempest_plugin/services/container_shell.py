@@ -0,0 +1,137 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import socket
+import threading
+import uuid
+
+from oslo_log import log as logging
+from tempest import config
+from tempest.lib import exceptions as tempest_libexc
+
+from whitebox_tempest_plugin import exceptions
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+_shells = {}
+_shells_lock = threading.Lock()
+
+
+class ContainerShell(object):
+    """A long-lived `sh` running inside a container, started with a single
+    `<runtime> exec` and fed commands over its stdin. This avoids paying the
+    container runtime's startup cost for every command.
+
+    Each command runs in a subshell with stdin closed, followed by a marker
+    line written to both stdout and stderr so that the outputs of successive
+    commands can be told apart. Commands are run one at a time. The
+    transport drains stderr while stdout is read, so a command writing a
+    lot to stderr cannot stall the shell.
+    """
+
+    def __init__(self, transport, container_name):
+        self.transport = transport
+        self.container_name = container_name
+        self._lock = threading.Lock()
+        self._process = None
+
+    def _start(self):
+        command = 'sudo %s exec -i -u root %s sh' % (
+            CONF.whitebox.container_runtime, self.container_name)
+        LOG.debug('Starting persistent shell on %s: %s',
+                  self.transport.host, command)
+        self._process = self.transport.spawn(command)
+
+    def close(self):
+        if self._process is not None:
+            self._process.close()
+            self._process = None
+
+    def _read_until(self, stream, marker):
+        """Reads lines from stream until the marker line, and returns the
+        data that preceded it along with whatever followed the marker on its
+        line.
+        """
+        lines = []
+        while True:
+            line = stream.readline()
+            if not line:
+                raise exceptions.ContainerShellException(
+                    container=self.container_name, host=self.transport.host)
+            line = line.decode('utf-8')
+            if line.startswith(marker):
+                # NOTE(artom) The marker is always preceded by a newline we
+                # wrote ourselves, drop it.
+                return ''.join(lines)[:-1], line[len(marker):].strip()
+            lines.append(line)
+
+    def execute(self, command):
+        marker = 'whitebox-%s' % uuid.uuid4().hex
+        script = ('(%s\n) </dev/null\nprintf "\\n%s %%d\\n" $?\n'
+                  'printf "\\n%s\\n" >&2\n' % (command, marker, marker))
+        with self._lock:
+            if self._process is None or not self._process.is_running():
+                self.close()
+                self._start()
+            try:
+                self._process.stdin.write(script.encode('utf-8'))
+                self._process.stdin.flush()
+                out_data, exit_status = self._read_until(
+                    self._process.stdout, marker)
+                err_data, _ = self._read_until(self._process.stderr, marker)
+            except socket.timeout:
+                # NOTE(artom) We have no idea what state the shell is in now,
+                # start a new one for the next command.
+                self.close()
+                raise tempest_libexc.TimeoutException(
+                    "Command: '{0}' executed in container '{1}' on host "
+                    "'{2}'.".format(command, self.container_name,
+                                    self.transport.host))
+            except OSError:
+                self.close()
+                raise exceptions.ContainerShellException(
+                    container=self.container_name, host=self.transport.host)
+            except exceptions.ContainerShellException:
+                self.close()
+                raise
+        if exit_status != '0':
+            raise tempest_libexc.SSHExecCommandFailed(
+                command=command, exit_status=int(exit_status),
+                stderr=err_data, stdout=out_data)
+        return out_data
+
+
+def get_shell(transport, container_name):
+    """Returns the process-wide ContainerShell for container_name on the host
+    transport runs commands on, creating it on first use.
+    """
+    key = (transport.host, transport.username, transport.key_filename,
+           container_name)
+    with _shells_lock:
+        if key not in _shells:
+            _shells[key] = ContainerShell(transport, container_name)
+        return _shells[key]
+
+
+def close_all():
+    with _shells_lock:
+        for shell in _shells.values():
+            shell.close()
+        _shells.clear()
+
+
+atexit.register(close_all)
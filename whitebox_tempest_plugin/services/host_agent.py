@@ -0,0 +1,141 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import base64
+import json
+import os
+import socket
+import threading
+
+from oslo_log import log as logging
+from tempest import config
+from tempest.lib import exceptions as tempest_libexc
+
+from whitebox_tempest_plugin import exceptions
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+_agents = {}
+_agents_lock = threading.Lock()
+
+
+def _bootstrap_command():
+    """Returns the command that starts the agent on a host. The agent's
+    source is shipped inline, base64 encoded, so nothing needs to be
+    installed on the host beforehand.
+    """
+    path = os.path.join(os.path.dirname(__file__), 'remote_agent.py')
+    with open(path, 'rb') as f:
+        source = base64.b64encode(f.read()).decode('ascii')
+    return ("sudo %s -u -c 'import base64; exec(base64.b64decode(\"%s\"))'" %
+            (CONF.whitebox.host_agent_python, source))
+
+
+class HostAgent(object):
+    """Client for the whitebox host agent (see services.remote_agent), a
+    small Python process started on a host on first use and kept running for
+    the rest of the run. Requests and responses are exchanged as JSON lines
+    over the process' stdin and stdout, one request at a time.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+        self._lock = threading.Lock()
+        self._process = None
+        self._request_id = 0
+
+    def _start(self):
+        LOG.debug('Starting whitebox host agent on %s', self.transport.host)
+        self._process = self.transport.spawn(_bootstrap_command())
+
+    def close(self):
+        if self._process is not None:
+            self._process.close()
+            self._process = None
+
+    def _died(self):
+        try:
+            stderr = self._process.stderr.read()
+        except socket.timeout:
+            stderr = b''
+        self.close()
+        return exceptions.HostAgentException(
+            host=self.transport.host,
+            error=stderr.decode('utf-8', 'replace') or 'agent exited')
+
+    def call(self, op, **args):
+        """Sends a request to the agent and returns its result.
+
+        :param op: The name of the operation, one of remote_agent.OPS.
+        :param args: The operation's keyword arguments.
+        :raises SSHExecCommandFailed: if the operation ran a command that
+                                      exited with a non-zero status, or
+                                      could not read a file.
+        :raises HostAgentException: for any other failure.
+        """
+        with self._lock:
+            if self._process is None or not self._process.is_running():
+                self.close()
+                self._start()
+            self._request_id += 1
+            request = {'id': self._request_id, 'op': op, 'args': args}
+            LOG.debug('agent request on %s: %s', self.transport.host,
+                      request)
+            try:
+                self._process.stdin.write(
+                    json.dumps(request).encode('utf-8') + b'\n')
+                self._process.stdin.flush()
+                line = self._process.stdout.readline()
+            except (socket.timeout, OSError, EOFError) as e:
+                self.close()
+                raise exceptions.HostAgentException(
+                    host=self.transport.host, error=e)
+            if not line:
+                raise self._died()
+        response = json.loads(line.decode('utf-8'))
+        LOG.debug('agent response on %s: %s', self.transport.host,
+                  response)
+        error = response.get('error')
+        if error is None:
+            return response['result']
+        if error.get('exit_status') is not None:
+            raise tempest_libexc.SSHExecCommandFailed(
+                command=error['command'], exit_status=error['exit_status'],
+                stderr=error['stderr'], stdout=error['stdout'])
+        raise exceptions.HostAgentException(host=self.transport.host,
+                                            error=error['message'])
+
+
+def get_agent(transport):
+    """Returns the process-wide HostAgent for the host transport runs
+    commands on, creating it on first use.
+    """
+    key = (transport.host, transport.username, transport.key_filename)
+    with _agents_lock:
+        if key not in _agents:
+            _agents[key] = HostAgent(transport)
+        return _agents[key]
+
+
+def close_all():
+    with _agents_lock:
+        for agent in _agents.values():
+            agent.close()
+        _agents.clear()
+
+
+atexit.register(close_all)
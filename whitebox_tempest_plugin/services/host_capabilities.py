@@ -0,0 +1,167 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cache of the compute hosts' libvirt capabilities. A host's topology does
+not change during a run, so `virsh capabilities` only needs to run once per
+host. The result is kept for the life of the process and, if
+[whitebox]/host_capabilities_cache_dir is set, written there for the other
+test worker processes to reuse.
+
+The capabilities also report the number of pages of each size in each NUMA
+cell, which does change, when hugepages are allocated at runtime. Those are
+left out of the cached views, see NUMAClient.get_hugepages() instead.
+"""
+
+import collections
+import functools
+import os
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+
+from oslo_log import log as logging
+from tempest import config
+
+from whitebox_tempest_plugin import hardware
+from whitebox_tempest_plugin.services import clients
+from whitebox_tempest_plugin import utils as whitebox_utils
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+_capabilities = {}
+_host_locks = {}
+_host_locks_lock = threading.Lock()
+
+CPU = collections.namedtuple('CPU', ['id', 'socket_id', 'core_id',
+                                     'siblings'])
+
+_Topology = collections.namedtuple(
+    '_Topology', ['cpus', 'cells', 'page_sizes', 'distances'])
+
+
+class HostCapabilities(object):
+    """A host's libvirt capabilities, parsed once. Like domain.Domain, each
+    view is computed on first access and memoized, and must not be
+    modified.
+
+    Capabilities of large hosts are big, and the topology views only need
+    a fraction of them. They are extracted in a single incremental pass
+    that never builds the whole tree; `root` is only parsed if accessed.
+    """
+
+    def __init__(self, xml):
+        self.xml = xml
+
+    @functools.cached_property
+    def root(self):
+        return ET.fromstring(self.xml)
+
+    @functools.cached_property
+    def _topology(self):
+        topology = _Topology(cpus={}, cells={}, page_sizes=[], distances={})
+        for path, elem in whitebox_utils.iterparse_paths(
+                self.xml, 'host/cpu/pages', 'host/topology/cells/cell'):
+            if path == 'host/cpu/pages':
+                topology.page_sizes.append(int(elem.get('size')))
+                continue
+            cell_id = int(elem.get('id'))
+            topology.cells[cell_id] = set()
+            for cpu in elem.findall('./cpus/cpu'):
+                cpu_id = int(cpu.get('id'))
+                topology.cells[cell_id].add(cpu_id)
+                topology.cpus[cpu_id] = CPU(
+                    id=cpu_id, socket_id=int(cpu.get('socket_id')),
+                    core_id=int(cpu.get('core_id')),
+                    siblings=hardware.parse_cpu_spec(cpu.get('siblings')))
+            topology.distances[cell_id] = {
+                int(sibling.get('id')): int(sibling.get('value'))
+                for sibling in elem.findall('./distances/sibling')}
+        topology.page_sizes.sort()
+        return topology
+
+    @property
+    def cpus(self):
+        """A dict of host CPU number -> CPU."""
+        return self._topology.cpus
+
+    @property
+    def cells(self):
+        """A dict of NUMA cell number -> set(CPU numbers in that cell)."""
+        return self._topology.cells
+
+    @functools.cached_property
+    def siblings(self):
+        """A dict of host CPU number -> set(its thread siblings, including
+        itself).
+        """
+        return {cpu_id: cpu.siblings for cpu_id, cpu in self.cpus.items()}
+
+    @property
+    def page_sizes(self):
+        """The sorted list of page sizes the host supports, in KiB."""
+        return self._topology.page_sizes
+
+    @property
+    def distances(self):
+        """A dict of NUMA cell number -> {NUMA cell number: distance}."""
+        return self._topology.distances
+
+
+def _cache_path(host):
+    return os.path.join(CONF.whitebox.host_capabilities_cache_dir,
+                        'capabilities-%s.xml' % host)
+
+
+def _load(host):
+    try:
+        with open(_cache_path(host)) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _save(host, xml):
+    cache_dir = CONF.whitebox.host_capabilities_cache_dir
+    os.makedirs(cache_dir, exist_ok=True)
+    # NOTE(artom) Other workers may be reading the file, write it under a
+    # temporary name and atomically rename it into place.
+    fd, path = tempfile.mkstemp(dir=cache_dir)
+    with os.fdopen(fd, 'w') as f:
+        f.write(xml)
+    os.replace(path, _cache_path(host))
+
+
+def get_capabilities(host):
+    """Returns the HostCapabilities of a compute host, running
+    `virsh capabilities` on it only if no other test (or, with
+    [whitebox]/host_capabilities_cache_dir, worker) has yet.
+    """
+    # NOTE(artom) Fetching the capabilities is a remote call, only hold up
+    # the tests that want the same host's.
+    with _host_locks_lock:
+        lock = _host_locks.setdefault(host, threading.Lock())
+    with lock:
+        if host not in _capabilities:
+            persist = bool(CONF.whitebox.host_capabilities_cache_dir)
+            xml = _load(host) if persist else None
+            if xml is None:
+                xml = clients.VirshXMLClient(host).capabilities()
+                if persist:
+                    _save(host, xml)
+            else:
+                LOG.debug('Using cached capabilities for %s', host)
+            _capabilities[host] = HostCapabilities(xml)
+        return _capabilities[host]
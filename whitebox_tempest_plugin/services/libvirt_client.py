@@ -0,0 +1,175 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import threading
+import uuid
+import xml.etree.ElementTree as ET
+
+from oslo_log import log as logging
+from tempest import config
+
+from whitebox_tempest_plugin import exceptions
+
+try:
+    import libvirt
+except ImportError:
+    libvirt = None
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+class LibvirtConnection(object):
+    """A connection to a host's libvirt daemon through the libvirt Python
+    bindings, opened on first use and kept for the rest of the run. Every
+    query is an RPC on the connection, rather than a new `virsh` process.
+
+    The methods' return values match the output of the equivalent virsh
+    commands, so that this can be used interchangeably with running virsh.
+    """
+
+    def __init__(self, host, uri):
+        self.host = host
+        self.uri = uri
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        with self._lock:
+            if self._conn is None or not self._conn.isAlive():
+                self.close()
+                LOG.debug('Opening libvirt connection to %s', self.uri)
+                self._conn = libvirt.open(self.uri)
+            return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except libvirt.libvirtError:
+                pass
+            self._conn = None
+
+    def _call(self, func, *args):
+        try:
+            return func(self._connection(), *args)
+        except libvirt.libvirtError as e:
+            raise exceptions.LibvirtAPIException(
+                host=self.host, error=e.get_error_message())
+
+    @staticmethod
+    def _lookup(conn, domain):
+        # NOTE(artom) Like virsh, accept either a domain name or UUID.
+        if _is_uuid(domain):
+            return conn.lookupByUUIDString(domain)
+        return conn.lookupByName(domain)
+
+    def dumpxml(self, domain):
+        return self._call(
+            lambda conn: self._lookup(conn, domain).XMLDesc(0))
+
+    def dumpxml_all(self):
+        """Returns the XML of every running domain, keyed by domain name.
+        Domains that stop between being listed and being dumped are skipped.
+        """
+        def dump(conn):
+            xmls = {}
+            for dom in conn.listAllDomains(
+                    libvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE):
+                try:
+                    xmls[dom.name()] = dom.XMLDesc(0)
+                except libvirt.libvirtError:
+                    pass
+            return xmls
+
+        return self._call(dump)
+
+    def capabilities(self):
+        return self._call(lambda conn: conn.getCapabilities())
+
+    def secret_dumpxml(self, secret_uuid):
+        return self._call(
+            lambda conn: conn.secretLookupByUUIDString(
+                secret_uuid).XMLDesc(0))
+
+    def list_domains(self, all_domains=False):
+        """Returns the names of the running domains, or of all domains if
+        all_domains is set.
+        """
+        flags = 0 if all_domains else libvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE
+        return self._call(
+            lambda conn: [dom.name() for dom in conn.listAllDomains(flags)])
+
+    def domblklist(self, domain):
+        """Returns the domain's disks in the same format as
+        `virsh domblklist`.
+        """
+        root = ET.fromstring(self.dumpxml(domain))
+        lines = [' Target   Source', '-' * 40]
+        for disk in root.findall('./devices/disk'):
+            target = disk.find('./target').get('dev')
+            source = disk.find('./source')
+            path = '-'
+            if source is not None:
+                path = (source.get('file') or source.get('dev') or
+                        source.get('name') or source.get('volume') or '-')
+            lines.append(' %-8s %s' % (target, path))
+        return '\n'.join(lines) + '\n'
+
+
+def get_uri(address, username, key_filename):
+    """Returns the libvirt URI for the host at address, from the
+    [whitebox]/libvirt_uri template.
+    """
+    return CONF.whitebox.libvirt_uri.format(
+        host=address, username=username, key_filename=key_filename)
+
+
+def get_connection(address, username, key_filename):
+    """Returns the process-wide LibvirtConnection to the host at address,
+    creating it on first use.
+    """
+    if libvirt is None:
+        raise exceptions.LibvirtAPIException(
+            host=address,
+            error='[whitebox]/libvirt_uri is set but the libvirt Python '
+                  'bindings are not installed')
+    uri = get_uri(address, username, key_filename)
+    with _connections_lock:
+        if uri not in _connections:
+            _connections[uri] = LibvirtConnection(address, uri)
+        return _connections[uri]
+
+
+def close_all():
+    with _connections_lock:
+        for connection in _connections.values():
+            connection.close()
+        _connections.clear()
+
+
+atexit.register(close_all)
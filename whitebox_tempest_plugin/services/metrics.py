@@ -0,0 +1,172 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Timing of the commands whitebox runs on hosts. When
+[whitebox]/command_metrics is set, every command run by SSHClient is
+recorded with its host, command class, connect time, execution time and
+output size. Per-test summaries are attached to each test's subunit stream,
+and a per-run report, which also includes the statistics of the waiters, is
+written to [whitebox]/command_metrics_dir when the process exits.
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import re
+import threading
+import time
+
+from oslo_log import log as logging
+from tempest import config
+
+from whitebox_tempest_plugin.common import waiters
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+# NOTE(artom) Checked in order, the first match wins.
+COMMAND_CLASSES = [
+    ('virsh', re.compile(r'\bvirsh\b')),
+    ('crudini', re.compile(r'\bcrudini\b')),
+    ('numactl', re.compile(r'\bnumactl\b')),
+    ('log query', re.compile(r'\b(journalctl|zgrep)\b')),
+    ('qemu-img', re.compile(r'\bqemu-img\b')),
+    ('sysfs', re.compile(r'/sys/')),
+    ('procfs', re.compile(r'/proc/')),
+    ('service', re.compile(r'\bsystemctl\b')),
+]
+
+
+def classify(command):
+    for name, regex in COMMAND_CLASSES:
+        if regex.search(command):
+            return name
+    return 'other'
+
+
+def _summarize(samples):
+    def totals(samples):
+        return {
+            'commands': len(samples),
+            'connect_time': sum(s['connect_time'] for s in samples),
+            'exec_time': sum(s['exec_time'] for s in samples),
+            'max_exec_time': max([s['exec_time'] for s in samples] or [0]),
+            'bytes': sum(s['bytes'] for s in samples),
+        }
+
+    def grouped(key):
+        groups = {}
+        for sample in samples:
+            groups.setdefault(sample[key], []).append(sample)
+        return {name: totals(group) for name, group in groups.items()}
+
+    summary = totals(samples)
+    summary['by_class'] = grouped('command_class')
+    summary['by_host'] = grouped('host')
+    return summary
+
+
+class MetricsCollector(object):
+    """Thread-safe store of command samples, grouped by test."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = []
+        self._test_id = None
+
+    def add(self, sample):
+        with self._lock:
+            sample['test'] = self._test_id
+            self._samples.append(sample)
+
+    def start_test(self, test_id):
+        with self._lock:
+            self._test_id = test_id
+
+    def end_test(self, test_id):
+        """Stops attributing samples to test_id and returns its summary."""
+        with self._lock:
+            self._test_id = None
+            samples = [s for s in self._samples if s['test'] == test_id]
+        return _summarize(samples)
+
+    def report(self):
+        with self._lock:
+            samples = list(self._samples)
+        tests = {}
+        for sample in samples:
+            tests.setdefault(sample['test'], []).append(sample)
+        return {'run': _summarize(samples),
+                'tests': {str(test): _summarize(test_samples)
+                          for test, test_samples in tests.items()},
+                'waiters': waiters.get_stats()}
+
+    def write_report(self):
+        if not self._samples:
+            return
+        path = os.path.join(CONF.whitebox.command_metrics_dir,
+                            'whitebox-command-metrics-%d.json' % os.getpid())
+        LOG.info('Writing whitebox command metrics to %s', path)
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=1, sort_keys=True)
+
+
+collector = MetricsCollector()
+
+
+@contextlib.contextmanager
+def measure(host, command):
+    """Records a command run on host. Yields the sample dict, in which the
+    caller should set connect_time and bytes; exec_time is derived from the
+    total time spent in the context.
+    """
+    if not CONF.whitebox.command_metrics:
+        yield {}
+        return
+    sample = {'host': host, 'command_class': classify(command),
+              'connect_time': 0.0, 'bytes': 0}
+    start = time.monotonic()
+    try:
+        yield sample
+    finally:
+        sample['exec_time'] = (time.monotonic() - start -
+                               sample['connect_time'])
+        collector.add(sample)
+
+
+def timed(func, *args, **kwargs):
+    """Calls func and returns the number of seconds it took."""
+    start = time.monotonic()
+    func(*args, **kwargs)
+    return time.monotonic() - start
+
+
+def time_connect(sample, transport):
+    """Connects transport ahead of running a command, to record how long
+    that took in sample apart from the command's own execution time. Does
+    nothing when metrics are disabled: the transport then connects as
+    needed when running the command.
+    """
+    if CONF.whitebox.command_metrics:
+        sample['connect_time'] = timed(transport.connect)
+
+
+def _write_report():
+    if CONF.whitebox.command_metrics and CONF.whitebox.command_metrics_dir:
+        collector.write_report()
+
+
+atexit.register(_write_report)
@@ -0,0 +1,277 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Listener for the notifications OpenStack services emit on the message
+bus. When [whitebox]/notification_transport_url is set, waiters subscribe
+to the notifications that signal the change they are waiting for, and only
+poll the APIs when one arrives, or every
+[whitebox]/notification_poll_interval seconds as a fallback in case one is
+missed. Until the listener has received its first notification, waiters
+keep polling as they would without it.
+"""
+
+import atexit
+import contextlib
+import fcntl
+import itertools
+import os
+import socket
+import tempfile
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from tempest import config
+
+from whitebox_tempest_plugin import exceptions
+
+try:
+    import kombu
+    import oslo_messaging
+except ImportError:
+    kombu = None
+    oslo_messaging = None
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+_listener = None
+_listener_lock = threading.Lock()
+_pool_lock_file = None
+
+
+def _pool_name():
+    """Returns the name of this process' notification pool, which is also
+    the name of its queue on the message bus.
+
+    Each process running tests needs its own queue, or it would compete
+    with the others for the notifications. Rather than a random name, that
+    would leave a new queue behind whenever a process cannot delete its
+    own, each takes the lowest numbered pool no other process on this
+    machine holds, so that the same few queues are reused across runs.
+    The pool is held with a lock file until the process exits.
+    """
+    global _pool_lock_file
+    for number in itertools.count():
+        path = os.path.join(tempfile.gettempdir(),
+                            'whitebox-notifications-%d.lock' % number)
+        lock_file = open(path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            continue
+        _pool_lock_file = lock_file
+        return 'whitebox-%s-%d' % (socket.gethostname(), number)
+
+
+def _delete_queue(transport_url, queue):
+    """Deletes a notification pool's queue from the message bus.
+
+    oslo.messaging declares the queues of notification pools as neither
+    auto-deleted nor expiring, so they would otherwise keep collecting
+    every notification the cloud emits once the tests are done. Only
+    RabbitMQ has such queues; failing to delete one is not an error.
+    """
+    url = oslo_messaging.TransportURL.parse(cfg.ConfigOpts(), transport_url)
+    if url.transport != 'rabbit':
+        return
+    for host in url.hosts:
+        try:
+            with kombu.Connection(
+                    hostname=host.hostname, port=host.port,
+                    userid=host.username, password=host.password,
+                    virtual_host=url.virtual_host or '/',
+                    transport='pyamqp') as connection:
+                connection.default_channel.queue_delete(queue)
+            return
+        except Exception as e:
+            LOG.warning('Failed to delete notification queue %s on %s: %s',
+                        queue, host.hostname, e)
+
+
+def get_payload_field(payload, field):
+    """Returns a field of a notification payload, whether it is a versioned
+    notification, whose fields are in the payload's 'nova_object.data', or a
+    legacy one.
+    """
+    if 'nova_object.data' in payload:
+        payload = payload['nova_object.data']
+    return payload.get(field)
+
+
+class Subscription(object):
+    """Notifications of a given type, optionally filtered by a predicate on
+    their payload, received since the subscription was made.
+    """
+
+    def __init__(self, event_type, match):
+        self.event_type = event_type
+        self.match = match
+        self.event = threading.Event()
+
+    def _notify(self, event_type, payload):
+        if not event_type.startswith(self.event_type):
+            return
+        if self.match and not self.match(payload):
+            return
+        self.event.set()
+
+    def wait(self, timeout):
+        """Waits up to timeout seconds for a notification, and returns
+        whether one arrived since the last wait.
+        """
+        received = self.event.wait(timeout)
+        self.event.clear()
+        return received
+
+
+class _Endpoint(object):
+
+    def __init__(self, listener):
+        self._listener = listener
+
+    def _dispatch(self, ctxt, publisher_id, event_type, payload, metadata):
+        self._listener.dispatch(event_type, payload)
+
+    info = warn = error = _dispatch
+
+
+class NotificationListener(object):
+    """Listens on the notification topics of [whitebox]/notification_topics
+    of the exchanges of [whitebox]/notification_exchanges in a background
+    thread, and hands the notifications to the matching subscriptions.
+    """
+
+    def __init__(self, transport_url, exchanges, topics):
+        self._lock = threading.Lock()
+        self._subscriptions = []
+        self._transport_url = transport_url
+        self.delivered = False
+        # NOTE(artom) oslo.messaging registers its options on the config
+        # object it is given, keep them out of tempest's.
+        conf = cfg.ConfigOpts()
+        conf([])
+        transport = oslo_messaging.get_notification_transport(
+            conf, url=transport_url)
+        # NOTE(artom) Each listener needs its own queue, otherwise it would
+        # compete with the other test workers and the services' own
+        # consumers for the notifications. The queue may have been left
+        # behind by an earlier run that was killed, delete it so as not to
+        # get its stale notifications.
+        self._pool = _pool_name()
+        _delete_queue(transport_url, self._pool)
+        # NOTE(artom) Without an exchange, the target would be on
+        # oslo.messaging's default one, that no service sends to.
+        targets = [oslo_messaging.Target(exchange=exchange, topic=topic)
+                   for exchange in exchanges for topic in topics]
+        self._server = oslo_messaging.get_notification_listener(
+            transport, targets, [_Endpoint(self)], executor='threading',
+            pool=self._pool)
+        self._server.start()
+
+    def subscribe(self, event_type, match=None):
+        """Returns a Subscription to the notifications whose type starts
+        with event_type, and whose payload match returns True for.
+        """
+        subscription = Subscription(event_type, match)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def dispatch(self, event_type, payload):
+        self.delivered = True
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription._notify(event_type, payload)
+            except Exception:
+                LOG.exception('Failed to match %s notification', event_type)
+
+    def stop(self):
+        self._server.stop()
+        self._server.wait()
+        _delete_queue(self._transport_url, self._pool)
+
+
+def get_listener():
+    """Returns the process-wide NotificationListener, starting it on first
+    use, or None if [whitebox]/notification_transport_url is not set.
+    """
+    global _listener
+    if not CONF.whitebox.notification_transport_url:
+        return None
+    if oslo_messaging is None:
+        raise exceptions.NotificationListenerException(
+            error='[whitebox]/notification_transport_url is set but '
+                  'oslo.messaging is not installed')
+    with _listener_lock:
+        if _listener is None:
+            _listener = NotificationListener(
+                CONF.whitebox.notification_transport_url,
+                CONF.whitebox.notification_exchanges,
+                CONF.whitebox.notification_topics)
+        return _listener
+
+
+def delivered():
+    """Returns whether the process-wide listener has received any
+    notification yet. Until it has, it may be listening where the services
+    do not send theirs, and waiters should not rely on it.
+    """
+    return _listener is not None and _listener.delivered
+
+
+def subscribe(event_type, match=None):
+    """Subscribes to notifications with the process-wide listener, see
+    NotificationListener.subscribe(). Returns None if notifications are not
+    enabled, in which case waiters just poll.
+    """
+    listener = get_listener()
+    if listener is None:
+        return None
+    return listener.subscribe(event_type, match)
+
+
+def unsubscribe(subscription):
+    if subscription is not None and _listener is not None:
+        _listener.unsubscribe(subscription)
+
+
+@contextlib.contextmanager
+def subscribed(event_type, match=None):
+    """Context manager version of subscribe(), that unsubscribes on exit."""
+    subscription = subscribe(event_type, match)
+    try:
+        yield subscription
+    finally:
+        unsubscribe(subscription)
+
+
+def stop():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(stop)
@@ -0,0 +1,193 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""The whitebox host agent.
+
+This module is never imported by whitebox itself. Its source is sent to
+compute hosts by services.host_agent and run there with the host's python3,
+as root. It must therefore only use the Python 3 standard library.
+
+The agent reads one JSON request per line on stdin, for example:
+
+    {"id": 1, "op": "read_files", "args": {"paths": ["/proc/meminfo"]}}
+
+and answers each with one JSON line on stdout, either
+
+    {"id": 1, "result": ...}
+
+or, if the request failed,
+
+    {"id": 1, "error": {"message": ..., "command": ..., "exit_status": ...,
+                        "stdout": ..., "stderr": ...}}
+
+where the last four keys are only set when a command exited with a non-zero
+status, or a file could not be read.
+"""
+
+import configparser
+import json
+import subprocess
+import sys
+
+
+class CommandFailed(Exception):
+
+    def __init__(self, argv, exit_status, stdout, stderr):
+        super(CommandFailed, self).__init__(
+            '%s exited with status %d' % (' '.join(argv), exit_status))
+        self.argv = argv
+        self.exit_status = exit_status
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+def _run(argv, prefix=None):
+    argv = list(prefix or []) + list(argv)
+    proc = subprocess.Popen(argv, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = proc.communicate()
+    stdout = stdout.decode('utf-8', 'replace')
+    stderr = stderr.decode('utf-8', 'replace')
+    if proc.returncode != 0:
+        raise CommandFailed(argv, proc.returncode, stdout, stderr)
+    return stdout
+
+
+def _read(path):
+    """Reads a file. A file that cannot be read fails like the `cat` it
+    replaces would, so callers get the same error from the agent as from
+    reading the file over SSH.
+    """
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError as e:
+        raise CommandFailed(['cat', path], 1, '',
+                            'cat: %s: %s\n' % (path, e.strerror))
+
+
+def read_files(paths):
+    return {path: _read(path) for path in paths}
+
+
+def read_ini(path, options):
+    """Returns the values of (section, option) pairs in an INI file, with
+    None for those that are not set. Unlike configparser's defaults, DEFAULT
+    is treated as an ordinary section, and a file that cannot be read is an
+    error rather than an empty file, like crudini does.
+    """
+    parser = configparser.RawConfigParser(
+        strict=False, default_section='whitebox-agent-no-default-section')
+    parser.optionxform = str
+    with open(path) as f:
+        parser.read_file(f)
+    values = []
+    for section, option in options:
+        if parser.has_section(section) and parser.has_option(section,
+                                                             option):
+            values.append(parser.get(section, option).strip())
+        else:
+            values.append(None)
+    return values
+
+
+def meminfo(node=None):
+    """Parses /proc/meminfo, or a NUMA node's meminfo if node is set, into a
+    dict of integers keyed by field name.
+    """
+    if node is None:
+        path = '/proc/meminfo'
+    else:
+        path = '/sys/devices/system/node/node%d/meminfo' % node
+    result = {}
+    for line in _read(path).splitlines():
+        key, value = line.split(':', 1)
+        # NUMA node meminfo lines are prefixed with "Node <N> "
+        result[key.split()[-1]] = int(value.split()[0])
+    return result
+
+
+def list_domains(prefix=None, all_domains=False):
+    argv = ['virsh', 'list', '--name']
+    if all_domains:
+        argv.append('--all')
+    return [name for name in _run(argv, prefix).splitlines() if name]
+
+
+def dumpxml(domain, prefix=None):
+    return _run(['virsh', 'dumpxml', domain], prefix)
+
+
+def dumpxml_all(prefix=None):
+    """Returns the XML of every running domain, keyed by domain name.
+    Domains that stop between being listed and being dumped are skipped.
+    """
+    xmls = {}
+    for domain in list_domains(prefix):
+        try:
+            xmls[domain] = dumpxml(domain, prefix)
+        except CommandFailed:
+            pass
+    return xmls
+
+
+def capabilities(prefix=None):
+    return _run(['virsh', 'capabilities'], prefix)
+
+
+def qemu_img_info(path, prefix=None):
+    return json.loads(_run(['qemu-img', 'info', '--output=json',
+                            '--force-share', path], prefix))
+
+
+OPS = {
+    'read_files': read_files,
+    'read_ini': read_ini,
+    'meminfo': meminfo,
+    'list_domains': list_domains,
+    'dumpxml': dumpxml,
+    'dumpxml_all': dumpxml_all,
+    'capabilities': capabilities,
+    'qemu_img_info': qemu_img_info,
+}
+
+
+def handle(request):
+    response = {'id': request.get('id')}
+    try:
+        op = OPS[request['op']]
+        response['result'] = op(**request.get('args', {}))
+    except CommandFailed as e:
+        response['error'] = {'message': str(e),
+                             'command': ' '.join(e.argv),
+                             'exit_status': e.exit_status,
+                             'stdout': e.stdout,
+                             'stderr': e.stderr}
+    except Exception as e:
+        response['error'] = {'message': '%s: %s' % (type(e).__name__, e)}
+    return response
+
+
+def main():
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        sys.stdout.write(json.dumps(handle(json.loads(line))) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
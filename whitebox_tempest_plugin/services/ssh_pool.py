@@ -0,0 +1,233 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import select
+import socket
+import threading
+import time
+
+from oslo_log import log as logging
+import paramiko
+from tempest import config
+from tempest.lib.common import ssh
+from tempest.lib import exceptions as tempest_libexc
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PooledSSHClient(ssh.Client):
+    """A tempest SSH client that keeps its authenticated connection open
+    between commands instead of connecting for every exec_command() call.
+
+    Commands run on their own channel of the shared transport, so a single
+    client can safely be used by several threads at once.
+    """
+
+    def __init__(self, host, username, key_filename):
+        super(PooledSSHClient, self).__init__(host, username,
+                                              key_filename=key_filename)
+        # NOTE(artom) tempest reads in 1KiB chunks, which makes large outputs
+        # like `virsh capabilities` needlessly slow to transfer.
+        self.buf_size = 65536
+        self._connection = None
+        self._connection_lock = threading.Lock()
+        self._usage_lock = threading.Lock()
+        self._in_use = 0
+        self.last_used = time.monotonic()
+
+    def is_alive(self):
+        if self._connection is None:
+            return False
+        transport = self._connection.get_transport()
+        return transport is not None and transport.is_active()
+
+    def connect(self):
+        """Returns the pooled paramiko connection, (re)connecting if there is
+        none or the existing one is no longer active.
+        """
+        with self._connection_lock:
+            if not self.is_alive():
+                if self._connection is not None:
+                    LOG.debug('SSH connection to %s@%s is no longer active, '
+                              'reconnecting', self.username, self.host)
+                    self._connection.close()
+                self._connection = self._get_ssh_connection()
+                self._connection.get_transport().set_keepalive(
+                    CONF.whitebox.ssh_pool_keepalive_interval)
+            return self._connection
+
+    def close(self):
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def idle_time(self):
+        """Returns the number of seconds since the client was last used, or 0
+        if it is currently running a command.
+        """
+        if self._in_use:
+            return 0
+        return time.monotonic() - self.last_used
+
+    def close_if_idle(self, idle_timeout):
+        """Closes the connection if the client has been idle for longer than
+        idle_timeout seconds. The check and the close are done together, so
+        that a command starting in the meantime cannot have its connection
+        closed under it.
+
+        :return: True if the connection was closed.
+        """
+        with self._usage_lock:
+            if not self.is_alive() or self.idle_time() <= idle_timeout:
+                return False
+            self.close()
+            return True
+
+    def acquire(self):
+        """Marks the client as in use, so that its connection is not closed
+        for being idle until the matching release().
+        """
+        with self._usage_lock:
+            self._in_use += 1
+
+    def release(self):
+        with self._usage_lock:
+            self._in_use -= 1
+            self.last_used = time.monotonic()
+
+    def open_channel(self):
+        """Opens a new session channel on the pooled connection. If the
+        connection turns out to be stale, reconnect once and try again. No
+        command has been sent at that point, so retrying is always safe.
+        """
+        try:
+            return self.connect().get_transport().open_session()
+        except (EOFError, socket.error, paramiko.SSHException) as e:
+            LOG.warning('Failed to open a channel to %s@%s (%s), '
+                        'reconnecting', self.username, self.host, e)
+            self.close()
+            return self.connect().get_transport().open_session()
+
+    def exec_command(self, cmd, encoding='utf-8'):
+        """Execute the specified command on the server. Same contract as
+        tempest.lib.common.ssh.Client.exec_command(), except the connection
+        is left open for the next command.
+        """
+        exit_status, out_data, err_data = self.run_command(cmd, encoding)
+        if 0 != exit_status:
+            raise tempest_libexc.SSHExecCommandFailed(
+                command=cmd, exit_status=exit_status,
+                stderr=err_data, stdout=out_data)
+        return out_data
+
+    def run_command(self, cmd, encoding='utf-8'):
+        """Execute the specified command on the server.
+
+        :return: A (exit_status, stdout, stderr) tuple. Unlike
+                 exec_command(), a non-zero exit status is not an error.
+        """
+        self.acquire()
+        try:
+            return self._run_command(cmd, encoding)
+        finally:
+            self.release()
+
+    def _run_command(self, cmd, encoding):
+        with self.open_channel() as channel:
+            channel.exec_command(cmd)
+            channel.shutdown_write()
+            out_data_chunks = []
+            err_data_chunks = []
+            start_time = time.time()
+            while True:
+                ready, _, _ = select.select([channel], [], [],
+                                            self.channel_timeout)
+                if not ready:
+                    if not self._is_timed_out(start_time):
+                        continue
+                    raise tempest_libexc.TimeoutException(
+                        "Command: '{0}' executed on host '{1}'.".format(
+                            cmd, self.host))
+                out_chunk = err_chunk = None
+                if channel.recv_ready():
+                    out_chunk = channel.recv(self.buf_size)
+                    out_data_chunks.append(out_chunk)
+                if channel.recv_stderr_ready():
+                    err_chunk = channel.recv_stderr(self.buf_size)
+                    err_data_chunks.append(err_chunk)
+                if not err_chunk and not out_chunk:
+                    break
+            out_data = b''.join(out_data_chunks)
+            err_data = b''.join(err_data_chunks)
+            if encoding:
+                out_data = out_data.decode(encoding)
+                err_data = err_data.decode(encoding)
+            exit_status = channel.recv_exit_status()
+        return exit_status, out_data, err_data
+
+
+class SSHConnectionPool(object):
+    """A thread-safe pool of PooledSSHClients, keyed by (address, username,
+    key file). Clients idle for longer than idle_timeout seconds have their
+    connection closed; they transparently reconnect on next use.
+    """
+
+    def __init__(self, idle_timeout):
+        self.idle_timeout = idle_timeout
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, address, username, key_filename):
+        key = (address, username, key_filename)
+        with self._lock:
+            self._evict_idle()
+            client = self._clients.get(key)
+            if client is None:
+                client = PooledSSHClient(address, username, key_filename)
+                self._clients[key] = client
+            return client
+
+    def _evict_idle(self):
+        for (address, username, _), client in self._clients.items():
+            if client.close_if_idle(self.idle_timeout):
+                LOG.debug('Closed idle SSH connection to %s@%s',
+                          username, address)
+
+    def close_all(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+def get_pool():
+    """Returns the process-wide SSHConnectionPool, creating it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SSHConnectionPool(CONF.whitebox.ssh_pool_idle_timeout)
+            atexit.register(_pool.close_all)
+    return _pool
+
+
+def get_client(address, username, key_filename):
+    return get_pool().get(address, username, key_filename)
@@ -0,0 +1,553 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Transports run commands on behalf of SSHClient. A transport exposes three
+operations:
+
+- run(cmd), which runs a command and returns its (exit_status, stdout,
+  stderr).
+- exec_command(cmd), with the same contract as
+  tempest.lib.common.ssh.Client.exec_command(): it returns the command's
+  stdout, or raises SSHExecCommandFailed if it exited with a non-zero status.
+- spawn(cmd), which starts a long-running command and returns a process
+  object with binary stdin, stdout and stderr streams, and a wait() method
+  that returns the exit status. Reads from stdout and stderr raise
+  socket.timeout if nothing arrives within the transport's timeout.
+"""
+
+import atexit
+import fcntl
+import functools
+import getpass
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+
+from oslo_log import log as logging
+from tempest import config
+from tempest.lib import exceptions as tempest_libexc
+
+from whitebox_tempest_plugin import exceptions
+from whitebox_tempest_plugin.services import ssh_pool
+
+CONF = config.CONF
+LOG = logging.getLogger(__name__)
+
+# NOTE(artom) Same as tempest.lib.common.ssh.Client's default.
+DEFAULT_TIMEOUT = 300
+
+_transports = {}
+_transports_lock = threading.Lock()
+_local_addresses = {}
+_cassette = None
+
+
+class Transport(object):
+    """Base class for transports."""
+
+    def __init__(self, host, username, key_filename):
+        self.host = host
+        self.username = username
+        self.key_filename = key_filename
+        self.timeout = DEFAULT_TIMEOUT
+
+    def connect(self):
+        """Makes sure the transport is ready to run commands. Only needed to
+        time connecting separately from running commands, run() and spawn()
+        connect as needed.
+        """
+        pass
+
+    def run(self, cmd, encoding='utf-8'):
+        raise NotImplementedError()
+
+    def exec_command(self, cmd, encoding='utf-8'):
+        exit_status, out_data, err_data = self.run(cmd, encoding)
+        if exit_status != 0:
+            raise tempest_libexc.SSHExecCommandFailed(
+                command=cmd, exit_status=exit_status,
+                stderr=err_data, stdout=out_data)
+        return out_data
+
+    def spawn(self, cmd):
+        raise NotImplementedError()
+
+
+class SSHProcess(object):
+    """A command started on a paramiko channel of a pooled client. The
+    client is in use until the process is closed.
+    """
+
+    def __init__(self, channel, timeout, client):
+        self._channel = channel
+        self._client = client
+        # NOTE(artom) stdout and stderr share the channel's window, so both
+        # must be drained at once: a command writing a lot to the one that
+        # is not being read would otherwise stall the other.
+        self._channel.settimeout(timeout)
+        self.stdin = channel.makefile_stdin('wb')
+        self.stdout = _PipeReader(channel.recv, timeout)
+        self.stderr = _PipeReader(channel.recv_stderr, timeout)
+
+    def is_running(self):
+        return not (self._channel.closed or
+                    self._channel.exit_status_ready())
+
+    def wait(self):
+        return self._channel.recv_exit_status()
+
+    def close(self):
+        self._channel.close()
+        if self._client is not None:
+            self._client.release()
+            self._client = None
+
+
+class SSHTransport(Transport):
+    """Runs commands over SSH, using pooled connections if
+    [whitebox]/ssh_connection_pooling is set. spawn() always uses a pooled
+    connection, as the process outlives the call anyway.
+    """
+
+    def _pooled_client(self):
+        return ssh_pool.get_client(self.host, self.username,
+                                   self.key_filename)
+
+    def connect(self):
+        if CONF.whitebox.ssh_connection_pooling:
+            self._pooled_client().connect()
+
+    def run(self, cmd, encoding='utf-8'):
+        if CONF.whitebox.ssh_connection_pooling:
+            return self._pooled_client().run_command(cmd, encoding)
+        client = ssh_pool.PooledSSHClient(self.host, self.username,
+                                          self.key_filename)
+        try:
+            return client.run_command(cmd, encoding)
+        finally:
+            client.close()
+
+    def spawn(self, cmd):
+        client = self._pooled_client()
+        # NOTE(artom) Long-lived processes like log tails can go for minutes
+        # without any other command being run on the host, don't let the
+        # pool close their connection from under them as idle.
+        client.acquire()
+        try:
+            channel = client.open_channel()
+            channel.exec_command(cmd)
+        except Exception:
+            client.release()
+            raise
+        return SSHProcess(channel, self.timeout, client)
+
+
+class _PipeReader(object):
+    """Drains a pipe from a background thread, so that the process writing
+    to it never blocks on a full pipe, and so that reads can time out.
+
+    :param read: A function taking a maximum size, and returning the bytes
+                 available, or b'' at EOF. It may raise socket.timeout if
+                 none are available yet.
+    :param close: An optional function closing the pipe, called once it
+                  reaches EOF. The pipe must not be closed any earlier, as
+                  another file could then reuse its descriptor and have its
+                  data read here.
+    """
+
+    def __init__(self, read, timeout, close=None):
+        self._read = read
+        self._timeout = timeout
+        self._close = close
+        self._buffer = bytearray()
+        self._eof = False
+        self._cond = threading.Condition()
+        thread = threading.Thread(target=self._drain)
+        thread.daemon = True
+        thread.start()
+
+    def _drain(self):
+        try:
+            while True:
+                try:
+                    chunk = self._read(65536)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    break
+                with self._cond:
+                    self._buffer += chunk
+                    self._cond.notify_all()
+        except (OSError, ValueError):
+            pass
+        finally:
+            if self._close:
+                self._close()
+            with self._cond:
+                self._eof = True
+                self._cond.notify_all()
+
+    def _take(self, predicate, size):
+        with self._cond:
+            if not self._cond.wait_for(lambda: predicate() or self._eof,
+                                       self._timeout):
+                raise socket.timeout('timed out')
+            data = bytes(self._buffer[:size()])
+            del self._buffer[:len(data)]
+            return data
+
+    def readline(self):
+        return self._take(
+            lambda: b'\n' in self._buffer,
+            lambda: self._buffer.find(b'\n') + 1 or len(self._buffer))
+
+    def read(self):
+        return self._take(lambda: False, lambda: len(self._buffer))
+
+
+class LocalProcess(object):
+    """A command started with subprocess on the local machine."""
+
+    def __init__(self, argv, timeout):
+        self._popen = subprocess.Popen(argv,
+                                       stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+        self.stdin = self._popen.stdin
+        self.stdout = _PipeReader(
+            functools.partial(os.read, self._popen.stdout.fileno()), timeout,
+            self._popen.stdout.close)
+        self.stderr = _PipeReader(
+            functools.partial(os.read, self._popen.stderr.fileno()), timeout,
+            self._popen.stderr.close)
+
+    def is_running(self):
+        return self._popen.poll() is None
+
+    def wait(self):
+        return self._popen.wait()
+
+    def close(self):
+        if self.is_running():
+            self._popen.kill()
+        self._popen.wait()
+        try:
+            self._popen.stdin.close()
+        except OSError:
+            # NOTE(artom) Closing stdin flushes it, which fails if the
+            # process exited with unread input.
+            pass
+        # NOTE(artom) stdout and stderr are closed by their readers once
+        # they have drained them.
+
+
+class LocalTransport(Transport):
+    """Runs commands on the local machine with subprocess. Used when the
+    host to run commands on is the machine running the tests, as in
+    all-in-one deployments, to avoid SSHing to ourselves.
+    """
+
+    def _argv(self, cmd):
+        """Returns the argv of the local process that runs cmd."""
+        return ['sh', '-c', cmd]
+
+    def run(self, cmd, encoding='utf-8'):
+        try:
+            proc = subprocess.run(self._argv(cmd), stdin=subprocess.DEVNULL,
+                                  stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE,
+                                  timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            raise tempest_libexc.TimeoutException(
+                "Command: '{0}' executed on host '{1}'.".format(
+                    cmd, self.host))
+        out_data, err_data = proc.stdout, proc.stderr
+        if encoding:
+            out_data = out_data.decode(encoding)
+            err_data = err_data.decode(encoding)
+        return proc.returncode, out_data, err_data
+
+    def spawn(self, cmd):
+        return LocalProcess(self._argv(cmd), self.timeout)
+
+
+class OpenSSHTransport(LocalTransport):
+    """Runs commands with the system's ssh binary. The first command run on
+    a host starts a master connection (ControlMaster) that subsequent ssh
+    invocations multiplex their sessions over, and that stays open for
+    [whitebox]/openssh_control_persist seconds once idle. As the master is
+    found through its control socket, it is shared by all the test worker
+    processes, not only the one that started it.
+    """
+
+    def __init__(self, host, username, key_filename):
+        super(OpenSSHTransport, self).__init__(host, username, key_filename)
+        self._master_checked = False
+
+    def _control_dir(self):
+        control_dir = CONF.whitebox.openssh_control_dir
+        if not control_dir:
+            control_dir = os.path.join(tempfile.gettempdir(),
+                                       'whitebox-ssh-%s' % getpass.getuser())
+        os.makedirs(control_dir, mode=0o700, exist_ok=True)
+        return control_dir
+
+    def _ssh_argv(self):
+        # NOTE(artom) Host keys are not checked, like tempest's own SSH
+        # client does with paramiko's AutoAddPolicy.
+        options = {
+            'BatchMode': 'yes',
+            'StrictHostKeyChecking': 'no',
+            'UserKnownHostsFile': '/dev/null',
+            'LogLevel': 'ERROR',
+            'ControlMaster': 'auto',
+            'ControlPersist': CONF.whitebox.openssh_control_persist,
+            # NOTE(artom) %C is a hash of the local host, remote host, port
+            # and user, so it is unique per connection and always short.
+            'ControlPath': os.path.join(self._control_dir(), '%C'),
+            'ServerAliveInterval': CONF.whitebox.ssh_pool_keepalive_interval,
+        }
+        argv = ['ssh']
+        for option, value in sorted(options.items()):
+            argv += ['-o', '%s=%s' % (option, value)]
+        if self.username:
+            argv += ['-l', self.username]
+        if self.key_filename:
+            argv += ['-i', self.key_filename]
+        return argv
+
+    def _argv(self, cmd):
+        # NOTE(artom) ssh passes the command to the remote user's shell as
+        # is, and '--' stops ssh from parsing anything after the host as its
+        # own options.
+        return self._ssh_argv() + ['--', self.host, cmd]
+
+    def run(self, cmd, encoding='utf-8'):
+        try:
+            result = super(OpenSSHTransport, self).run(cmd, encoding)
+        except tempest_libexc.TimeoutException:
+            self._master_checked = False
+            raise
+        # NOTE(artom) ssh exits with 255 when the connection failed, which
+        # may be because the master connection went away. Check it again on
+        # the next connect(). Any other status is the remote command's own.
+        if result[0] == 255:
+            self._master_checked = False
+        return result
+
+    def connect(self):
+        """Starts the master connection if it is not running. Checking that
+        it is costs an ssh process, so it is only done the first time, and
+        again after ssh failed to connect or timed out.
+        """
+        if self._master_checked:
+            return
+        check = subprocess.run(
+            self._ssh_argv() + ['-O', 'check', '--', self.host],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL)
+        if check.returncode != 0:
+            self.exec_command('true')
+        self._master_checked = True
+
+
+class Cassette(object):
+    """Recorded command outputs, stored as JSON in the following format:
+
+    {"hosts": {<host>: {<command>: [{"exit_status": <int>,
+                                     "stdout": <str>,
+                                     "stderr": <str>}, ...]}}}
+
+    Every run of a command is recorded, in order, so that commands whose
+    output changes over time (polling `virsh list`, for example) replay the
+    same way.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._recorded = {}
+        self._replay_positions = {}
+        self._hosts = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._hosts = json.load(f).get('hosts', {})
+
+    def record(self, host, cmd, exit_status, out_data, err_data):
+        with self._lock:
+            self._recorded.setdefault(host, {}).setdefault(cmd, []).append(
+                {'exit_status': exit_status, 'stdout': out_data,
+                 'stderr': err_data})
+
+    def replay(self, host, cmd):
+        """Returns the next recorded (exit_status, stdout, stderr) for cmd on
+        host. Once all recorded runs have been replayed, the last one is
+        returned again.
+        """
+        runs = self._hosts.get(host, {}).get(cmd)
+        if not runs:
+            raise exceptions.CassetteMissException(command=cmd, host=host)
+        with self._lock:
+            position = self._replay_positions.get((host, cmd), 0)
+            self._replay_positions[(host, cmd)] = position + 1
+        run = runs[min(position, len(runs) - 1)]
+        return run['exit_status'], run['stdout'], run['stderr']
+
+    def save(self):
+        """Merges what was recorded into the cassette file. The file is
+        locked while doing so, as all stestr workers record to the same
+        cassette.
+        """
+        with self._lock:
+            if not self._recorded:
+                return
+            with open(self.path, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                content = f.read()
+                hosts = json.loads(content)['hosts'] if content else {}
+                for host, commands in self._recorded.items():
+                    for cmd, runs in commands.items():
+                        hosts.setdefault(host, {}).setdefault(
+                            cmd, []).extend(runs)
+                f.seek(0)
+                f.truncate()
+                json.dump({'hosts': hosts}, f, indent=1, sort_keys=True)
+            self._recorded = {}
+
+
+class RecordingTransport(Transport):
+    """Runs commands with another transport, recording their outputs in a
+    Cassette. Processes started with spawn() are not recorded.
+    """
+
+    def __init__(self, transport, cassette):
+        super(RecordingTransport, self).__init__(
+            transport.host, transport.username, transport.key_filename)
+        self.transport = transport
+        self.cassette = cassette
+
+    def connect(self):
+        self.transport.connect()
+
+    def run(self, cmd, encoding='utf-8'):
+        exit_status, out_data, err_data = self.transport.run(cmd, encoding)
+        self.cassette.record(self.host, cmd, exit_status,
+                             _to_text(out_data), _to_text(err_data))
+        return exit_status, out_data, err_data
+
+    def spawn(self, cmd):
+        return self.transport.spawn(cmd)
+
+
+class ReplayTransport(Transport):
+    """Serves command outputs from a Cassette instead of running them, to
+    exercise and profile whitebox's parsing code without a cloud. Processes
+    cannot be replayed, so persistent container shells and the host agent
+    must be disabled when replaying.
+    """
+
+    def __init__(self, host, username, key_filename, cassette):
+        super(ReplayTransport, self).__init__(host, username, key_filename)
+        self.cassette = cassette
+
+    def run(self, cmd, encoding='utf-8'):
+        exit_status, out_data, err_data = self.cassette.replay(self.host, cmd)
+        if not encoding:
+            out_data = out_data.encode('utf-8')
+            err_data = err_data.encode('utf-8')
+        return exit_status, out_data, err_data
+
+    def spawn(self, cmd):
+        raise exceptions.CassetteMissException(command=cmd, host=self.host)
+
+
+def _to_text(data):
+    if isinstance(data, bytes):
+        return data.decode('utf-8', 'replace')
+    return data
+
+
+def get_cassette():
+    """Returns the process-wide Cassette for
+    [whitebox]/transport_cassette_path, loading it on first use. When
+    recording, it is saved when the process exits.
+    """
+    global _cassette
+    if _cassette is None:
+        _cassette = Cassette(CONF.whitebox.transport_cassette_path)
+        if CONF.whitebox.transport_cassette_mode == 'record':
+            atexit.register(_cassette.save)
+    return _cassette
+
+
+def is_local_address(address):
+    """Returns True if address is one of the local machine's own addresses.
+    An address is local if we can bind a socket to any of the IPs it
+    resolves to.
+    """
+    if address not in _local_addresses:
+        is_local = False
+        try:
+            infos = socket.getaddrinfo(address, None)
+        except socket.gaierror:
+            infos = []
+        for family, _, _, _, sockaddr in infos:
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                try:
+                    sock.bind((sockaddr[0], 0))
+                    is_local = True
+                    break
+                except OSError:
+                    continue
+        _local_addresses[address] = is_local
+    return _local_addresses[address]
+
+
+def _use_local_transport(address, username):
+    transport = CONF.whitebox.transport
+    if transport == 'auto':
+        # NOTE(artom) Only run commands locally if we would be SSHing to
+        # ourselves as ourselves, otherwise the commands would not run with
+        # the same privileges.
+        return is_local_address(address) and username == getpass.getuser()
+    return transport == 'local'
+
+
+def get_transport(address, username, key_filename):
+    """Returns the process-wide transport for running commands on address
+    as username.
+    """
+    key = (address, username, key_filename)
+    mode = CONF.whitebox.transport_cassette_mode
+    with _transports_lock:
+        if key not in _transports:
+            if mode == 'replay':
+                transport = ReplayTransport(address, username, key_filename,
+                                            get_cassette())
+            elif _use_local_transport(address, username):
+                LOG.debug('Running commands for %s locally', address)
+                transport = LocalTransport(address, username, key_filename)
+            elif CONF.whitebox.transport == 'openssh':
+                transport = OpenSSHTransport(address, username, key_filename)
+            else:
+                transport = SSHTransport(address, username, key_filename)
+            if mode == 'record':
+                transport = RecordingTransport(transport, get_cassette())
+            _transports[key] = transport
+        return _transports[key]
@@ -0,0 +1,45 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+from tempest import config
+from tempest.tests import base
+from tempest.tests import fake_config
+
+from whitebox_tempest_plugin import plugin
+
+
+class FakePrivate(fake_config.FakePrivate):
+    """tempest's fake configuration, with whitebox's option groups."""
+
+    def _set_attrs(self):
+        super(FakePrivate, self)._set_attrs()
+        for group, _ in plugin.WhiteboxTempestPlugin().get_opt_lists():
+            setattr(self, group.replace('-', '_'), cfg.CONF[group])
+
+
+class WhiteboxPluginTestCase(base.TestCase):
+    """Base class of the unit tests. The configuration has its defaults, and
+    is reset after every test; use self.flags() to override options.
+    """
+
+    def setUp(self):
+        super(WhiteboxPluginTestCase, self).setUp()
+        self.conf_fixture = self.useFixture(fake_config.ConfigFixture())
+        plugin.WhiteboxTempestPlugin().register_opts(cfg.CONF)
+        self.patchobject(config, 'TempestConfigPrivate', FakePrivate)
+
+    def flags(self, group='whitebox', **kw):
+        self.conf_fixture.config(group=group, **kw)
@@ -0,0 +1,158 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sys
+from unittest import mock
+
+from tempest.lib import exceptions as tempest_libexc
+
+from whitebox_tempest_plugin import exceptions
+from whitebox_tempest_plugin.services import clients
+from whitebox_tempest_plugin.services import host_agent
+from whitebox_tempest_plugin.services import transports
+from whitebox_tempest_plugin.tests import base
+from whitebox_tempest_plugin import utils as whitebox_utils
+
+
+class ExecuteManyTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(ExecuteManyTestCase, self).setUp()
+        self.patchobject(whitebox_utils, 'get_host_details', return_value={})
+        self.patchobject(whitebox_utils, 'get_ctlplane_address',
+                         return_value='compute-0')
+        self.client = clients.SSHClient('compute-0')
+        self.transport = transports.LocalTransport('compute-0', None, None)
+        self.patchobject(self.client, 'get_transport',
+                         return_value=self.transport)
+
+    def test_results(self):
+        results = self.client.execute_many([
+            'echo one',
+            'echo whitebox-result 0 0; echo out; echo err >&2; exit 3',
+            'printf two'])
+        self.assertEqual(
+            [clients.CommandResult('echo one', 0, 'one\n', ''),
+             clients.CommandResult(
+                 'echo whitebox-result 0 0; echo out; echo err >&2; exit 3',
+                 3, 'whitebox-result 0 0\nout\n', 'err\n'),
+             clients.CommandResult('printf two', 0, 'two', '')],
+            results)
+        self.assertEqual('one\n', results[0].check())
+        self.assertRaises(tempest_libexc.SSHExecCommandFailed,
+                          results[1].check)
+
+    def test_missing_results(self):
+        run = self.transport.run
+
+        def truncated(cmd, encoding='utf-8'):
+            # Lose the last command's result, as if the remote shell had
+            # been killed before it was reported.
+            exit_status, out_data, err_data = run(cmd, encoding)
+            return exit_status, out_data.split('whitebox-result 1')[0], ''
+        self.patchobject(self.transport, 'run', side_effect=truncated)
+        self.assertRaises(tempest_libexc.SSHExecCommandFailed,
+                          self.client.execute_many, ['true', 'true'])
+
+
+class SysFSClientTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(SysFSClientTestCase, self).setUp()
+        self.patchobject(whitebox_utils, 'get_host_details', return_value={})
+        self.patchobject(whitebox_utils, 'get_ctlplane_address',
+                         return_value='compute-0')
+        self.client = clients.SysFSClient('compute-0')
+        self.patchobject(
+            self.client, 'get_transport',
+            return_value=transports.LocalTransport('compute-0', None, None))
+        self.flags(host_agent_python=sys.executable)
+        bootstrap = host_agent._bootstrap_command
+        self.patchobject(host_agent, '_bootstrap_command',
+                         side_effect=lambda: bootstrap().replace('sudo ', '',
+                                                                 1))
+        self.addCleanup(host_agent.close_all)
+
+    def _test_get_sysfs_values(self):
+        self.assertEqual(
+            {'kernel/mm/transparent_hugepage/enabled': mock.ANY},
+            self.client.get_sysfs_values(
+                'kernel/mm/transparent_hugepage/enabled'))
+        self.assertRaises(tempest_libexc.SSHExecCommandFailed,
+                          self.client.get_sysfs_values,
+                          'kernel/mm/transparent_hugepage/enabled',
+                          'whitebox-missing')
+
+    def test_get_sysfs_values_ssh(self):
+        self.flags(use_host_agent=False)
+        self._test_get_sysfs_values()
+
+    def test_get_sysfs_values_agent(self):
+        self.flags(use_host_agent=True)
+        self._test_get_sysfs_values()
+
+
+class LogTailerTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(LogTailerTestCase, self).setUp()
+        self.patchobject(whitebox_utils, 'get_host_details', return_value={})
+        self.patchobject(whitebox_utils, 'get_ctlplane_address',
+                         return_value='compute-0')
+        self.tailer = clients.LogTailer('compute-0')
+        self.addCleanup(self.tailer.stop)
+        self.patchobject(
+            self.tailer, 'get_transport',
+            return_value=transports.LocalTransport('compute-0', None, None))
+        self.patchobject(self.tailer, '_wrap_command',
+                         side_effect=lambda command, *args, **kwargs: command)
+
+    def _start(self, script):
+        self.patchobject(self.tailer, '_follow_command',
+                         return_value=(script, None))
+        self.tailer.start()
+
+    def test_match(self):
+        self._start('echo before; echo whitebox-log-tail; sleep 0.2; '
+                    'echo "INFO boot done"; exec sleep 60')
+        future = self.tailer.expect(r'boot \w+')
+        self.assertEqual('INFO boot done\n', self.tailer.wait(future, 5))
+        pending = self.tailer.expect('never')
+        self.tailer.stop()
+        self.assertTrue(pending.cancelled())
+
+    def test_lines_before_marker_not_matched(self):
+        self._start('echo before; echo whitebox-log-tail; exec sleep 60')
+        future = self.tailer.expect('before')
+        self.assertFalse(future.done())
+
+    def test_stream_ended_fails_pending(self):
+        self._start('echo whitebox-log-tail; sleep 0.2')
+        future = self.tailer.expect('never')
+        self.assertRaises(exceptions.LogTailException, self.tailer.wait,
+                          future, 5)
+
+    def test_stream_ended_fails_new(self):
+        self._start('echo whitebox-log-tail')
+        self.tailer._thread.join(5)
+        future = self.tailer.expect('never')
+        self.assertTrue(future.done())
+        self.assertIsInstance(future.exception(),
+                              exceptions.LogTailException)
+
+    def test_stream_ended_before_marker(self):
+        self.patchobject(self.tailer, '_follow_command',
+                         return_value=('echo journalctl: not found', None))
+        self.assertRaises(exceptions.LogTailException, self.tailer.start)
@@ -0,0 +1,130 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from whitebox_tempest_plugin.services import clients
+from whitebox_tempest_plugin.tests import base
+
+DOMAIN_XML = '<domain type="kvm"><name>%s</name></domain>'
+
+
+def _server(server_id, host, updated='2026-01-01T00:00:00Z'):
+    return {'id': server_id, 'OS-EXT-SRV-ATTR:host': host,
+            'OS-EXT-SRV-ATTR:instance_name': 'instance-%s' % server_id,
+            'updated': updated}
+
+
+class ServerDomainsTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(ServerDomainsTestCase, self).setUp()
+        # NOTE(artom) The compute test base class reads the whitebox options
+        # when it is defined, so it can only be imported once they are
+        # registered.
+        from whitebox_tempest_plugin.api.compute import base as compute_base
+        self.test = compute_base.BaseWhiteboxComputeTest.__new__(
+            compute_base.BaseWhiteboxComputeTest)
+        self.test._server_xml_cache = {}
+        self.test.os_admin = mock.Mock()
+        self.servers_client = self.test.os_admin.servers_client
+        self.servers = {}
+        self.listed = {}
+        self.servers_client.list_servers.side_effect = lambda **kwargs: {
+            'servers': list(self.listed.values())}
+        self.servers_client.show_server.side_effect = lambda server_id: {
+            'server': self.servers[server_id]}
+        # Domains running on each host, by instance name.
+        self.domains = {}
+        self.virsh = self.patchobject(clients, 'VirshXMLClient')
+        self.virsh.side_effect = self._virsh_client
+
+    def _virsh_client(self, host):
+        client = mock.Mock()
+        client.dumpxml_all.side_effect = lambda: {
+            name: DOMAIN_XML % name for name in self.domains.get(host, ())}
+        client.dumpxml.side_effect = lambda name: DOMAIN_XML % name
+        return client
+
+    def _add(self, server, running=True, listed=True):
+        self.servers[server['id']] = server
+        if listed:
+            self.listed[server['id']] = server
+        if running:
+            self.domains.setdefault(
+                server['OS-EXT-SRV-ATTR:host'], []).append(
+                    server['OS-EXT-SRV-ATTR:instance_name'])
+
+    def test_show_servers_fallback(self):
+        self._add(_server('a', 'compute-0'))
+        self._add(_server('b', 'compute-1'), listed=False)
+        self._add(_server('c', 'compute-1'))
+        self._add(_server('other', 'compute-1'))
+        self.assertEqual(
+            {'a': self.servers['a'], 'b': self.servers['b'],
+             'c': self.servers['c']},
+            self.test._show_servers(['a', 'b', 'c']))
+        self.servers_client.list_servers.assert_called_once_with(
+            detail=True, all_tenants=True)
+        # Only the server missing from the listing is shown.
+        self.servers_client.show_server.assert_called_once_with('b')
+
+    def test_show_single_server(self):
+        self._add(_server('a', 'compute-0'))
+        self.assertEqual({'a': self.servers['a']},
+                         self.test._show_servers(['a']))
+        self.servers_client.list_servers.assert_not_called()
+
+    def test_get_server_domains(self):
+        self._add(_server('a', 'compute-0'))
+        self._add(_server('b', 'compute-1'), listed=False)
+        self._add(_server('c', 'compute-1'))
+        # Shut off, so not returned by dumpxml_all().
+        self._add(_server('d', 'compute-1'), running=False)
+        domains = self.test.get_server_domains(['a', 'b', 'c', 'd'])
+        self.assertEqual(
+            {server_id: 'instance-%s' % server_id
+             for server_id in ('a', 'b', 'c', 'd')},
+            {server_id: domain.root.find('name').text
+             for server_id, domain in domains.items()})
+        hosts = sorted(call.args[0] for call in self.virsh.call_args_list)
+        # One dumpxml_all() per host, and a dumpxml() for the shut off
+        # server.
+        self.assertEqual(['compute-0', 'compute-1', 'compute-1'], hosts)
+
+        # Unchanged servers are served from the cache.
+        self.virsh.reset_mock()
+        self.assertEqual(domains,
+                         self.test.get_server_domains(['a', 'b', 'c', 'd']))
+        self.virsh.assert_not_called()
+
+        # An updated server is fetched again.
+        self.servers['c']['updated'] = '2026-01-01T00:00:01Z'
+        self.assertIsNot(domains['c'],
+                         self.test.get_server_domains(['a', 'c'])['c'])
+        self.assertEqual(['compute-1'],
+                         [call.args[0]
+                          for call in self.virsh.call_args_list])
+
+    def test_shutdown_server_domain(self):
+        server = _server('a', 'compute-0')
+        self._add(server)
+        self.test.admin_servers_client = self.servers_client
+        ssh = self.patchobject(clients, 'SSHClient')
+        self.test.shutdown_server_domain(server, 'compute-0')
+        ssh.assert_called_once_with('compute-0')
+        ssh.return_value.execute.assert_called_once_with(
+            'virsh shutdown instance-a', sudo=True)
+        self.virsh.assert_called_once_with('compute-0')
@@ -0,0 +1,67 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest.lib import exceptions as tempest_libexc
+
+from whitebox_tempest_plugin import exceptions
+from whitebox_tempest_plugin.services import container_shell
+from whitebox_tempest_plugin.services import transports
+from whitebox_tempest_plugin.tests import base
+
+
+class ContainerShellTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(ContainerShellTestCase, self).setUp()
+        transport = transports.LocalTransport('compute-0', None, None)
+        self.shell = container_shell.ContainerShell(transport, 'nova_compute')
+        self.addCleanup(self.shell.close)
+        self.starts = 0
+
+        def start():
+            # NOTE(artom) Run the shell on the host rather than in a
+            # container, the framing is the same.
+            self.starts += 1
+            self.shell._process = transport.spawn('sh')
+        self.patchobject(self.shell, '_start', side_effect=start)
+
+    def test_execute(self):
+        self.assertEqual('one\n', self.shell.execute('echo one'))
+        self.assertEqual('two', self.shell.execute('printf two'))
+        self.assertEqual('', self.shell.execute('true'))
+        self.assertEqual(1, self.starts)
+
+    def test_large_stderr(self):
+        out = self.shell.execute(
+            'head -c 3000000 /dev/zero | tr "\\0" x >&2; echo done')
+        self.assertEqual('done\n', out)
+        # The stderr of the previous command must not leak into this one.
+        self.assertEqual('next\n', self.shell.execute('echo next'))
+
+    def test_failure(self):
+        e = self.assertRaises(tempest_libexc.SSHExecCommandFailed,
+                              self.shell.execute,
+                              'echo out; echo err >&2; exit 3')
+        self.assertIn('exit status: 3, stderr:\nerr\n\nstdout:\nout\n',
+                      str(e))
+        # The command ran in a subshell, the shell itself is still usable.
+        self.assertEqual('after\n', self.shell.execute('echo after'))
+        self.assertEqual(1, self.starts)
+
+    def test_shell_exited(self):
+        self.assertRaises(exceptions.ContainerShellException,
+                          self.shell.execute, 'kill -9 $$')
+        self.assertEqual('again\n', self.shell.execute('echo again'))
+        self.assertEqual(2, self.starts)
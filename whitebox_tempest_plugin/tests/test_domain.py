@@ -0,0 +1,278 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from whitebox_tempest_plugin import domain
+from whitebox_tempest_plugin.tests import base
+
+DOMAIN_XML = """<domain type="kvm" id="1">
+  <name>instance-00000001</name>
+  <vcpu placement="static" cpuset="4-7">4</vcpu>
+  <iothreads>1</iothreads>
+  <cputune>
+    <vcpupin vcpu="0" cpuset="4"/>
+    <vcpupin vcpu="1" cpuset="5,6"/>
+    <emulatorpin cpuset="6-7"/>
+    <iothreadpin iothread="1" cpuset="7"/>
+  </cputune>
+  <numatune>
+    <memory mode="strict" nodeset="0-1"/>
+    <memnode cellid="0" mode="strict" nodeset="0"/>
+    <memnode cellid="1" mode="strict" nodeset="1"/>
+  </numatune>
+  <memoryBacking>
+    <hugepages><page size="2048" unit="KiB"/></hugepages>
+  </memoryBacking>
+  <os>
+    <type arch="x86_64" machine="q35">hvm</type>
+    <loader readonly="yes" type="pflash">/usr/share/OVMF/OVMF_CODE.fd</loader>
+  </os>
+  <devices>
+    <disk type="network" device="disk">
+      <target dev="vda" bus="virtio"/>
+      <serial>volume-1</serial>
+    </disk>
+    <disk type="file" device="cdrom">
+      <target dev="sda" bus="scsi"/>
+      <address type="drive" controller="0" bus="0" unit="0"/>
+    </disk>
+    <controller type="scsi" index="0" model="virtio-scsi"/>
+    <controller type="usb" index="0"/>
+    <interface type="bridge">
+      <mac address="fa:16:3e:00:00:01"/>
+      <model type="virtio"/>
+    </interface>
+    <interface type="hostdev">
+      <mac address="fa:16:3e:00:00:02"/>
+    </interface>
+    <hostdev mode="subsystem" type="pci" managed="yes">
+      <source>
+        <address domain="0x0000" bus="0x81" slot="0x10" function="0x2"/>
+      </source>
+    </hostdev>
+    <tpm model="tpm-crb"><backend type="emulator" version="2.0"/></tpm>
+  </devices>
+</domain>
+"""
+
+MINIMAL_XML = """<domain type="kvm">
+  <name>instance-00000002</name>
+  <vcpu>1</vcpu>
+  <os><type>hvm</type></os>
+  <devices/>
+</domain>
+"""
+
+
+class DomainTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(DomainTestCase, self).setUp()
+        self.domain = domain.Domain(DOMAIN_XML)
+
+    def test_tuning(self):
+        self.assertEqual({0: {4}, 1: {5, 6}}, self.domain.vcpu_pins)
+        self.assertEqual({4, 5, 6, 7}, self.domain.vcpu_cpuset)
+        self.assertEqual({6, 7}, self.domain.emulator_pins)
+        self.assertEqual(1, self.domain.iothreads)
+        self.assertEqual({1: {7}}, self.domain.iothread_pins)
+        self.assertEqual({0: {0}, 1: {1}}, self.domain.memnodes)
+
+    def test_devices(self):
+        self.assertEqual(['2048'],
+                         [page.get('size') for page in self.domain.hugepages])
+        self.assertEqual(2, len(self.domain.interfaces))
+        self.assertEqual(2, len(self.domain.disks))
+        self.assertEqual(['vda', 'sda'], list(self.domain.disks_by_target))
+        self.assertEqual('cdrom',
+                         self.domain.disks_by_target['sda'].get('device'))
+        self.assertEqual(['0000:81:10.2'],
+                         self.domain.hostdev_pci_addresses)
+        self.assertEqual('tpm-crb', self.domain.tpm.get('model'))
+        self.assertEqual('hvm', self.domain.os.find('type').text)
+        self.assertEqual('pflash', self.domain.loader.get('type'))
+
+    def test_views_share_root(self):
+        # Views are memoized, and their elements are those of root.
+        self.assertIs(self.domain.disks, self.domain.disks)
+        self.assertIs(self.domain.root.find('./devices/disk'),
+                      self.domain.disks[0])
+        self.assertIs(self.domain.root.find('./cputune/vcpupin'),
+                      self.domain.lookup('vcpupin', '0')[0])
+
+    def test_minimal(self):
+        minimal = domain.Domain(MINIMAL_XML)
+        self.assertEqual({}, minimal.vcpu_pins)
+        self.assertEqual(set(), minimal.emulator_pins)
+        self.assertIsNone(minimal.iothreads)
+        self.assertEqual({}, minimal.iothread_pins)
+        self.assertEqual({}, minimal.memnodes)
+        self.assertEqual([], minimal.hugepages)
+        self.assertEqual({}, minimal.disks_by_target)
+        self.assertEqual([], minimal.hostdev_pci_addresses)
+        self.assertIsNone(minimal.tpm)
+        self.assertIsNone(minimal.loader)
+
+
+INTERFACE_1 = """    <interface type="bridge">
+      <mac address="fa:16:3e:00:00:01"/>
+      <model type="virtio"/>
+    </interface>
+"""
+INTERFACE_2 = """    <interface type="hostdev">
+      <mac address="fa:16:3e:00:00:02"/>
+    </interface>
+"""
+
+
+class DiffTestCase(base.WhiteboxPluginTestCase):
+
+    def _diff(self, old, new, ignore=()):
+        changes = domain.Domain(DOMAIN_XML).diff(
+            domain.Domain(DOMAIN_XML.replace(old, new)), ignore)
+        # NOTE(artom) Elements are compared by tag, to keep the expected
+        # changes readable.
+        return [(change.path,
+                 getattr(change.old, 'tag', change.old),
+                 getattr(change.new, 'tag', change.new))
+                for change in changes]
+
+    def test_same(self):
+        self.assertEqual([], domain.diff(domain.Domain(DOMAIN_XML),
+                                         domain.Domain(DOMAIN_XML)))
+
+    def test_attribute(self):
+        self.assertEqual(
+            [("cputune/vcpupin[@vcpu='1']/@cpuset", '5,6', '5')],
+            self._diff('<vcpupin vcpu="1" cpuset="5,6"/>',
+                       '<vcpupin vcpu="1" cpuset="5"/>'))
+
+    def test_text(self):
+        self.assertEqual(
+            [('name/text()', 'instance-00000001', 'instance-00000009')],
+            self._diff('instance-00000001', 'instance-00000009'))
+
+    def test_formatting_ignored(self):
+        self.assertEqual([], self._diff(
+            '<tpm model="tpm-crb"><backend type="emulator" version="2.0"/>',
+            '<tpm model="tpm-crb">\n  <backend version="2.0" '
+            'type="emulator"/>\n'))
+
+    def test_reordered(self):
+        self.assertEqual([], self._diff(INTERFACE_1 + INTERFACE_2,
+                                        INTERFACE_2 + INTERFACE_1))
+
+    def test_reordered_and_changed(self):
+        # The interfaces are paired up by their MAC address
+        # (IDENTITY_CHILDREN), not their position.
+        self.assertEqual(
+            [("devices/interface[mac/@address='fa:16:3e:00:00:02']/@type",
+              'hostdev', 'direct')],
+            self._diff(INTERFACE_1 + INTERFACE_2,
+                       INTERFACE_2.replace('hostdev', 'direct') +
+                       INTERFACE_1))
+
+    def test_identity_changed(self):
+        # A disk with a new target is another disk.
+        self.assertEqual(
+            [("devices/disk[target/@dev='sda']", 'disk', None),
+             ("devices/disk[target/@dev='sdb']", None, 'disk')],
+            self._diff('<target dev="sda" bus="scsi"/>',
+                       '<target dev="sdb" bus="scsi"/>'))
+
+    def test_no_identity(self):
+        # Controllers have no identity, they are numbered by position.
+        self.assertEqual(
+            [('devices/controller[2]/@model', None, 'qemu-xhci')],
+            self._diff('<controller type="usb" index="0"/>',
+                       '<controller type="usb" index="0" '
+                       'model="qemu-xhci"/>'))
+
+    def test_added_removed(self):
+        tpm = ('    <tpm model="tpm-crb"><backend type="emulator" '
+               'version="2.0"/></tpm>\n')
+        self.assertEqual([('devices/tpm', 'tpm', None)],
+                         self._diff(tpm, ''))
+        old = domain.Domain(DOMAIN_XML)
+        new = domain.Domain(DOMAIN_XML.replace(tpm, ''))
+        [change] = old.diff(new)
+        self.assertIs(old.tpm, change.old)
+        self.assertIsNone(change.new)
+
+    def test_ignore(self):
+        self.assertEqual(
+            [], self._diff('<domain type="kvm" id="1">',
+                           '<domain type="kvm" id="2">', ignore=('@id',)))
+        self.assertEqual(
+            [], self._diff('<vcpupin vcpu="1" cpuset="5,6"/>',
+                           '<vcpupin vcpu="1" cpuset="5"/>',
+                           ignore=('cputune/vcpupin/@cpuset',)))
+        self.assertEqual(
+            [], self._diff('<vcpupin vcpu="1" cpuset="5,6"/>', '',
+                           ignore=('cputune',)))
+
+
+class IndexTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(IndexTestCase, self).setUp()
+        self.domain = domain.Domain(DOMAIN_XML)
+
+    def _register_index(self, name, path, key):
+        domain.register_index(name, path, key)
+        self.addCleanup(domain._indexes.pop, name)
+
+    def test_builtin_indexes(self):
+        vda, sda = self.domain.disks
+        self.assertEqual({'volume-1': [vda]},
+                         self.domain.index('disk_by_serial'))
+        self.assertEqual({'0': [sda]},
+                         self.domain.index('disk_by_controller'))
+        self.assertEqual(['scsi', 'usb'],
+                         list(self.domain.index('controller_by_type')))
+        self.assertEqual(
+            {'fa:16:3e:00:00:01': [self.domain.interfaces[0]],
+             'fa:16:3e:00:00:02': [self.domain.interfaces[1]]},
+            self.domain.interfaces_by_mac)
+
+    def test_lookup(self):
+        self.assertEqual(['5,6'],
+                         [pin.get('cpuset')
+                          for pin in self.domain.lookup('vcpupin', '1')])
+        self.assertEqual([], self.domain.lookup('vcpupin', '9'))
+        self.assertEqual([], self.domain.lookup('hostdev_by_type', 'usb'))
+
+    def test_memoized(self):
+        self.assertIs(self.domain.index('vcpupin'),
+                      self.domain.index('vcpupin'))
+
+    def test_unknown_index(self):
+        self.assertRaises(KeyError, self.domain.index, 'unknown')
+
+    def test_register_index(self):
+        self._register_index('test_hostdev_by_bus', './devices/hostdev',
+                             'source/address/@bus')
+        self._register_index('test_controller_by_index',
+                             './devices/controller', '@index')
+        self._register_index('test_disk_by_alias', './devices/disk',
+                             'alias/@name')
+        self.assertEqual(self.domain.pci_hostdevs,
+                         self.domain.lookup('test_hostdev_by_bus', '0x81'))
+        # Elements sharing a key are kept in document order.
+        self.assertEqual(
+            ['scsi', 'usb'],
+            [controller.get('type') for controller in
+             self.domain.lookup('test_controller_by_index', '0')])
+        # Elements without the key are left out.
+        self.assertEqual({}, self.domain.index('test_disk_by_alias'))
@@ -0,0 +1,91 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import sys
+
+import fixtures
+from tempest.lib import exceptions as tempest_libexc
+
+from whitebox_tempest_plugin import exceptions
+from whitebox_tempest_plugin.services import host_agent
+from whitebox_tempest_plugin.services import transports
+from whitebox_tempest_plugin.tests import base
+
+
+class HostAgentTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(HostAgentTestCase, self).setUp()
+        self.flags(host_agent_python=sys.executable)
+        bootstrap = host_agent._bootstrap_command
+        # NOTE(artom) Run the agent as ourselves rather than with sudo.
+        self.patchobject(host_agent, '_bootstrap_command',
+                         side_effect=lambda: bootstrap().replace('sudo ', '',
+                                                                 1))
+        self.agent = host_agent.HostAgent(
+            transports.LocalTransport('compute-0', None, None))
+        self.addCleanup(self.agent.close)
+        self.tmp = self.useFixture(fixtures.TempDir()).path
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_read_files(self):
+        one = self._write('one', '1\n')
+        two = self._write('two', '2\n')
+        self.assertEqual({one: '1\n', two: '2\n'},
+                         self.agent.call('read_files', paths=[one, two]))
+
+    def test_read_files_missing(self):
+        missing = os.path.join(self.tmp, 'missing')
+        e = self.assertRaises(tempest_libexc.SSHExecCommandFailed,
+                              self.agent.call, 'read_files',
+                              paths=[missing])
+        self.assertIn('No such file', str(e))
+
+    def test_read_ini(self):
+        path = self._write('nova.conf',
+                           '[DEFAULT]\ndebug = True\n[libvirt]\n'
+                           'cpu_mode = host-model\n')
+        self.assertEqual(
+            ['True', 'host-model', None, None],
+            self.agent.call('read_ini', path=path,
+                            options=[('DEFAULT', 'debug'),
+                                     ('libvirt', 'cpu_mode'),
+                                     ('libvirt', 'cpu_models'),
+                                     ('compute', 'cpu_shared_set')]))
+
+    def test_read_ini_missing(self):
+        self.assertRaises(exceptions.HostAgentException, self.agent.call,
+                          'read_ini', path=os.path.join(self.tmp, 'missing'),
+                          options=[('DEFAULT', 'debug')])
+
+    def test_meminfo(self):
+        self.assertIn('MemTotal', self.agent.call('meminfo'))
+
+    def test_unknown_op(self):
+        self.assertRaises(exceptions.HostAgentException, self.agent.call,
+                          'unknown')
+        # The agent survives a failed request.
+        self.assertIn('MemTotal', self.agent.call('meminfo'))
+
+    def test_agent_restarted(self):
+        self.assertIn('MemTotal', self.agent.call('meminfo'))
+        self.agent._process.close()
+        self.assertIn('MemTotal', self.agent.call('meminfo'))
@@ -0,0 +1,144 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+from unittest import mock
+
+import fixtures
+
+from whitebox_tempest_plugin.services import host_capabilities
+from whitebox_tempest_plugin.tests import base
+
+
+CAPABILITIES_XML = """<capabilities>
+  <host>
+    <cpu>
+      <pages unit='KiB' size='2048'/>
+      <pages unit='KiB' size='4'/>
+    </cpu>
+    <topology>
+      <cells num='2'>
+        <cell id='0'>
+          <pages unit='KiB' size='4'>1000</pages>
+          <pages unit='KiB' size='2048'>16</pages>
+          <distances>
+            <sibling id='0' value='10'/>
+            <sibling id='1' value='21'/>
+          </distances>
+          <cpus num='2'>
+            <cpu id='0' socket_id='0' core_id='0' siblings='0,2'/>
+            <cpu id='2' socket_id='0' core_id='0' siblings='0,2'/>
+          </cpus>
+        </cell>
+        <cell id='1'>
+          <pages unit='KiB' size='4'>1000</pages>
+          <pages unit='KiB' size='2048'>0</pages>
+          <distances>
+            <sibling id='0' value='21'/>
+            <sibling id='1' value='10'/>
+          </distances>
+          <cpus num='1'>
+            <cpu id='1' socket_id='1' core_id='0' siblings='1'/>
+          </cpus>
+        </cell>
+      </cells>
+    </topology>
+  </host>
+</capabilities>
+"""
+
+
+class HostCapabilitiesTestCase(base.WhiteboxPluginTestCase):
+
+    def test_topology(self):
+        caps = host_capabilities.HostCapabilities(CAPABILITIES_XML)
+        self.assertEqual({0: {0, 2}, 1: {1}}, caps.cells)
+        self.assertEqual({0, 1, 2}, set(caps.cpus))
+        self.assertEqual(host_capabilities.CPU(0, 0, 0, {0, 2}),
+                         caps.cpus[0])
+        self.assertEqual({0: {0, 2}, 1: {1}, 2: {0, 2}}, caps.siblings)
+        self.assertEqual([4, 2048], caps.page_sizes)
+        self.assertEqual({0: {0: 10, 1: 21}, 1: {0: 21, 1: 10}},
+                         caps.distances)
+
+
+class GetCapabilitiesTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(GetCapabilitiesTestCase, self).setUp()
+        self.patchobject(host_capabilities, '_capabilities', {})
+        self.patchobject(host_capabilities, '_host_locks', {})
+        self.fetched = []
+        self.fetching = threading.Event()
+        self.timed_out = []
+        self.release = {}
+        self.patchobject(host_capabilities.clients, 'VirshXMLClient',
+                         side_effect=self._client)
+
+    def _client(self, host):
+        def capabilities():
+            self.fetched.append(host)
+            self.fetching.set()
+            if host in self.release and not self.release[host].wait(5):
+                self.timed_out.append(host)
+            return CAPABILITIES_XML
+        return mock.Mock(capabilities=capabilities)
+
+    def _get_in_thread(self, host):
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                host_capabilities.get_capabilities(host)))
+        thread.start()
+        return thread, results
+
+    def test_fetched_once_per_host(self):
+        self.release['compute-0'] = threading.Event()
+        first, first_results = self._get_in_thread('compute-0')
+        second, second_results = self._get_in_thread('compute-0')
+        self.release['compute-0'].set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(['compute-0'], self.fetched)
+        self.assertIs(first_results[0], second_results[0])
+        self.assertIs(first_results[0],
+                      host_capabilities.get_capabilities('compute-0'))
+
+    def test_hosts_fetched_concurrently(self):
+        # NOTE(artom) compute-0's fetch doesn't finish until compute-1's
+        # result is in, which never happens if they're serialized.
+        self.release['compute-0'] = threading.Event()
+        thread, results = self._get_in_thread('compute-0')
+        self.assertTrue(self.fetching.wait(5))
+        self.assertIsInstance(
+            host_capabilities.get_capabilities('compute-1'),
+            host_capabilities.HostCapabilities)
+        self.release['compute-0'].set()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual([], self.timed_out)
+        self.assertEqual(['compute-0', 'compute-1'], self.fetched)
+        self.assertEqual(1, len(results))
+
+    def test_cache_dir(self):
+        cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.flags(host_capabilities_cache_dir=cache_dir)
+        host_capabilities.get_capabilities('compute-0')
+        # NOTE(artom) Another worker process starts with an empty memory
+        # cache.
+        self.patchobject(host_capabilities, '_capabilities', {})
+        caps = host_capabilities.get_capabilities('compute-0')
+        self.assertEqual(['compute-0'], self.fetched)
+        self.assertEqual(CAPABILITIES_XML, caps.xml)
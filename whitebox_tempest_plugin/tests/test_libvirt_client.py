@@ -0,0 +1,90 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest.lib import exceptions as tempest_libexc
+import testtools
+
+from whitebox_tempest_plugin import exceptions
+from whitebox_tempest_plugin.services import libvirt_client
+from whitebox_tempest_plugin.tests import base
+
+
+class GetConnectionTestCase(base.WhiteboxPluginTestCase):
+
+    def test_no_bindings(self):
+        self.flags(libvirt_uri='test:///default')
+        self.patchobject(libvirt_client, 'libvirt', None)
+        e = self.assertRaises(exceptions.LibvirtAPIException,
+                              libvirt_client.get_connection,
+                              'compute-0', 'zuul', '/key')
+        # Callers written for virsh commands still catch it.
+        self.assertIsInstance(e, tempest_libexc.SSHExecCommandFailed)
+
+    def test_uri(self):
+        self.flags(libvirt_uri='qemu+ssh://{username}@{host}/system'
+                               '?keyfile={key_filename}')
+        self.assertEqual(
+            'qemu+ssh://zuul@compute-0/system?keyfile=/key',
+            libvirt_client.get_uri('compute-0', 'zuul', '/key'))
+
+
+@testtools.skipIf(libvirt_client.libvirt is None,
+                  'The libvirt Python bindings are not installed')
+class LibvirtConnectionTestCase(base.WhiteboxPluginTestCase):
+    """Runs against libvirt's test driver, whose default configuration has
+    a single running domain named 'test'.
+    """
+
+    def setUp(self):
+        super(LibvirtConnectionTestCase, self).setUp()
+        self.connection = libvirt_client.LibvirtConnection(
+            'compute-0', 'test:///default')
+        self.addCleanup(self.connection.close)
+
+    def test_dumpxml(self):
+        xml = self.connection.dumpxml('test')
+        self.assertIn('<name>test</name>', xml)
+        uuid = xml.split('<uuid>')[1].split('</uuid>')[0]
+        self.assertEqual(xml, self.connection.dumpxml(uuid))
+
+    def test_dumpxml_missing(self):
+        e = self.assertRaises(exceptions.LibvirtAPIException,
+                              self.connection.dumpxml, 'missing')
+        self.assertIsInstance(e, tempest_libexc.SSHExecCommandFailed)
+
+    def test_dumpxml_all(self):
+        self.assertEqual({'test': self.connection.dumpxml('test')},
+                         self.connection.dumpxml_all())
+
+    def test_list_domains(self):
+        self.assertEqual(['test'], self.connection.list_domains())
+        self.assertIn('test', self.connection.list_domains(all_domains=True))
+
+    def test_capabilities(self):
+        self.assertIn('<capabilities>', self.connection.capabilities())
+
+    def test_secret_dumpxml_missing(self):
+        self.assertRaises(exceptions.LibvirtAPIException,
+                          self.connection.secret_dumpxml,
+                          '00000000-0000-0000-0000-000000000000')
+
+    def test_domblklist(self):
+        lines = self.connection.domblklist('test').splitlines()
+        self.assertEqual([' Target   Source', '-' * 40], lines[:2])
+
+    def test_reconnect(self):
+        self.connection.list_domains()
+        self.connection.close()
+        self.assertEqual(['test'], self.connection.list_domains())
@@ -0,0 +1,38 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from whitebox_tempest_plugin.services import metrics
+from whitebox_tempest_plugin.tests import base
+
+
+class TimeConnectTestCase(base.WhiteboxPluginTestCase):
+
+    def test_metrics_disabled(self):
+        transport = mock.Mock()
+        with metrics.measure('compute-0', 'virsh list') as sample:
+            metrics.time_connect(sample, transport)
+        transport.connect.assert_not_called()
+
+    def test_metrics_enabled(self):
+        self.flags(command_metrics=True)
+        self.patchobject(metrics, 'collector')
+        transport = mock.Mock()
+        with metrics.measure('compute-0', 'virsh list') as sample:
+            metrics.time_connect(sample, transport)
+        transport.connect.assert_called_once_with()
+        self.assertGreaterEqual(sample['connect_time'], 0)
+        metrics.collector.add.assert_called_once_with(sample)
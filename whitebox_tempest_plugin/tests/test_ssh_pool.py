@@ -0,0 +1,108 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+from unittest import mock
+
+import paramiko
+
+from whitebox_tempest_plugin.services import ssh_pool
+from whitebox_tempest_plugin.services import transports
+from whitebox_tempest_plugin.tests import base
+
+
+class SSHConnectionPoolTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(SSHConnectionPoolTestCase, self).setUp()
+        self.now = 1000.0
+        self.patchobject(ssh_pool.time, 'monotonic',
+                         side_effect=lambda: self.now)
+        self.pool = ssh_pool.SSHConnectionPool(idle_timeout=300)
+        self.client = self.pool.get('compute-0', 'zuul', '/key')
+        self.connection = mock.Mock()
+        self.patchobject(self.client, '_get_ssh_connection',
+                         return_value=self.connection)
+        self.channel = (
+            self.connection.get_transport.return_value.open_session
+            .return_value)
+        self.channel.recv.return_value = b''
+        self.channel.recv_stderr.return_value = b''
+        self.transport = transports.SSHTransport('compute-0', 'zuul', '/key')
+        self.patchobject(self.transport, '_pooled_client',
+                         return_value=self.client)
+        self.client.connect()
+
+    def _evict_after(self, seconds):
+        self.now += seconds
+        # NOTE(artom) Idle clients are evicted on any get(), whatever the
+        # host.
+        self.pool.get('compute-1', 'zuul', '/key')
+
+    def test_idle_client_evicted(self):
+        self.client.acquire()
+        self.client.release()
+        self._evict_after(299)
+        self.connection.close.assert_not_called()
+        self._evict_after(2)
+        self.connection.close.assert_called_once_with()
+        self.assertFalse(self.client.is_alive())
+
+    def test_client_with_spawned_process_not_evicted(self):
+        process = self.transport.spawn('journalctl -f')
+        self._evict_after(301)
+        self._evict_after(301)
+        self.connection.close.assert_not_called()
+        process.close()
+        self.channel.close.assert_called_once_with()
+        self._evict_after(299)
+        self.connection.close.assert_not_called()
+        self._evict_after(2)
+        self.connection.close.assert_called_once_with()
+
+    def test_process_closed_twice_released_once(self):
+        process = self.transport.spawn('journalctl -f')
+        self.client.acquire()
+        process.close()
+        process.close()
+        self._evict_after(301)
+        self.connection.close.assert_not_called()
+
+    def test_failed_spawn_released(self):
+        self.channel.exec_command.side_effect = paramiko.SSHException()
+        self.assertRaises(paramiko.SSHException, self.transport.spawn,
+                          'journalctl -f')
+        self._evict_after(301)
+        self.connection.close.assert_called_once_with()
+
+    def test_eviction_excludes_acquire(self):
+        self.client.acquire()
+        self.client.release()
+        close = self.client.close
+        thread = threading.Thread(target=self.client.acquire)
+        acquired = []
+
+        def racing_close():
+            # Start a command while the idle connection is being closed, it
+            # must wait for the close to be over.
+            thread.start()
+            thread.join(0.1)
+            acquired.append(not thread.is_alive())
+            close()
+        self.patchobject(self.client, 'close', side_effect=racing_close)
+        self._evict_after(301)
+        thread.join()
+        self.assertEqual([False], acquired)
+        self.assertEqual(1, self.client._in_use)
@@ -0,0 +1,180 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import subprocess
+import threading
+
+import fixtures
+from tempest.lib import exceptions as tempest_libexc
+
+from whitebox_tempest_plugin import exceptions
+from whitebox_tempest_plugin.services import transports
+from whitebox_tempest_plugin.tests import base
+
+
+class CassetteTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(CassetteTestCase, self).setUp()
+        self.tmp = self.useFixture(fixtures.TempDir()).path
+        self.path = os.path.join(self.tmp, 'cassette.json')
+        self.counter = os.path.join(self.tmp, 'counter')
+        # NOTE(artom) A command whose output changes on every run, like
+        # polling commands do.
+        self.command = 'echo x >> %s; wc -l < %s' % (self.counter,
+                                                     self.counter)
+
+    def _record(self, commands):
+        cassette = transports.Cassette(self.path)
+        transport = transports.RecordingTransport(
+            transports.LocalTransport('compute-0', None, None), cassette)
+        outputs = [transport.run(command) for command in commands]
+        cassette.save()
+        return outputs
+
+    def _replay(self):
+        return transports.ReplayTransport('compute-0', None, None,
+                                          transports.Cassette(self.path))
+
+    def test_round_trip(self):
+        recorded = self._record([self.command, self.command,
+                                 'echo err >&2; exit 3'])
+        self.assertEqual([(0, '1\n', ''), (0, '2\n', ''), (3, '', 'err\n')],
+                         recorded)
+        transport = self._replay()
+        self.assertEqual(recorded[0], transport.run(self.command))
+        self.assertEqual(recorded[1], transport.run(self.command))
+        # Once all runs are replayed, the last one is repeated.
+        self.assertEqual(recorded[1], transport.run(self.command))
+        self.assertEqual(recorded[2], transport.run('echo err >&2; exit 3'))
+        e = self.assertRaises(tempest_libexc.SSHExecCommandFailed,
+                              transport.exec_command, 'echo err >&2; exit 3')
+        self.assertIn('exit status: 3', str(e))
+
+    def test_replay_bytes(self):
+        self._record([self.command])
+        self.assertEqual((0, b'1\n', b''),
+                         self._replay().run(self.command, encoding=None))
+
+    def test_save_merges(self):
+        self._record([self.command])
+        self._record([self.command, 'true'])
+        with open(self.path) as f:
+            hosts = json.load(f)['hosts']
+        self.assertEqual(
+            ['1\n', '2\n'],
+            [run['stdout'] for run in hosts['compute-0'][self.command]])
+        self.assertEqual(1, len(hosts['compute-0']['true']))
+        transport = self._replay()
+        self.assertEqual('1\n', transport.exec_command(self.command))
+        self.assertEqual('2\n', transport.exec_command(self.command))
+
+    def test_concurrent_saves(self):
+        cassettes = []
+        for i in range(8):
+            cassette = transports.Cassette(self.path)
+            cassette.record('compute-0', 'echo %d' % i, 0, '%d\n' % i, '')
+            cassettes.append(cassette)
+        threads = [threading.Thread(target=cassette.save)
+                   for cassette in cassettes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(self.path) as f:
+            hosts = json.load(f)['hosts']
+        self.assertEqual(sorted('echo %d' % i for i in range(8)),
+                         sorted(hosts['compute-0']))
+
+    def test_save_nothing_recorded(self):
+        transports.Cassette(self.path).save()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_miss(self):
+        self._record([self.command])
+        transport = self._replay()
+        self.assertRaises(exceptions.CassetteMissException, transport.run,
+                          'true')
+        self.assertRaises(exceptions.CassetteMissException, transport.spawn,
+                          self.command)
+        other = transports.ReplayTransport('compute-1', None, None,
+                                           transports.Cassette(self.path))
+        self.assertRaises(exceptions.CassetteMissException, other.run,
+                          self.command)
+
+
+class OpenSSHTransportTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(OpenSSHTransportTestCase, self).setUp()
+        self.flags(openssh_control_dir=self.useFixture(
+            fixtures.TempDir()).path)
+        self.run = self.patchobject(transports.subprocess, 'run')
+        self.run.return_value = subprocess.CompletedProcess(
+            [], 0, stdout=b'', stderr=b'')
+        self.transport = transports.OpenSSHTransport('compute-0', 'zuul',
+                                                     '/key')
+
+    def _checks(self):
+        return [call for call in self.run.call_args_list
+                if '-O' in call.args[0]]
+
+    def test_connect_checks_master_once(self):
+        self.transport.connect()
+        self.transport.run('true')
+        self.transport.connect()
+        self.assertEqual(1, len(self._checks()))
+
+    def test_connect_starts_master(self):
+        self.run.side_effect = [
+            subprocess.CompletedProcess([], 255),
+            subprocess.CompletedProcess([], 0, stdout=b'', stderr=b'')]
+        self.transport.connect()
+        self.assertEqual(2, self.run.call_count)
+        self.assertEqual(
+            ['--', 'compute-0', 'true'], self.run.call_args.args[0][-3:])
+        self.transport.connect()
+        self.assertEqual(2, self.run.call_count)
+
+    def test_connect_rechecks_after_failed_command(self):
+        self.transport.connect()
+        self.run.return_value = subprocess.CompletedProcess(
+            [], 255, stdout=b'', stderr=b'Connection closed')
+        self.transport.run('true')
+        self.run.return_value = subprocess.CompletedProcess(
+            [], 0, stdout=b'', stderr=b'')
+        self.transport.connect()
+        self.assertEqual(2, len(self._checks()))
+        self.transport.connect()
+        self.assertEqual(2, len(self._checks()))
+
+    def test_connect_no_recheck_after_command_failure(self):
+        self.transport.connect()
+        self.run.return_value = subprocess.CompletedProcess(
+            [], 1, stdout=b'', stderr=b'grep: no match')
+        self.transport.run('grep foo /etc/hosts')
+        self.transport.connect()
+        self.assertEqual(1, len(self._checks()))
+
+    def test_connect_rechecks_after_timeout(self):
+        self.transport.connect()
+        self.run.side_effect = subprocess.TimeoutExpired('ssh', 300)
+        self.assertRaises(tempest_libexc.TimeoutException,
+                          self.transport.run, 'sleep 600')
+        self.run.side_effect = None
+        self.transport.connect()
+        self.assertEqual(2, len(self._checks()))
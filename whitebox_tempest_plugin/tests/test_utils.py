@@ -0,0 +1,163 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import xml.etree.ElementTree as ET
+
+from whitebox_tempest_plugin.tests import base
+from whitebox_tempest_plugin import utils as whitebox_utils
+
+
+class FanOutTestCase(base.WhiteboxPluginTestCase):
+
+    def test_partial_failure(self):
+        def func(item):
+            if item == 'compute-1':
+                raise ValueError(item)
+            return item.upper()
+        results = whitebox_utils.fan_out(
+            func, ['compute-0', 'compute-1', 'compute-2'])
+        self.assertEqual(['compute-0', 'compute-1', 'compute-2'],
+                         list(results))
+        self.assertEqual('COMPUTE-0', results['compute-0'].result())
+        self.assertEqual('COMPUTE-2', results['compute-2'].result())
+        self.assertIsNone(results['compute-1'].value)
+        self.assertIsInstance(results['compute-1'].error, ValueError)
+        self.assertRaises(ValueError, results['compute-1'].result)
+
+    def test_max_workers(self):
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+        started = threading.Barrier(2, timeout=5)
+
+        def func(item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            # The first two calls wait for each other, so the peak is only
+            # reached if calls really run concurrently.
+            if item < 2:
+                started.wait()
+            with lock:
+                running[0] -= 1
+            return item
+        results = whitebox_utils.fan_out(func, range(6), max_workers=2)
+        self.assertEqual(list(range(6)),
+                         [result.result() for result in results.values()])
+        self.assertEqual(2, peak[0])
+
+    def test_no_items(self):
+        self.assertEqual({}, whitebox_utils.fan_out(lambda item: item, []))
+
+
+class Context(object):
+
+    def __init__(self, name, events, fail=False):
+        self.name = name
+        self.events = events
+        self.fail = fail
+
+    def __enter__(self):
+        if self.fail:
+            raise ValueError(self.name)
+        self.events.append(('enter', self.name))
+        return self.name
+
+    def __exit__(self, *exc_info):
+        self.events.append(('exit', self.name, exc_info))
+
+
+class ParallelMulticontextTestCase(base.WhiteboxPluginTestCase):
+
+    def test_enter_exit(self):
+        events = []
+        with whitebox_utils.parallel_multicontext(
+                Context('a', events), Context('b', events)) as values:
+            self.assertEqual(['a', 'b'], values)
+            self.assertEqual([('enter', 'a'), ('enter', 'b')],
+                             sorted(events))
+        self.assertEqual(
+            [('enter', 'a'), ('enter', 'b'),
+             ('exit', 'a', (None, None, None)),
+             ('exit', 'b', (None, None, None))],
+            sorted(events))
+
+    def test_failed_enter_unwinds(self):
+        events = []
+        body = []
+
+        def run():
+            with whitebox_utils.parallel_multicontext(
+                    Context('a', events), Context('b', events, fail=True),
+                    Context('c', events)):
+                body.append(True)
+        e = self.assertRaises(ValueError, run)
+        self.assertEqual('b', str(e))
+        self.assertEqual([], body)
+        self.assertEqual(
+            [('enter', 'a'), ('enter', 'c'),
+             ('exit', 'a', (None, None, None)),
+             ('exit', 'c', (None, None, None))],
+            sorted(events))
+
+    def test_body_error(self):
+        events = []
+
+        def run():
+            with whitebox_utils.parallel_multicontext(Context('a', events)):
+                raise KeyError('body')
+        self.assertRaises(KeyError, run)
+        self.assertEqual(
+            [('enter', 'a'), ('exit', 'a', (None, None, None))], events)
+
+
+class IterparsePathsTestCase(base.WhiteboxPluginTestCase):
+
+    XML = """<domain>
+  <vcpu cpuset="0-3">2</vcpu>
+  <cputune>
+    <vcpupin vcpu="0" cpuset="0"/>
+    <vcpupin vcpu="1" cpuset="1"/>
+    <emulatorpin cpuset="2-3"/>
+  </cputune>
+  <devices><disk type="file"/></devices>
+</domain>"""
+
+    def _parse(self, *paths):
+        return [(path, ET.tostring(elem, encoding='unicode').strip())
+                for path, elem in whitebox_utils.iterparse_paths(self.XML,
+                                                                 *paths)]
+
+    def test_paths(self):
+        self.assertEqual(
+            [('vcpu', '<vcpu cpuset="0-3">2</vcpu>'),
+             ('cputune/vcpupin', '<vcpupin vcpu="0" cpuset="0" />'),
+             ('cputune/vcpupin', '<vcpupin vcpu="1" cpuset="1" />'),
+             ('devices/disk', '<disk type="file" />')],
+            self._parse('vcpu', 'cputune/vcpupin', 'devices/disk',
+                        'missing'))
+
+    def test_nested_paths(self):
+        parsed = dict(whitebox_utils.iterparse_paths(
+            self.XML, 'cputune', 'cputune/vcpupin'))
+        self.assertEqual(
+            ['cputune/vcpupin', 'cputune/vcpupin', 'cputune'],
+            [path for path, _ in self._parse('cputune', 'cputune/vcpupin')])
+        # The outer element is complete, the inner ones were not detached
+        # from it.
+        self.assertEqual(
+            ['vcpupin', 'vcpupin', 'emulatorpin'],
+            [child.tag for child in parsed['cputune']])
@@ -0,0 +1,286 @@
+# Copyright 2026 Red Hat
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+from unittest import mock
+
+from tempest.lib import exceptions as lib_exc
+
+from whitebox_tempest_plugin.common import waiters
+from whitebox_tempest_plugin.services import notifications
+from whitebox_tempest_plugin.tests import base
+
+
+class WaitUntilTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(WaitUntilTestCase, self).setUp()
+        self.flags(waiter_initial_interval=0.01,
+                   notification_poll_interval=30)
+        self.subscription = notifications.Subscription('service.update',
+                                                       None)
+        self.delivered = self.patchobject(notifications, 'delivered',
+                                          return_value=True)
+        self.polls = 0
+        self.notified_at = None
+
+    def _notify_later(self, delay):
+        def notify():
+            time.sleep(delay)
+            self.notified_at = time.monotonic()
+            self.subscription._notify('service.update', {})
+
+        thread = threading.Thread(target=notify)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def _wait(self, predicate, timeout=5):
+        def counted():
+            self.polls += 1
+            return predicate()
+
+        start = time.monotonic()
+        waiters.wait_until(counted, 'timed out', name='test',
+                           timeout=timeout, max_interval=0.05,
+                           subscription=self.subscription)
+        return time.monotonic() - start
+
+    def test_change_seen_after_notification(self):
+        self._notify_later(0.1)
+        self.assertLess(self._wait(lambda: self.notified_at is not None), 2)
+
+    def test_change_visible_after_notification(self):
+        # NOTE(artom) The change only becomes visible some time after its
+        # notification, as when a migration is only saved as done after
+        # the notification of its end. The polls the notification triggers
+        # do not see it.
+        self._notify_later(0.1)
+
+        def predicate():
+            return (self.notified_at is not None and
+                    time.monotonic() - self.notified_at > 0.2)
+
+        self.assertLess(self._wait(predicate), 2)
+
+    def test_no_notification_long_wait(self):
+        self.assertRaises(lib_exc.TimeoutException, self._wait,
+                          lambda: False, timeout=1)
+        # NOTE(artom) Backing off to max_interval takes a few polls, then
+        # nothing is polled until the timeout but the last poll.
+        self.assertLess(self.polls, 10)
+
+    def test_nothing_delivered_polls(self):
+        # NOTE(artom) The listener may not be receiving the services'
+        # notifications at all, as when listening on the wrong exchanges.
+        self.delivered.return_value = False
+        self.assertRaises(lib_exc.TimeoutException, self._wait,
+                          lambda: False, timeout=1)
+        self.assertGreater(self.polls, 10)
+
+    def test_no_subscription_polls(self):
+        self.subscription = None
+        self.assertRaises(lib_exc.TimeoutException, self._wait,
+                          lambda: False, timeout=1)
+        self.assertGreater(self.polls, 10)
+
+
+class NovaServiceStatesTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(NovaServiceStatesTestCase, self).setUp()
+        self.flags(waiter_initial_interval=0.01)
+        self.patchobject(notifications, 'subscribe', return_value=None)
+        self.client = mock.Mock(build_timeout=2, build_interval=0.05)
+        # The services as seen by successive polls, the last one repeated.
+        self.polls = []
+
+        def list_services():
+            services = self.polls[0]
+            if len(self.polls) > 1:
+                self.polls.pop(0)
+            return {'services': services}
+        self.client.list_services.side_effect = list_services
+
+    def _services(self, compute0, compute1, compute2):
+        return [
+            {'host': 'compute-0', 'binary': 'nova-compute',
+             'state': compute0, 'status': 'enabled'},
+            {'host': 'compute-1', 'binary': 'nova-compute',
+             'state': compute1, 'status': 'enabled'},
+            {'host': 'compute-2', 'binary': 'nova-compute',
+             'state': 'up', 'status': compute2},
+            {'host': 'controller', 'binary': 'nova-scheduler',
+             'state': 'down', 'status': 'enabled'},
+        ]
+
+    def test_converge(self):
+        self.polls = [
+            self._services('down', 'down', 'enabled'),
+            self._services('up', 'down', 'enabled'),
+            # compute-0 flapping does not matter anymore once it was seen
+            # up.
+            self._services('down', 'up', 'enabled'),
+            self._services('down', 'up', 'disabled'),
+        ]
+        waiters.wait_for_nova_service_states(self.client, [
+            ('compute-0', 'nova-compute', 'state', 'up'),
+            ('compute-1', 'nova-compute', 'state', 'up'),
+            ('compute-2', 'nova-compute', 'status', 'disabled')])
+        self.assertEqual(4, self.client.list_services.call_count)
+        # Every poll lists all the services at once.
+        for call in self.client.list_services.call_args_list:
+            self.assertEqual(mock.call(), call)
+
+    def test_timeout(self):
+        self.polls = [self._services('up', 'down', 'enabled')]
+        e = self.assertRaises(
+            lib_exc.TimeoutException,
+            waiters.wait_for_nova_service_states, self.client, [
+                ('compute-0', 'nova-compute', 'state', 'up'),
+                ('compute-1', 'nova-compute', 'state', 'up'),
+                ('compute-3', 'nova-compute', 'state', 'up')])
+        self.assertIn("('compute-1', 'nova-compute', 'state', 'up')",
+                      str(e))
+        self.assertIn("('compute-3', 'nova-compute', 'state', 'up')",
+                      str(e))
+        self.assertNotIn('compute-0', str(e))
+
+
+class FakeMigrationsClient(object):
+    """Lists migrations the way the compute API does when filtered by
+    instance and optionally type.
+    """
+
+    build_timeout = 5
+    build_interval = 1
+
+    def __init__(self):
+        self.migrations = []
+        self.listed = []
+
+    def add(self, server_id, status, migration_type='migration'):
+        migration = {'id': len(self.migrations) + 1,
+                     'instance_uuid': server_id, 'status': status,
+                     'migration_type': migration_type}
+        self.migrations.append(migration)
+        return migration
+
+    def list_migrations(self, instance_uuid, migration_type=None):
+        self.listed.append(instance_uuid)
+        return {'migrations': [
+            dict(m) for m in self.migrations
+            if m['instance_uuid'] == instance_uuid and
+            migration_type in (None, m['migration_type'])]}
+
+
+class MigrationWatcherPollTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(MigrationWatcherPollTestCase, self).setUp()
+        self.patchobject(notifications, 'subscribe')
+        self.patchobject(notifications, 'unsubscribe')
+        self.client = FakeMigrationsClient()
+
+    def _watch(self, server_ids, migration_type=None):
+        watcher = waiters.MigrationWatcher(self.client, server_ids,
+                                           migration_type=migration_type)
+        self.addCleanup(watcher.close)
+        self.client.listed = []
+        return watcher
+
+    def test_ignores_known_migrations(self):
+        self.client.add('a', 'completed')
+        watcher = self._watch(['a'])
+        self.assertFalse(watcher._poll())
+        self.assertEqual({}, watcher.migrations)
+        migration = self.client.add('a', 'running')
+        self.assertFalse(watcher._poll())
+        migration['status'] = 'completed'
+        self.assertTrue(watcher._poll())
+        self.assertEqual(migration['id'], watcher.migrations['a']['id'])
+
+    def test_filters_by_server_and_type(self):
+        watcher = self._watch(['a'], migration_type='evacuation')
+        self.client.add('b', 'completed', migration_type='evacuation')
+        self.client.add('a', 'completed', migration_type='live-migration')
+        self.assertFalse(watcher._poll())
+        self.client.add('a', 'done', migration_type='evacuation')
+        self.assertTrue(watcher._poll())
+        self.assertEqual(['a', 'a'], self.client.listed)
+
+    def test_follows_latest_migration(self):
+        watcher = self._watch(['a'])
+        self.client.add('a', 'error')
+        latest = self.client.add('a', 'running')
+        self.assertFalse(watcher._poll())
+        self.assertEqual(latest['id'], watcher.migrations['a']['id'])
+        latest['status'] = 'done'
+        self.assertTrue(watcher._poll())
+
+    def test_fails_fast_on_error(self):
+        watcher = self._watch(['a', 'b'])
+        self.client.add('a', 'running')
+        failed = self.client.add('b', 'failed')
+        e = self.assertRaises(waiters.MigrationException, watcher._poll)
+        self.assertIn('migration %s of server b' % failed['id'], str(e))
+
+    def test_skips_completed_servers(self):
+        watcher = self._watch(['a', 'b'])
+        self.client.add('a', 'completed')
+        migration = self.client.add('b', 'running')
+        self.assertFalse(watcher._poll())
+        self.assertEqual(['a', 'b'], self.client.listed)
+        self.client.listed = []
+        migration['status'] = 'completed'
+        self.assertTrue(watcher._poll())
+        self.assertEqual(['b'], self.client.listed)
+        self.client.listed = []
+        self.assertEqual({'a': 'completed', 'b': 'completed'},
+                         {server_id: m['status'] for server_id, m in
+                          watcher.wait().items()})
+        self.assertEqual([], self.client.listed)
+
+
+class MigrationWatcherTestCase(base.WhiteboxPluginTestCase):
+
+    def setUp(self):
+        super(MigrationWatcherTestCase, self).setUp()
+        self.subscribe = self.patchobject(notifications, 'subscribe')
+        self.unsubscribe = self.patchobject(notifications, 'unsubscribe')
+        self.client = mock.Mock(build_timeout=5, build_interval=1)
+        self.client.list_migrations.return_value = {'migrations': []}
+
+    def test_unsubscribes_on_exit(self):
+        with waiters.MigrationWatcher(self.client, ['server']):
+            self.unsubscribe.assert_not_called()
+        self.unsubscribe.assert_called_once_with(
+            self.subscribe.return_value)
+
+    def test_unsubscribes_if_migration_fails_to_start(self):
+        def migrate():
+            with waiters.MigrationWatcher(self.client, ['server']):
+                raise lib_exc.BadRequest()
+
+        self.assertRaises(lib_exc.BadRequest, migrate)
+        self.unsubscribe.assert_called_once_with(
+            self.subscribe.return_value)
+
+    def test_unsubscribes_if_listing_fails(self):
+        self.client.list_migrations.side_effect = lib_exc.ServerFault()
+        self.assertRaises(lib_exc.ServerFault, waiters.MigrationWatcher,
+                          self.client, ['server'])
+        self.unsubscribe.assert_called_once_with(
+            self.subscribe.return_value)
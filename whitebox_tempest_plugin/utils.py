@@ -12,7 +12,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+from concurrent import futures
+import io
 import six
+import xml.etree.ElementTree as ET
 
 from oslo_serialization import jsonutils
 from tempest import config
@@ -51,6 +55,121 @@ def multicontext(*context_managers):
         yield [stack.enter_context(mgr) for mgr in context_managers]
 
 
+class FanOutResult(collections.namedtuple('FanOutResult',
+                                          ['value', 'error'])):
+    """The outcome of a fan_out() call for a single item: either the value
+    the function returned, or the exception it raised.
+    """
+
+    def result(self):
+        """Returns the value, or re-raises the error."""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def fan_out(func, items, max_workers=None):
+    """Calls func(item) for every item concurrently, in a bounded thread
+    pool, and waits for all the calls to complete. An error in one call does
+    not affect the others.
+
+    :param func: The function to call, typically one that runs commands on
+                 the host it is passed.
+    :param items: The items to call func with, typically hostnames. They
+                  must be hashable.
+    :param max_workers: The maximum number of concurrent calls, defaults to
+                        [whitebox]/max_concurrent_hosts.
+    :return: A dict of item to FanOutResult, in the order of items.
+    """
+    items = list(items)
+    if not items:
+        return {}
+    max_workers = max_workers or CONF.whitebox.max_concurrent_hosts
+    with futures.ThreadPoolExecutor(
+            max_workers=min(max_workers, len(items))) as executor:
+        futs = [executor.submit(func, item) for item in items]
+        futures.wait(futs)
+    return {item: FanOutResult(None, fut.exception())
+            if fut.exception() is not None
+            else FanOutResult(fut.result(), None)
+            for item, fut in zip(items, futs)}
+
+
+def _raise_first_error(results):
+    for result in results.values():
+        result.result()
+
+
+@contextlib.contextmanager
+def parallel_multicontext(*context_managers):
+    """Like multicontext(), but enters and exits the context managers
+    concurrently, for context managers that each act on a different host.
+    If any of them fails to enter, those that did are exited before the
+    error is raised. Exceptions raised by the body are not passed to the
+    context managers' __exit__(), so they cannot be suppressed.
+    """
+    indexes = range(len(context_managers))
+
+    def exit_all(entered):
+        _raise_first_error(fan_out(
+            lambda i: context_managers[i].__exit__(None, None, None),
+            entered))
+
+    results = fan_out(lambda i: context_managers[i].__enter__(), indexes)
+    entered = [i for i in indexes if results[i].error is None]
+    if len(entered) != len(context_managers):
+        try:
+            exit_all(entered)
+        finally:
+            _raise_first_error(results)
+    try:
+        yield [results[i].value for i in indexes]
+    finally:
+        exit_all(entered)
+
+
+def iterparse_paths(xml, *paths):
+    """Incrementally parses an XML document, yielding only the elements at
+    the given paths, without building the whole tree.
+
+    :param xml: The XML document, as a string.
+    :param paths: Slash-separated tag paths relative to the root element,
+                  for example 'host/topology/cells/cell' in libvirt
+                  capabilities.
+                  A path may be inside another one, like 'cputune' and
+                  'cputune/vcpupin'.
+    :return: A generator of (path, element) tuples, in document order of
+             the elements' ends, so an element comes after those it
+             contains. Each element is complete, children included, and
+             is detached from the document once yielded, so it only stays
+             in memory for as long as the caller holds on to it. Elements
+             inside another requested element are the exception: they are
+             left in place, so that the outer one is complete as well.
+             Everything outside the requested paths is discarded as soon
+             as it is parsed.
+    """
+    wanted = set(paths)
+    tags = []
+    parents = []
+    for event, elem in ET.iterparse(io.BytesIO(xml.encode('utf-8')),
+                                    events=('start', 'end')):
+        if event == 'start':
+            tags.append(elem.tag)
+            parents.append(elem)
+            continue
+        path = '/'.join(tags[1:])
+        tags.pop()
+        parents.pop()
+        if path in wanted:
+            yield path, elem
+        if any(path.startswith(w + '/') for w in wanted):
+            # NOTE(artom) Part of a requested element that is still being
+            # parsed, keep it, even if it was requested itself.
+            continue
+        if parents:
+            parents[-1].remove(elem)
+
+
 def get_ctlplane_address(compute_hostname):
     """Return the appropriate host address depending on a deployment.
 